@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy backwards-scanning chunker vs utils.chunking
+
+Usage:
+    python benchmarks/bench_chunking.py [file.pdf|file.txt ...]
+
+Without arguments a synthetic multi-megabyte document is used.
+"""
+
+import os
+import sys
+import time
+import random
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.chunking import chunk_spans, legacy_chunk_spans, TextBoundaries
+
+CHUNK_SIZE = 1000
+OVERLAP = 200
+
+def mean_overlap(spans):
+    """Average number of characters each chunk shares with the previous one"""
+    shared = [max(0, prev_end - start) for (_, prev_end), (start, _) in zip(spans, spans[1:])]
+    return sum(shared) / len(shared) if shared else 0
+
+def cut_sentences(spans, boundaries):
+    """
+    Share of chunk ends that fall inside a sentence, so the sentence is
+    split across two chunks and neither chunk's embedding covers all of it
+    """
+    ends = [end for _, end in spans[:-1]]
+    if not ends:
+        return 0
+    inside = sum(1 for end in ends if boundaries.last_sentence_end(end - 1, end) is None)
+    return inside / len(ends)
+
+def load_documents(paths):
+    """Load (name, text) pairs from PDFs/text files, or build a synthetic document"""
+    if not paths:
+        words = ["revenue", "contract", "clause", "liability", "the", "of", "and", "a",
+                 "section", "party", "agreement", "payment", "term", "notice"]
+        random.seed(0)
+        sentences = []
+        for _ in range(60000):
+            sentence = " ".join(random.choice(words) for _ in range(random.randint(5, 30)))
+            sentences.append(sentence.capitalize() + random.choice(['.', '.', '?', '!', '.\n\n']))
+        return [('synthetic', " ".join(sentences))]
+
+    documents = []
+    for path in paths:
+        if path.lower().endswith('.pdf'):
+            from utils.file_parser import pdf_parser
+            text = pdf_parser.extract_text_from_pdf(path)['text_content']
+        else:
+            with open(path, encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        documents.append((os.path.basename(path), text))
+    return documents
+
+def time_call(func, *args, repeat=3, **kwargs):
+    """Best-of-N wall time in seconds and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main():
+    documents = load_documents(sys.argv[1:])
+
+    print(f"{'document':<24}{'chars':>12}{'chunker':>10}{'chunks':>9}{'ms':>10}{'MB/s':>9}{'overlap':>9}{'cut':>8}")
+    print("-" * 91)
+    for name, text in documents:
+        size_mb = len(text) / 1e6
+        boundaries = TextBoundaries(text)
+        runs = [
+            ('legacy', lambda: legacy_chunk_spans(text, CHUNK_SIZE, OVERLAP)),
+            ('linear', lambda: chunk_spans(text, CHUNK_SIZE, OVERLAP)),
+            ('tokens', lambda: chunk_spans(text, CHUNK_SIZE, OVERLAP, token_budget=120)),
+        ]
+        for label, run in runs:
+            elapsed, spans = time_call(run)
+            print(f"{name[:23]:<24}{len(text):>12}{label:>10}{len(spans):>9}"
+                  f"{elapsed * 1000:>10.1f}{size_mb / elapsed if elapsed else 0:>9.1f}{mean_overlap(spans):>9.0f}"
+                  f"{cut_sentences(spans, boundaries):>8.1%}")
+
+        elapsed, _ = time_call(TextBoundaries, text)
+        print(f"{'':<24}{'':>12}{'(bounds)':>10}{'':>9}{elapsed * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: dense top-k through Chroma vs the in-memory NumPy index
+
+Usage:
+    python benchmarks/bench_vector_backends.py [--random-embeddings] [chunks ...]
+
+Indexes a synthetic document of each given size (default 200, 1000 and
+5000 chunks) into a temporary VectorStore and times filtered queries on
+both backends. --random-embeddings replaces the sentence-transformers
+model with random unit vectors, so only retrieval cost is measured.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.vectorstore import VectorStore
+from utils.embedding_cache import EmbeddingCache
+from utils.embeddings import embedding_backend
+
+QUERIES = 50
+N_RESULTS = 5
+WORDS = ["revenue", "contract", "clause", "liability", "section", "party", "agreement",
+         "payment", "term", "notice", "invoice", "balance", "schedule", "annex"]
+
+class RandomEmbedder:
+    """Stand-in for EmbeddingBackend that returns random unit vectors"""
+
+    model_name = 'random-384'
+    batch_size = 256
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self._rng = np.random.default_rng(0)
+
+    def encode(self, texts):
+        vectors = self._rng.standard_normal((len(texts), self.dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def encode_async(self, texts):
+        return self.executor.submit(self.encode, texts)
+
+def synthetic_document(file_hash, chunks):
+    """A parsed-document dict whose text chunks into roughly the given number of chunks"""
+    random.seed(file_hash)
+    sentences = []
+    while sum(len(s) + 1 for s in sentences) < chunks * 800:
+        sentence = " ".join(random.choice(WORDS) for _ in range(random.randint(5, 30)))
+        sentences.append(sentence.capitalize() + ".")
+    text = " ".join(sentences)
+    return {
+        'file_hash': file_hash,
+        'file_name': f"{file_hash}.pdf",
+        'file_path': '',
+        'text_content': text,
+        'text_length': len(text),
+        'total_pages': 1,
+        'page_offsets': [{'page_number': 1, 'start': 0, 'end': len(text)}]
+    }
+
+def time_queries(store, queries, file_hash, backend):
+    """Median and p95 per-query latency in milliseconds"""
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        store.search(query, n_results=N_RESULTS, filter_metadata={'file_hash': file_hash}, backend=backend)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95) - 1]
+
+def main():
+    args = sys.argv[1:]
+    use_random = '--random-embeddings' in args
+    sizes = [int(arg) for arg in args if arg.isdigit()] or [200, 1000, 5000]
+    embedder = RandomEmbedder() if use_random else embedding_backend
+
+    print(f"{'chunks':>8}{'backend':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print("-" * 38)
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix='bench_vector_')
+        try:
+            store = VectorStore(directory, embedder=embedder, cache=EmbeddingCache(directory))
+            # Measure retrieval, not the query result cache
+            store.search_result_cache.max_entries = 0
+            doc = synthetic_document(f"bench{size}", size)
+            chunks = store.add_documents([doc])
+
+            queries = [" ".join(random.choice(WORDS) for _ in range(6)) for _ in range(QUERIES)]
+            for query in queries:
+                # Warm the query embedding cache so both backends skip encoding
+                store._embed_query(query)
+            store.search(queries[0], filter_metadata={'file_hash': doc['file_hash']}, backend='memory')
+
+            for backend in ('chroma', 'memory'):
+                p50, p95 = time_queries(store, queries, doc['file_hash'], backend)
+                print(f"{chunks:>8}{backend:>10}{p50:>10.2f}{p95:>10.2f}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
 from flask_socketio import emit, join_room, leave_room
-from services.langchain_pdf import pdf_service, pdf_answer_streaming
+from services.langchain_pdf import pdf_service
+from utils.tenants import tenant_manager
+import functools
+import hashlib
+import hmac
 import os
 import tempfile
+import threading
 import uuid
 
 pdf_chat = Blueprint('pdf_chat', __name__)
@@ -18,6 +23,65 @@ def get_session_id():
         session['sid'] = sid
     return sid
 
+def get_tenant_id(data=None):
+    """
+    Tenant whose collection a request uses: the X-Tenant-ID header or a
+    tenant_id field, already checked by tenant_access_error.
+    session_collection=true without a tenant gives the caller's session a
+    collection of its own that expires when idle. None means the shared
+    collection.
+    """
+    data = data or {}
+    tenant_id = request.headers.get('X-Tenant-ID') or data.get('tenant_id')
+    if not tenant_id and str(data.get('session_collection', '')).lower() in ('1', 'true', 'yes'):
+        tenant_id = f"session-{get_session_id()}"
+        tenant_manager.get_store(tenant_id, kind='session')
+    return tenant_id
+
+def tenant_access_error(data=None):
+    """
+    Why the current request may not use the tenant it names, or None. With
+    PDF_TENANT_SECRET set, a tenant must come with its token (X-Tenant-Token
+    header or tenant_token field): the hex HMAC-SHA256 of the tenant id
+    under that secret. The first tenant a session uses is bound to it and
+    any other tenant is refused for the rest of the session.
+    """
+    data = data or {}
+    tenant_id = request.headers.get('X-Tenant-ID') or data.get('tenant_id')
+    if not tenant_id:
+        return None
+    secret = os.getenv('PDF_TENANT_SECRET')
+    if secret:
+        token = str(request.headers.get('X-Tenant-Token') or data.get('tenant_token') or '')
+        expected = hmac.new(secret.encode('utf-8'), str(tenant_id).encode('utf-8'), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(token, expected):
+            return 'Invalid tenant token'
+    if session.setdefault('tenant_id', tenant_id) != tenant_id:
+        return 'This session is bound to another tenant'
+    return None
+
+@pdf_chat.before_request
+def check_tenant_access():
+    data = dict(request.args)
+    data.update(request.form)
+    body = request.get_json(silent=True)
+    if isinstance(body, dict):
+        data.update(body)
+    error = tenant_access_error(data)
+    if error:
+        return jsonify({'error': error}), 403
+
+def require_admin(view):
+    """Allow a view only with Authorization: Bearer <PDF_ADMIN_TOKEN>; it is disabled while that is unset"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        admin_token = os.getenv('PDF_ADMIN_TOKEN')
+        supplied = request.headers.get('Authorization', '')
+        if not admin_token or not hmac.compare_digest(supplied, f"Bearer {admin_token}"):
+            return jsonify({'error': 'Admin token required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
 # --- WebSocket Streaming Endpoint ---
 def register_socketio(socketio):
     @socketio.on('pdf_chat_message')
@@ -28,15 +92,18 @@ def register_socketio(socketio):
         if not file_hashes or not question:
             emit('pdf_chat_stream', {'error': 'File(s) and question required', 'is_complete': True})
             return
+        error = tenant_access_error(data)
+        if error:
+            emit('pdf_chat_stream', {'error': error, 'is_complete': True})
+            return
+        tenant_id = get_tenant_id(data)
+        file_hashes = [file_hash for file_hash in file_hashes if pdf_service.has_document(file_hash, tenant_id)]
+        if not file_hashes:
+            emit('pdf_chat_stream', {'error': 'Document not found', 'is_complete': True})
+            return
 
-        # Retrieve context for follow-up
-        context = SESSION_CONTEXT.get(sid, "")
-
-        def stream_callback(partial, is_complete):
-            emit('pdf_chat_stream', {'content': partial, 'is_complete': is_complete})
-
-        # Use the context in your service (you may need to adapt your service to accept context)
-        pdf_answer_streaming(file_hashes, question, stream_callback, context=context)
+        answer_result = pdf_service.answer_question(question, file_hashes, tenant_id)
+        emit('pdf_chat_stream', {'content': answer_result.get('answer'), 'is_complete': True})
 
         # Update context for follow-up
         SESSION_CONTEXT[sid] = question
@@ -66,7 +133,7 @@ def upload_pdfs():
         if not temp_files:
             return jsonify({'error': 'No valid PDF files found'}), 400
         file_paths = [info['temp_path'] for info in file_info]
-        process_result = pdf_service.process_documents(file_paths)
+        process_result = pdf_service.process_documents(file_paths, get_tenant_id(request.form))
         if process_result['success']:
             return jsonify({
                 'success': True,
@@ -92,10 +159,68 @@ def upload_pdfs():
             except Exception:
                 pass
 
+@pdf_chat.route('/api/pdf/upload/stream', methods=['POST'])
+def upload_pdfs_streaming():
+    """
+    Start streaming ingestion of uploaded PDFs in the background. Progress is
+    emitted as 'pdf_ingest_progress' Socket.IO events to the room given by
+    the 'session_id' form field, followed by 'pdf_ingest_complete'.
+    """
+    temp_paths = []
+    try:
+        if 'files' not in request.files:
+            return jsonify({'error': 'No files uploaded'}), 400
+        session_id = request.form.get('session_id')
+        if not session_id:
+            return jsonify({'error': 'session_id is required for progress events'}), 400
+        for file in request.files.getlist('files'):
+            if file.filename and file.filename.lower().endswith('.pdf'):
+                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+                file.save(temp_file.name)
+                temp_paths.append(temp_file.name)
+        if not temp_paths:
+            return jsonify({'error': 'No valid PDF files found'}), 400
+
+        socketio = current_app.extensions['socketio']
+        job_id = str(uuid.uuid4())
+        tenant_id = get_tenant_id(request.form)
+
+        def emit_progress(event):
+            socketio.emit('pdf_ingest_progress', dict(event, job_id=job_id), room=session_id)
+
+        def run_ingestion(paths):
+            try:
+                result = pdf_service.process_documents_streaming(paths, emit_progress, tenant_id)
+                socketio.emit('pdf_ingest_complete', dict(result, job_id=job_id), room=session_id)
+            except Exception as e:
+                socketio.emit('pdf_ingest_complete', {'success': False, 'error': str(e), 'job_id': job_id}, room=session_id)
+            finally:
+                for path in paths:
+                    try:
+                        os.unlink(path)
+                    except Exception:
+                        pass
+
+        thread = threading.Thread(target=run_ingestion, args=(temp_paths,))
+        thread.daemon = True
+        thread.start()
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'files_queued': len(temp_paths)
+        }), 202
+    except Exception as e:
+        for path in temp_paths:
+            try:
+                os.unlink(path)
+            except Exception:
+                pass
+        return jsonify({'error': str(e)}), 500
+
 @pdf_chat.route('/api/pdf/summary/<file_hash>', methods=['GET'])
 def get_document_summary(file_hash):
     try:
-        summary = pdf_service.get_document_summary(file_hash)
+        summary = pdf_service.get_document_summary(file_hash, get_tenant_id(request.args))
         if 'error' in summary:
             return jsonify({'error': summary['error']}), 404
         return jsonify(summary)
@@ -108,7 +233,7 @@ def compare_documents():
         data = request.get_json()
         if not data or 'file_hash1' not in data or 'file_hash2' not in data:
             return jsonify({'error': 'Two file hashes are required'}), 400
-        comparison = pdf_service.compare_documents(data['file_hash1'], data['file_hash2'])
+        comparison = pdf_service.compare_documents(data['file_hash1'], data['file_hash2'], get_tenant_id(data))
         if 'error' in comparison:
             return jsonify({'error': comparison['error']}), 404
         return jsonify(comparison)
@@ -120,7 +245,7 @@ def translate_document(file_hash):
     try:
         data = request.get_json() or {}
         target_language = data.get('target_language', 'es')
-        translation = pdf_service.translate_document(file_hash, target_language)
+        translation = pdf_service.translate_document(file_hash, target_language, get_tenant_id(data))
         if 'error' in translation:
             return jsonify({'error': translation['error']}), 404
         return jsonify(translation)
@@ -133,7 +258,7 @@ def extract_content(file_hash):
         data = request.get_json()
         if not data or 'query' not in data:
             return jsonify({'error': 'Query is required'}), 400
-        extracted = pdf_service.extract_specific_content(file_hash, data['query'])
+        extracted = pdf_service.extract_specific_content(file_hash, data['query'], get_tenant_id(data))
         if 'error' in extracted:
             return jsonify({'error': extracted['error']}), 404
         return jsonify(extracted)
@@ -143,9 +268,13 @@ def extract_content(file_hash):
 @pdf_chat.route('/api/pdf/tables/<file_hash>', methods=['GET'])
 def get_document_tables(file_hash):
     try:
-        if file_hash not in pdf_service.document_cache:
+        if not pdf_service.has_document(file_hash, get_tenant_id(request.args)):
             return jsonify({'error': 'Document not found'}), 404
-        tables = pdf_service.document_cache[file_hash].get('tables', [])
+        from utils.table_store import table_store, frame_to_records
+        tables = []
+        for table in pdf_service.document_cache[file_hash].get('tables', []):
+            frame = table_store.load(file_hash, table['table_id'])
+            tables.append({**table, 'data': frame_to_records(frame) if frame is not None else []})
         return jsonify({
             'file_hash': file_hash,
             'file_name': pdf_service.document_cache[file_hash]['file_name'],
@@ -158,7 +287,7 @@ def get_document_tables(file_hash):
 @pdf_chat.route('/api/pdf/forms/<file_hash>', methods=['GET'])
 def get_document_forms(file_hash):
     try:
-        if file_hash not in pdf_service.document_cache:
+        if not pdf_service.has_document(file_hash, get_tenant_id(request.args)):
             return jsonify({'error': 'Document not found'}), 404
         forms = pdf_service.document_cache[file_hash].get('forms', [])
         return jsonify({
@@ -173,18 +302,16 @@ def get_document_forms(file_hash):
 @pdf_chat.route('/api/pdf/entities/<file_hash>', methods=['GET'])
 def get_document_entities(file_hash):
     try:
-        if file_hash not in pdf_service.document_cache:
+        tenant_id = get_tenant_id(request.args)
+        if not pdf_service.has_document(file_hash, tenant_id):
             return jsonify({'error': 'Document not found'}), 404
-        chunks = pdf_service.vector_store.get_document_by_hash(file_hash)
-        if not chunks:
-            return jsonify({'error': 'Document content not found'}), 404
-        from utils.file_parser import pdf_parser
-        full_text = " ".join([chunk['document'] for chunk in chunks])
-        entities = pdf_parser.extract_named_entities(full_text)
+        entities = pdf_service.get_document_entities([file_hash], tenant_id)
+        from utils.entity_index import entity_index
         return jsonify({
             'file_hash': file_hash,
             'file_name': pdf_service.document_cache[file_hash]['file_name'],
-            'entities': entities
+            'entities': entities,
+            'details': entity_index.get_entity_details([file_hash], tenant_id)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -197,7 +324,13 @@ def search_documents():
             return jsonify({'error': 'Search query is required'}), 400
         query = data['query']
         file_hashes = data.get('file_hashes', None)
-        answer_result = pdf_service._handle_semantic_search(query, file_hashes)
+        mode = data.get('mode')
+        if mode and mode not in ('vector', 'lexical', 'hybrid'):
+            return jsonify({'error': 'mode must be vector, lexical or hybrid'}), 400
+        backend = data.get('backend')
+        if backend and backend not in ('chroma', 'memory'):
+            return jsonify({'error': 'backend must be chroma or memory'}), 400
+        answer_result = pdf_service._handle_semantic_search(query, file_hashes, mode, backend, get_tenant_id(data))
         return jsonify({
             'query': query,
             'response': answer_result['answer'],
@@ -215,10 +348,11 @@ def summarize_documents():
         if not data or 'file_hashes' not in data:
             return jsonify({'error': 'File hashes are required'}), 400
         summary_type = data.get('summary_type', 'executive')
+        tenant_id = get_tenant_id(data)
         summaries = []
         for file_hash in data['file_hashes']:
-            if file_hash in pdf_service.document_cache:
-                summary = pdf_service.get_document_summary(file_hash)
+            if pdf_service.has_document(file_hash, tenant_id):
+                summary = pdf_service.get_document_summary(file_hash, tenant_id)
                 if 'error' not in summary:
                     summaries.append({
                         'file_hash': file_hash,
@@ -238,7 +372,7 @@ def clear_documents():
     try:
         data = request.get_json() or {}
         file_hashes = data.get('file_hashes', None)
-        success = pdf_service.clear_documents(file_hashes)
+        success = pdf_service.clear_documents(file_hashes, get_tenant_id(data))
         if success:
             return jsonify({
                 'success': True,
@@ -249,11 +383,48 @@ def clear_documents():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@pdf_chat.route('/api/pdf/stats', methods=['GET'])
+def get_collection_stats():
+    """Exact collection statistics (files, chunks, pages, bytes)"""
+    try:
+        return jsonify(pdf_service.get_collection_stats(get_tenant_id(request.args)))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@pdf_chat.route('/api/pdf/metrics', methods=['GET'])
+def get_metrics():
+    """Collection statistics, per-document registry records and cache sizes"""
+    try:
+        return jsonify(pdf_service.get_metrics(get_tenant_id(request.args)))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@pdf_chat.route('/api/pdf/tenants', methods=['GET'])
+@require_admin
+def list_tenants():
+    """Tenant and session collections with their document counts and last access"""
+    try:
+        tenants = tenant_manager.list_tenants()
+        return jsonify({'tenants': tenants, 'count': len(tenants)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@pdf_chat.route('/api/pdf/tenants/<tenant_id>', methods=['DELETE'])
+@require_admin
+def drop_tenant(tenant_id):
+    """Drop a tenant's collection and everything indexed in it"""
+    try:
+        if not tenant_manager.drop_tenant(tenant_id):
+            return jsonify({'error': 'Failed to drop tenant collection'}), 500
+        return jsonify({'success': True, 'tenant_id': tenant_id})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @pdf_chat.route('/api/pdf/info/<file_hash>', methods=['GET'])
 def get_pdf_info(file_hash):
     """Get metadata (pages, title, author, etc.) for a PDF by file_hash"""
     try:
-        if file_hash not in pdf_service.document_cache:
+        if not pdf_service.has_document(file_hash, get_tenant_id(request.args)):
             return jsonify({'error': 'Document not found'}), 404
         doc_info = pdf_service.document_cache[file_hash]
         # Try to get more metadata from parser if available
@@ -279,6 +450,8 @@ def get_pdf_info(file_hash):
 def get_pdf_page(file_hash, page_num):
     """Get content of a specific page (text, images, tables)"""
     try:
+        if not pdf_service.has_document(file_hash, get_tenant_id(request.args)):
+            return jsonify({'error': 'Document not found'}), 404
         from utils.file_parser import pdf_parser
         page_content = pdf_parser.get_page_content_by_hash(file_hash, page_num)
         if not page_content:
@@ -291,6 +464,8 @@ def get_pdf_page(file_hash, page_num):
 def download_pdf_content(file_hash, format):
     """Download answer/summary in PDF/TXT/JSON"""
     try:
+        if not pdf_service.has_document(file_hash, get_tenant_id(request.args)):
+            return jsonify({'error': 'Document not found'}), 404
         from utils.file_parser import pdf_parser
         # format: pdf, txt, json
         content = pdf_parser.export_content_by_hash(file_hash, format)
@@ -315,7 +490,7 @@ def download_pdf_content(file_hash, format):
 def get_pdf_images(file_hash):
     """Extract images from a PDF by file_hash"""
     try:
-        if file_hash not in pdf_service.document_cache:
+        if not pdf_service.has_document(file_hash, get_tenant_id(request.args)):
             return jsonify({'error': 'Document not found'}), 404
         doc_info = pdf_service.document_cache[file_hash]
         images = doc_info.get('images', [])
@@ -341,7 +516,7 @@ def query_pdf():
         # Retrieve context for follow-up
         context = SESSION_CONTEXT.get(session_id, "")
         # Use context in answer_question if supported
-        answer_result = pdf_service.answer_question(question, file_hashes)
+        answer_result = pdf_service.answer_question(question, file_hashes, get_tenant_id(data))
         # Update context for follow-up
         SESSION_CONTEXT[session_id] = question
         return jsonify({
@@ -353,6 +528,19 @@ def query_pdf():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@pdf_chat.route('/api/pdf/ready', methods=['GET'])
+def pdf_ready():
+    """Readiness probe: load the OCR/NLP model backends and report their availability"""
+    try:
+        from utils.file_parser import pdf_parser
+        backends = pdf_parser.warm_up()
+        return jsonify({
+            'ready': True,
+            'backends': backends
+        })
+    except Exception as e:
+        return jsonify({'ready': False, 'error': str(e)}), 503
+
 # --- Optional: Voice endpoints (stubs) ---
 @pdf_chat.route('/api/pdf/voice/query', methods=['POST'])
 def voice_query():
@@ -1,6 +1,7 @@
 import os
 import json
 import time
+import hashlib
 from typing import List, Dict, Any, Optional
 import google.generativeai as genai
 # LangChain imports - simplified for compatibility
@@ -12,10 +13,57 @@ except ImportError:
     LANGCHAIN_AVAILABLE = False
 from utils.file_parser import pdf_parser
 from utils.vectorstore import vector_store
+from utils.tenants import tenant_manager
+from utils.text_store import text_store
+from utils.entity_index import entity_index
+from utils.table_store import table_store
+from utils.document_cache import document_cache
+from utils.summarizer import summarizer
 import pandas as pd
 import re
 import numpy as np
 
+# Pages buffered per vector store write during streaming ingestion
+STREAM_PAGE_BATCH = int(os.getenv('PDF_STREAM_PAGE_BATCH', 5))
+# Default retrieval mode for semantic search: vector, lexical or hybrid
+SEARCH_MODE = os.getenv('PDF_SEARCH_MODE', 'vector')
+# Chunks passed to the LLM per search mode; fused rankings need fewer
+SEARCH_RESULTS = {'vector': 8, 'lexical': 5, 'hybrid': 5}
+# Default dense search backend: chroma, or memory for small per-session corpora
+VECTOR_BACKEND = os.getenv('PDF_VECTOR_BACKEND', 'chroma')
+
+# Summary strategy: 'single' summarises the whole text in one pass (extractive
+# for summary questions, one LLM prompt for document summaries); 'map_reduce'
+# summarises page groups and merges them (utils.summarizer), with the LLM when
+# one is configured and extractively otherwise
+SUMMARY_STRATEGY = os.getenv('PDF_SUMMARY_STRATEGY', 'single')
+
+# Prompts for map-reduce summarisation: one call per page group, then merges
+SECTION_SUMMARY_PROMPT = """
+Summarise the following part of a document. Keep key facts, figures,
+names and conclusions; do not add information that is not in the text.
+
+Document part:
+{text}
+
+Summary:
+"""
+MERGE_SUMMARY_PROMPT = """
+The following are summaries of consecutive parts of the document: {title}
+Combine them into a single {summary_type} summary.
+
+Please include:
+1. Main topics and themes
+2. Key findings or conclusions
+3. Document structure
+4. Important data or statistics mentioned
+
+Part summaries:
+{text}
+
+Summary:
+"""
+
 class AdvancedPDFService:
     """Advanced PDF service with comprehensive document analysis capabilities"""
     
@@ -37,12 +85,13 @@ class AdvancedPDFService:
         else:
             self.llm = None
         
-        # Document cache
-        self.document_cache = {}
+        # Document cache, bounded in memory and persisted across restarts
+        self.document_cache = document_cache
         
-    def process_documents(self, file_paths: List[str]) -> Dict[str, Any]:
+    def process_documents(self, file_paths: List[str], tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """
-        Process multiple PDF documents and add to vector store
+        Process multiple PDF documents and add to vector store (the tenant's
+        collection when tenant_id is given)
         """
         try:
             # Parse all documents with advanced features
@@ -50,26 +99,20 @@ class AdvancedPDFService:
             
             # Add to vector store
             if parsed_data['files']:
-                chunks_added = vector_store.add_documents(parsed_data['files'])
+                store = tenant_manager.get_store(tenant_id)
+                chunks_added = store.add_documents(parsed_data['files'])
+                tenant_manager.record_documents(tenant_id, [file_data['file_hash'] for file_data in parsed_data['files']])
                 
                 # Cache document info with advanced data
                 for file_data in parsed_data['files']:
-                    self.document_cache[file_data['file_hash']] = {
-                        'file_name': file_data['file_name'],
-                        'analysis': file_data['analysis'],
-                        'total_pages': file_data['total_pages'],
-                        'text_length': file_data['text_length'],
-                        'tables': file_data.get('tables', []),
-                        'images': file_data.get('images', []),
-                        'forms': file_data.get('forms', []),
-                        'annotations': file_data.get('annotations', [])
-                    }
+                    self._cache_document(file_data, tenant_id)
                 
                 return {
                     'success': True,
                     'files_processed': len(parsed_data['files']),
                     'total_pages': parsed_data['total_pages'],
                     'chunks_added': chunks_added,
+                    'embedding_stats': store.last_ingest_stats,
                     'analysis': parsed_data['combined_analysis'],
                     'tables_found': len(parsed_data['all_tables']),
                     'images_found': len(parsed_data['all_images']),
@@ -82,7 +125,217 @@ class AdvancedPDFService:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def answer_question(self, question: str, file_hashes: Optional[List[str]] = None) -> Dict[str, Any]:
+    def process_documents_streaming(self, file_paths: List[str], progress_callback=None,
+                                    tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process PDF documents page by page, adding chunks to the vector store
+        as pages are parsed so early pages are queryable while later ones are
+        still being processed. progress_callback(event) receives a dict per
+        indexed page batch and per finished file.
+        """
+        def report(event: Dict[str, Any]):
+            if progress_callback:
+                try:
+                    progress_callback(event)
+                except Exception as e:
+                    print(f"Error reporting ingestion progress: {e}")
+        
+        processed_files = []
+        total_chunks = 0
+        store = tenant_manager.get_store(tenant_id)
+        
+        for file_path in file_paths:
+            try:
+                file_info = {
+                    'file_path': file_path,
+                    'file_name': os.path.basename(file_path)
+                }
+                stream = None
+                pending_pages = []
+                pages_done = 0
+                chunks_added = 0
+                already_indexed = None
+                
+                for event in pdf_parser.iter_extract_pdf(file_path):
+                    if event['type'] == 'page':
+                        file_info['file_hash'] = event['file_hash']
+                        if already_indexed is None:
+                            already_indexed = store.is_indexed(event['file_hash'])
+                        if already_indexed:
+                            # Re-upload of an indexed document, keep parsing for the cache only
+                            continue
+                        pending_pages.append(event)
+                        if len(pending_pages) < STREAM_PAGE_BATCH:
+                            continue
+                        
+                        if stream is None:
+                            stream = store.open_document_stream(file_info)
+                        chunks_added += stream.add_pages(pending_pages)
+                        pages_done += len(pending_pages)
+                        pending_pages = []
+                        report({
+                            'stage': 'indexing',
+                            'file_name': file_info['file_name'],
+                            'file_hash': event['file_hash'],
+                            'pages_processed': pages_done,
+                            'total_pages': event['total_pages'],
+                            'chunks_added': chunks_added
+                        })
+                        continue
+                    
+                    # Final document event
+                    file_data = event['document']
+                    if already_indexed:
+                        chunks_added = 0
+                    elif pending_pages or pages_done:
+                        if stream is None:
+                            stream = store.open_document_stream(file_info)
+                        # Pages still pending are covered by the document's full text
+                        chunks_added += stream.finish(file_data)
+                    else:
+                        # Served from the parse cache, nothing was streamed
+                        chunks_added = store.add_documents([file_data])
+                    
+                    tenant_manager.record_documents(tenant_id, [file_data['file_hash']])
+                    self._cache_document(file_data, tenant_id)
+                    processed_files.append(file_data)
+                    total_chunks += chunks_added
+                    report({
+                        'stage': 'file_complete',
+                        'file_name': file_data['file_name'],
+                        'file_hash': file_data['file_hash'],
+                        'pages_processed': file_data['total_pages'],
+                        'total_pages': file_data['total_pages'],
+                        'chunks_added': chunks_added
+                    })
+                    
+            except Exception as e:
+                print(f"Error parsing {file_path}: {str(e)}")
+                report({
+                    'stage': 'error',
+                    'file_name': os.path.basename(file_path),
+                    'error': str(e)
+                })
+                continue
+        
+        if not processed_files:
+            return {'success': False, 'error': 'No valid files processed'}
+        
+        return {
+            'success': True,
+            'files_processed': len(processed_files),
+            'total_pages': sum(file_data['total_pages'] for file_data in processed_files),
+            'chunks_added': total_chunks,
+            'files': [
+                {
+                    'file_hash': file_data['file_hash'],
+                    'file_name': file_data['file_name'],
+                    'size': file_data['file_size'],
+                    'total_pages': file_data['total_pages']
+                }
+                for file_data in processed_files
+            ]
+        }
+    
+    def _cache_document(self, file_data: Dict[str, Any], tenant_id: Optional[str] = None):
+        """Cache document info with advanced data and persist its full text and the tenant's entity index"""
+        text_store.put(file_data['file_hash'], file_data['text_content'], file_data.get('page_offsets', []))
+        entity_index.build(
+            file_data['file_hash'],
+            file_data['text_content'],
+            file_data.get('page_offsets', []),
+            file_data['analysis'].get('named_entities', {}),
+            tenant_id
+        )
+        self.document_cache[file_data['file_hash']] = {
+            'file_name': file_data['file_name'],
+            'analysis': file_data['analysis'],
+            'total_pages': file_data['total_pages'],
+            'text_length': file_data['text_length'],
+            'tables': table_store.put(file_data['file_hash'], file_data.get('tables', [])),
+            'images': file_data.get('images', []),
+            'forms': file_data.get('forms', []),
+            'annotations': file_data.get('annotations', [])
+        }
+    
+    def has_document(self, file_hash: str, tenant_id: Optional[str] = None) -> bool:
+        """Whether a document is cached and held by the tenant (the shared collection when tenant_id is None)"""
+        return file_hash in self.document_cache and tenant_manager.has_document(file_hash, tenant_id)
+    
+    def _document_hashes(self, file_hashes: Optional[List[str]], tenant_id: Optional[str]) -> List[str]:
+        """The requested file hashes, or all of the tenant's documents, keeping only those the tenant holds"""
+        if not file_hashes:
+            file_hashes = tenant_manager.document_hashes(tenant_id)
+        return [file_hash for file_hash in file_hashes if self.has_document(file_hash, tenant_id)]
+    
+    def get_document_text(self, file_hash: str, tenant_id: Optional[str] = None) -> str:
+        """
+        Full parsed text of a document from the text store. Documents
+        indexed before the text store existed fall back to joining their
+        chunks from the tenant's vector store.
+        """
+        text = text_store.get_text(file_hash)
+        if text is not None:
+            return text
+        chunks = tenant_manager.store_for_document(file_hash, tenant_id).get_document_by_hash(file_hash)
+        chunks.sort(key=lambda chunk: chunk['metadata'].get('chunk_index', 0))
+        return " ".join(chunk['document'] for chunk in chunks)
+    
+    def get_document_sections(self, file_hash: str, tenant_id: Optional[str] = None) -> List[str]:
+        """Page texts of a document in page order, or its whole text as one section when pages are not stored"""
+        if text_store.has(file_hash):
+            page_numbers = [page['page_number'] for page in text_store.get_page_offsets(file_hash)]
+            pages = text_store.get_pages(file_hash, page_numbers) or {}
+            if pages:
+                return [pages[page_number] for page_number in sorted(pages)]
+        text = self.get_document_text(file_hash, tenant_id)
+        return [text] if text else []
+    
+    def _summarize_sections(self, sections: List[str], title: str, summary_type: str = 'executive',
+                            file_hashes: Optional[List[str]] = None) -> str:
+        """
+        Map-reduce summary of page texts: page groups are summarised
+        concurrently with the configured LLM and the results merged. Without
+        an LLM the extractive summaries of pdf_parser stand in for both steps.
+        Cache namespaces carry a hash of the prompt each step formats, so a
+        merge summary naming one document is never served for another.
+        """
+        if self.api_key:
+            complete = lambda prompt: self.model.generate_content(prompt).text
+            namespace = f"gemini-pro:{summary_type}"
+        elif self.palm_api_key and self.llm:
+            complete = self.llm
+            namespace = f"palm:{summary_type}"
+        else:
+            extractive = lambda text: pdf_parser.generate_summary(text, summary_type)
+            return summarizer.summarize(sections, extractive, extractive, f"extractive:{summary_type}", file_hashes)
+        
+        prompt_hash = lambda *parts: hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()[:16]
+        try:
+            return summarizer.summarize(
+                sections,
+                lambda text: complete(SECTION_SUMMARY_PROMPT.format(text=text)),
+                lambda text: complete(MERGE_SUMMARY_PROMPT.format(title=title, summary_type=summary_type, text=text)),
+                f"{namespace}:{prompt_hash(SECTION_SUMMARY_PROMPT)}",
+                file_hashes,
+                merge_namespace=f"{namespace}:merge:{prompt_hash(MERGE_SUMMARY_PROMPT, title)}"
+            )
+        except Exception as e:
+            return f"Error generating summary: {str(e)}"
+    
+    def get_document_entities(self, file_hashes: List[str], tenant_id: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        Named entities of the tenant's given documents from the entity
+        index. Documents ingested before the entity index existed have no
+        entries until python -m utils.backfill_entities indexes them.
+        """
+        missing = [file_hash for file_hash in file_hashes if not entity_index.has_document(file_hash, tenant_id)]
+        if missing:
+            print(f"{len(missing)} documents have no entity index; run python -m utils.backfill_entities")
+        return entity_index.get_entities(file_hashes, tenant_id)
+    
+    def answer_question(self, question: str, file_hashes: Optional[List[str]] = None,
+                        tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Answer questions using semantic search and LLM with advanced features
         """
@@ -92,22 +345,22 @@ class AdvancedPDFService:
             
             # Table-specific queries
             if any(word in question_lower for word in ['table', 'total', 'sum', 'average', 'calculate', 'balance']):
-                return self._handle_table_query(question, file_hashes)
+                return self._handle_table_query(question, file_hashes, tenant_id)
             
             # Form-specific queries
             if any(word in question_lower for word in ['form', 'field', 'signature', 'checkbox']):
-                return self._handle_form_query(question, file_hashes)
+                return self._handle_form_query(question, file_hashes, tenant_id)
             
             # Summary requests
             if any(word in question_lower for word in ['summarize', 'summary', 'overview']):
-                return self._handle_summary_request(question, file_hashes)
+                return self._handle_summary_request(question, file_hashes, tenant_id)
             
             # Named entity queries
             if any(word in question_lower for word in ['who', 'when', 'where', 'how much', 'organization']):
-                return self._handle_entity_query(question, file_hashes)
+                return self._handle_entity_query(question, file_hashes, tenant_id)
             
             # Regular semantic search
-            return self._handle_semantic_search(question, file_hashes)
+            return self._handle_semantic_search(question, file_hashes, tenant_id=tenant_id)
             
         except Exception as e:
             return {
@@ -116,14 +369,14 @@ class AdvancedPDFService:
                 'confidence': 'low'
             }
     
-    def _handle_table_query(self, question: str, file_hashes: Optional[List[str]] = None) -> Dict[str, Any]:
+    def _handle_table_query(self, question: str, file_hashes: Optional[List[str]] = None,
+                            tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """Handle table-specific queries"""
         try:
-            # Get tables from cached documents
+            # Get tables from the tenant's cached documents
             all_tables = []
-            for file_hash in file_hashes or self.document_cache.keys():
-                if file_hash in self.document_cache:
-                    all_tables.extend(self.document_cache[file_hash]['tables'])
+            for file_hash in self._document_hashes(file_hashes, tenant_id):
+                all_tables.extend(self.document_cache[file_hash]['tables'])
             
             if not all_tables:
                 return {
@@ -149,24 +402,31 @@ class AdvancedPDFService:
                 'confidence': 'low'
             }
     
+    def _aggregate_table_columns(self, tables: List[Dict], aggregate: str) -> List[Dict[str, Any]]:
+        """Sum or average every numeric column of each table, one vectorised call per table"""
+        results = []
+        for table in tables:
+            if not table.get('numeric_columns'):
+                continue
+            df = table_store.load(table['file_hash'], table['table_id'])
+            if df is None:
+                continue
+            
+            values = getattr(df[table['numeric_columns']], aggregate)()
+            for col, value in values.dropna().items():
+                results.append({
+                    'table': f"Table on page {table['page_number']}",
+                    'file_hash': table['file_hash'],
+                    'table_id': table['table_id'],
+                    'column': col,
+                    'total' if aggregate == 'sum' else 'average': float(value)
+                })
+        return results
+    
     def _calculate_table_totals(self, tables: List[Dict], question: str) -> Dict[str, Any]:
         """Calculate totals from tables"""
         try:
-            results = []
-            for table in tables:
-                df = pd.DataFrame(table['data'])
-                
-                # Find numeric columns
-                numeric_cols = df.select_dtypes(include=[np.number]).columns
-                
-                for col in numeric_cols:
-                    total = df[col].sum()
-                    results.append({
-                        'table': f"Table on page {table['page_number']}",
-                        'column': col,
-                        'total': total,
-                        'data': table['data']
-                    })
+            results = self._aggregate_table_columns(tables, 'sum')
             
             if results:
                 answer = "Here are the totals from the tables:\n\n"
@@ -193,14 +453,48 @@ class AdvancedPDFService:
                 'confidence': 'low'
             }
     
+    def _calculate_table_averages(self, tables: List[Dict], question: str) -> Dict[str, Any]:
+        """Calculate averages from tables"""
+        try:
+            results = self._aggregate_table_columns(tables, 'mean')
+            
+            if results:
+                answer = "Here are the averages from the tables:\n\n"
+                for result in results[:5]:  # Limit to top 5
+                    answer += f"• {result['table']} - {result['column']}: {result['average']:.2f}\n"
+                
+                return {
+                    'answer': answer,
+                    'sources': [{'file_name': 'Table Data', 'type': 'table_calculation'}],
+                    'confidence': 'high',
+                    'table_data': results
+                }
+            else:
+                return {
+                    'answer': "I found tables but couldn't calculate averages from the available data.",
+                    'sources': [],
+                    'confidence': 'medium'
+                }
+                
+        except Exception as e:
+            return {
+                'answer': f"Error calculating averages: {str(e)}",
+                'sources': [],
+                'confidence': 'low'
+            }
+    
     def _search_table_content(self, tables: List[Dict], question: str) -> Dict[str, Any]:
         """Search for content in tables"""
         try:
             matching_tables = []
+            words = question.lower().split()
             
             for table in tables:
-                table_text = str(table['data'])
-                if any(word in table_text.lower() for word in question.lower().split()):
+                df = table_store.load(table['file_hash'], table['table_id'])
+                if df is None:
+                    continue
+                table_text = " ".join(table['columns'] + df.astype(str).values.ravel().tolist()).lower()
+                if any(word in table_text for word in words):
                     matching_tables.append(table)
             
             if matching_tables:
@@ -228,13 +522,13 @@ class AdvancedPDFService:
                 'confidence': 'low'
             }
     
-    def _handle_form_query(self, question: str, file_hashes: Optional[List[str]] = None) -> Dict[str, Any]:
+    def _handle_form_query(self, question: str, file_hashes: Optional[List[str]] = None,
+                           tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """Handle form-specific queries"""
         try:
             all_forms = []
-            for file_hash in file_hashes or self.document_cache.keys():
-                if file_hash in self.document_cache:
-                    all_forms.extend(self.document_cache[file_hash]['forms'])
+            for file_hash in self._document_hashes(file_hashes, tenant_id):
+                all_forms.extend(self.document_cache[file_hash]['forms'])
             
             if not all_forms:
                 return {
@@ -271,7 +565,8 @@ class AdvancedPDFService:
                 'confidence': 'low'
             }
     
-    def _handle_summary_request(self, question: str, file_hashes: Optional[List[str]] = None) -> Dict[str, Any]:
+    def _handle_summary_request(self, question: str, file_hashes: Optional[List[str]] = None,
+                                tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """Handle summary requests"""
         try:
             # Determine summary type
@@ -284,17 +579,19 @@ class AdvancedPDFService:
             else:
                 summary_type = 'executive'
             
-            # Get document content
-            combined_text = ""
-            for file_hash in file_hashes or self.document_cache.keys():
-                if file_hash in self.document_cache:
-                    # Get document text from vector store
-                    chunks = vector_store.get_document_by_hash(file_hash)
-                    if chunks:
-                        doc_text = " ".join([chunk['document'] for chunk in chunks])
-                        combined_text += f"\n\n--- {self.document_cache[file_hash]['file_name']} ---\n{doc_text}"
-            
-            if not combined_text:
+            # Get document pages, each document's first page headed by its name
+            sections = []
+            file_names = []
+            file_hashes = self._document_hashes(file_hashes, tenant_id)
+            for file_hash in file_hashes:
+                doc_sections = self.get_document_sections(file_hash, tenant_id)
+                if doc_sections:
+                    file_name = self.document_cache[file_hash]['file_name']
+                    doc_sections[0] = f"--- {file_name} ---\n{doc_sections[0]}"
+                    sections.extend(doc_sections)
+                    file_names.append(file_name)
+            
+            if not sections:
                 return {
                     'answer': "I couldn't find any document content to summarize.",
                     'sources': [],
@@ -302,7 +599,10 @@ class AdvancedPDFService:
                 }
             
             # Generate summary
-            summary = pdf_parser.generate_summary(combined_text, summary_type)
+            if SUMMARY_STRATEGY == 'map_reduce':
+                summary = self._summarize_sections(sections, ", ".join(file_names), summary_type, file_hashes)
+            else:
+                summary = pdf_parser.generate_summary("\n\n".join(sections), summary_type)
             
             return {
                 'answer': f"Here's the {summary_type} summary:\n\n{summary}",
@@ -317,27 +617,21 @@ class AdvancedPDFService:
                 'confidence': 'low'
             }
     
-    def _handle_entity_query(self, question: str, file_hashes: Optional[List[str]] = None) -> Dict[str, Any]:
+    def _handle_entity_query(self, question: str, file_hashes: Optional[List[str]] = None,
+                             tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """Handle named entity queries"""
         try:
-            # Get document content
-            combined_text = ""
-            for file_hash in file_hashes or self.document_cache.keys():
-                if file_hash in self.document_cache:
-                    chunks = vector_store.get_document_by_hash(file_hash)
-                    if chunks:
-                        doc_text = " ".join([chunk['document'] for chunk in chunks])
-                        combined_text += f"\n\n{doc_text}"
-            
-            if not combined_text:
+            file_hashes = self._document_hashes(file_hashes, tenant_id)
+            
+            if not file_hashes:
                 return {
                     'answer': "I couldn't find any document content to analyze.",
                     'sources': [],
                     'confidence': 'low'
                 }
             
-            # Extract named entities
-            entities = pdf_parser.extract_named_entities(combined_text)
+            # Look up named entities in the entity index
+            entities = self.get_document_entities(file_hashes, tenant_id)
             
             # Answer based on entity type
             question_lower = question.lower()
@@ -372,15 +666,24 @@ class AdvancedPDFService:
                 'confidence': 'low'
             }
     
-    def _handle_semantic_search(self, question: str, file_hashes: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Handle regular semantic search"""
+    def _handle_semantic_search(self, question: str, file_hashes: Optional[List[str]] = None,
+                                mode: Optional[str] = None, backend: Optional[str] = None,
+                                tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """Handle regular semantic search (vector, lexical or hybrid retrieval)"""
         try:
             # Search for relevant documents
             filter_metadata = None
             if file_hashes:
                 filter_metadata = {"file_hash": {"$in": file_hashes}}
             
-            search_results = vector_store.search(question, n_results=8, filter_metadata=filter_metadata)
+            mode = mode or SEARCH_MODE
+            search_results = tenant_manager.get_store(tenant_id).search(
+                question,
+                n_results=SEARCH_RESULTS.get(mode, 8),
+                filter_metadata=filter_metadata,
+                mode=mode,
+                backend=backend or VECTOR_BACKEND
+            )
             
             if not search_results:
                 return {
@@ -394,11 +697,20 @@ class AdvancedPDFService:
             sources = []
             
             for result in search_results:
-                context_parts.append(f"Document: {result['metadata']['file_name']}\nContent: {result['document']}")
+                metadata = result['metadata']
+                pages = self._format_page_range(metadata.get('page_start'), metadata.get('page_end'))
+                source_label = f"{metadata['file_name']} ({pages})" if pages else metadata['file_name']
+                context_parts.append(f"Document: {source_label}\nContent: {result['document']}")
                 sources.append({
-                    'file_name': result['metadata']['file_name'],
-                    'chunk_index': result['metadata']['chunk_index'],
-                    'relevance_score': 1 - (result['distance'] or 0)
+                    'file_name': metadata['file_name'],
+                    'chunk_index': metadata['chunk_index'],
+                    'page_start': metadata.get('page_start'),
+                    'page_end': metadata.get('page_end'),
+                    # Only dense hits have a distance; BM25 and fused rankings keep their own scores
+                    'relevance_score': 1 - result['distance'] if result.get('distance') is not None else None,
+                    'distance': result.get('distance'),
+                    'bm25_score': result.get('bm25_score'),
+                    'rrf_score': result.get('rrf_score')
                 })
             
             context = "\n\n".join(context_parts)
@@ -425,10 +737,18 @@ class AdvancedPDFService:
                 'confidence': 'low'
             }
     
-    def compare_documents(self, file_hash1: str, file_hash2: str) -> Dict[str, Any]:
+    def _format_page_range(self, page_start: Optional[int], page_end: Optional[int]) -> str:
+        """Format a chunk's page range for citations, e.g. 'page 3' or 'pages 3-4'"""
+        if not page_start:
+            return ""
+        if not page_end or page_end == page_start:
+            return f"page {page_start}"
+        return f"pages {page_start}-{page_end}"
+    
+    def compare_documents(self, file_hash1: str, file_hash2: str, tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """Compare two documents"""
         try:
-            if file_hash1 not in self.document_cache or file_hash2 not in self.document_cache:
+            if not self.has_document(file_hash1, tenant_id) or not self.has_document(file_hash2, tenant_id):
                 return {'error': 'One or both documents not found in cache'}
             
             # Get document paths (this would need to be stored or retrieved)
@@ -452,20 +772,18 @@ class AdvancedPDFService:
         except Exception as e:
             return {'error': str(e)}
     
-    def translate_document(self, file_hash: str, target_language: str = 'es') -> Dict[str, Any]:
+    def translate_document(self, file_hash: str, target_language: str = 'es',
+                           tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """Translate document content"""
         try:
-            if file_hash not in self.document_cache:
+            if not self.has_document(file_hash, tenant_id):
                 return {'error': 'Document not found in cache'}
             
             # Get document content
-            chunks = vector_store.get_document_by_hash(file_hash)
-            if not chunks:
+            full_text = self.get_document_text(file_hash, tenant_id)
+            if not full_text:
                 return {'error': 'Document content not found'}
             
-            # Combine chunks
-            full_text = " ".join([chunk['document'] for chunk in chunks])
-            
             # Translate (this would integrate with a translation service)
             translated_text = pdf_parser.translate_text(full_text, target_language)
             
@@ -479,20 +797,17 @@ class AdvancedPDFService:
         except Exception as e:
             return {'error': str(e)}
     
-    def extract_specific_content(self, file_hash: str, query: str) -> Dict[str, Any]:
+    def extract_specific_content(self, file_hash: str, query: str, tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """Extract specific content based on query"""
         try:
-            if file_hash not in self.document_cache:
+            if not self.has_document(file_hash, tenant_id):
                 return {'error': 'Document not found in cache'}
             
             # Get document content
-            chunks = vector_store.get_document_by_hash(file_hash)
-            if not chunks:
+            full_text = self.get_document_text(file_hash, tenant_id)
+            if not full_text:
                 return {'error': 'Document content not found'}
             
-            # Combine chunks
-            full_text = " ".join([chunk['document'] for chunk in chunks])
-            
             # Extract specific content
             extracted_content = pdf_parser.extract_specific_content(full_text, query)
             
@@ -585,23 +900,24 @@ class AdvancedPDFService:
         else:
             return 'low'
     
-    def get_document_summary(self, file_hash: str) -> Dict[str, Any]:
+    def get_document_summary(self, file_hash: str, tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """Get summary of a specific document"""
         try:
-            if file_hash not in self.document_cache:
+            if not self.has_document(file_hash, tenant_id):
                 return {'error': 'Document not found in cache'}
             
             doc_info = self.document_cache[file_hash]
-            chunks = vector_store.get_document_by_hash(file_hash)
-            
-            if not chunks:
-                return {'error': 'Document chunks not found'}
+            full_text = self.get_document_text(file_hash, tenant_id)
             
-            # Combine all chunks
-            full_text = " ".join([chunk['document'] for chunk in chunks])
+            if not full_text:
+                return {'error': 'Document content not found'}
             
-            # Generate summary
-            if self.api_key:
+            # Generate summary; map-reduce runs extractively without an LLM,
+            # as it does for summary questions
+            if SUMMARY_STRATEGY == 'map_reduce':
+                sections = self.get_document_sections(file_hash, tenant_id)
+                summary = self._summarize_sections(sections, doc_info['file_name'], file_hashes=[file_hash])
+            elif self.api_key:
                 summary = self._generate_gemini_summary(full_text, doc_info['file_name'])
             elif self.palm_api_key and self.llm:
                 summary = self._generate_palm_summary(full_text, doc_info['file_name'])
@@ -677,21 +993,45 @@ class AdvancedPDFService:
         
         return f"This document '{file_name}' contains approximately {word_count} words of content. The document appears to be well-structured and covers various topics. It includes detailed information that would be valuable for understanding the subject matter. For specific details, please ask targeted questions about particular sections or concepts."
     
-    def get_collection_stats(self) -> Dict[str, Any]:
+    def get_collection_stats(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """Get statistics about the document collection"""
-        return vector_store.get_collection_stats()
+        return tenant_manager.get_store(tenant_id).get_collection_stats()
+    
+    def get_metrics(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """Collection statistics plus per-document registry records and cache sizes"""
+        store = tenant_manager.get_store(tenant_id)
+        return {
+            'collection': store.get_collection_stats(),
+            'documents': store.list_documents(),
+            'embedding_cache': store.embedding_cache.get_stats(),
+            'last_ingest': store.last_ingest_stats,
+            'document_cache_entries': len(self.document_cache),
+            'document_cache': self.document_cache.get_stats(),
+            'tenants': tenant_manager.list_tenants()
+        }
     
-    def clear_documents(self, file_hashes: Optional[List[str]] = None) -> bool:
-        """Clear documents from vector store"""
+    def clear_documents(self, file_hashes: Optional[List[str]] = None, tenant_id: Optional[str] = None) -> bool:
+        """
+        Clear documents from vector store; without file hashes a tenant's
+        whole collection is dropped. Per-document data shared by every
+        collection holding a file (full text, tables, document cache) is
+        only removed once no collection holds it.
+        """
         try:
             if file_hashes:
+                store = tenant_manager.get_store(tenant_id)
                 for file_hash in file_hashes:
-                    vector_store.delete_document(file_hash)
-                    if file_hash in self.document_cache:
-                        del self.document_cache[file_hash]
+                    store.delete_document(file_hash)
+                    entity_index.delete_document(file_hash, tenant_id)
+                tenant_manager.forget_documents(tenant_id, file_hashes)
+                tenant_manager.purge_unreferenced(file_hashes)
+            elif tenant_id:
+                tenant_manager.drop_tenant(tenant_id)
             else:
+                file_hashes = tenant_manager.document_hashes(None)
                 vector_store.reset_collection()
-                self.document_cache.clear()
+                entity_index.clear()
+                tenant_manager.purge_unreferenced(file_hashes)
             
             return True
             
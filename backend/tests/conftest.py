@@ -0,0 +1,50 @@
+import os
+import sys
+import hashlib
+import tempfile
+
+import numpy as np
+import pytest
+
+# The utils modules create global instances under ./chroma_db and
+# ./pdf_cache on import; point them at a scratch directory first
+_SCRATCH = tempfile.mkdtemp(prefix='pdf-bot-tests-')
+os.environ['PDF_CACHE_DIR'] = os.path.join(_SCRATCH, 'pdf_cache')
+os.environ['PDF_TEXT_STORE_DIR'] = os.path.join(_SCRATCH, 'chroma_db', 'texts')
+os.environ['PDF_TABLE_STORE_DIR'] = os.path.join(_SCRATCH, 'chroma_db', 'tables')
+os.environ['PDF_ENTITY_INDEX_DIR'] = os.path.join(_SCRATCH, 'chroma_db')
+os.chdir(_SCRATCH)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.embeddings import EmbeddingBackend
+
+class HashEmbedder(EmbeddingBackend):
+    """Deterministic 8-dimensional embeddings from a hash of the text, so no model is loaded"""
+
+    def encode(self, texts):
+        return np.array([
+            np.frombuffer(hashlib.sha256(text.encode('utf-8')).digest(), dtype=np.uint8)[:8].astype(np.float32)
+            for text in texts
+        ], dtype=np.float32).reshape(len(texts), 8)
+
+def make_document(file_hash: str, pages):
+    """Parsed-document dict as AdvancedPDFParser returns it, from a list of page texts"""
+    text = ""
+    page_offsets = []
+    for page_number, page_text in enumerate(pages, start=1):
+        page_offsets.append({'page_number': page_number, 'start': len(text), 'end': len(text) + len(page_text)})
+        text += page_text
+    return {
+        'file_hash': file_hash,
+        'file_name': f"{file_hash[:8]}.pdf",
+        'text_content': text,
+        'page_offsets': page_offsets,
+        'total_pages': len(pages),
+        'text_length': len(text),
+        'file_size': len(text.encode('utf-8'))
+    }
+
+@pytest.fixture
+def embedder():
+    return HashEmbedder()
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from utils.chunking import chunk_spans, count_tokens
+
+def _sentences(count=400, seed=0):
+    words = ['revenue', 'contract', 'clause', 'the', 'of', 'party', 'payment', 'notice']
+    rng = random.Random(seed)
+    return " ".join(
+        " ".join(rng.choice(words) for _ in range(rng.randint(5, 30))).capitalize() + rng.choice(['.', '?', '.\n\n'])
+        for _ in range(count)
+    )
+
+def _assert_covers(text, spans, chunk_size):
+    assert spans[0][0] == 0
+    assert spans[-1][1] == len(text)
+    for (start, end), (next_start, next_end) in zip(spans, spans[1:]):
+        assert start < next_start <= end
+        assert next_end > end
+    assert all(0 < end - start <= chunk_size for start, end in spans)
+
+def test_text_without_boundaries_is_cut_hard_and_always_advances():
+    text = 'x' * 5000
+
+    spans = chunk_spans(text, chunk_size=1000, overlap=200)
+
+    _assert_covers(text, spans, 1000)
+    assert [end - start for start, end in spans[:-1]] == [1000] * (len(spans) - 1)
+
+def test_huge_overlap_still_makes_progress():
+    text = _sentences(50)
+
+    spans = chunk_spans(text, chunk_size=300, overlap=1000)
+
+    _assert_covers(text, spans, 300)
+    for (start, end), (next_start, _) in zip(spans, spans[1:]):
+        assert end - next_start <= (end - start) // 2 + (end - start) // 4 + 1
+
+@pytest.mark.parametrize('overlap', [0, 100, 200])
+def test_overlap_stays_within_half_to_one_and_a_half_times_the_setting(overlap):
+    text = _sentences()
+
+    spans = chunk_spans(text, chunk_size=1000, overlap=overlap)
+
+    _assert_covers(text, spans, 1000)
+    for (start, end), (next_start, _) in zip(spans, spans[1:]):
+        shared = end - next_start
+        assert overlap - overlap // 2 - 1 <= shared <= overlap + overlap // 2 + 1
+
+def test_chunks_end_on_sentence_boundaries_when_there_are_some():
+    text = _sentences()
+
+    spans = chunk_spans(text, chunk_size=1000, overlap=200)
+
+    assert all(text[end - 1] in '.?\n' for _, end in spans[:-1])
+
+def test_token_budget_caps_words_per_chunk():
+    text = _sentences()
+
+    spans = chunk_spans(text, chunk_size=5000, overlap=50, token_budget=40)
+
+    _assert_covers(text, spans, 5000)
+    assert max(count_tokens(text[start:end]) for start, end in spans) <= 40
+
+def test_empty_and_whitespace_only_text():
+    assert chunk_spans('', chunk_size=100, overlap=20) == []
+    assert chunk_spans('', chunk_size=100, overlap=20, token_budget=10) == []
+
+    text = ' \n\t ' * 100
+    for token_budget in (None, 10):
+        spans = chunk_spans(text, chunk_size=100, overlap=20, token_budget=token_budget)
+        _assert_covers(text, spans, 100)
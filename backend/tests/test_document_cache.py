@@ -0,0 +1,57 @@
+import pytest
+
+from utils.document_cache import DocumentCache, MemoryTier
+
+def test_memory_tier_evicts_least_recently_used_by_size():
+    tier = MemoryTier(max_bytes=250)
+    tier.put('a', {'n': 1}, 100)
+    tier.put('b', {'n': 2}, 100)
+    tier.get('a')
+    tier.put('c', {'n': 3}, 100)
+
+    assert tier.get('b') is None
+    assert tier.get('a')[0] == {'n': 1}
+    assert tier.get_stats()['size_bytes'] == 200
+
+def test_memory_tier_skips_entries_larger_than_the_budget():
+    tier = MemoryTier(max_bytes=50)
+    tier.put('a', {'n': 1}, 100)
+
+    assert tier.get('a') is None
+    assert tier.get_stats()['size_bytes'] == 0
+
+def test_entries_survive_a_restart(tmp_path):
+    DocumentCache(cache_dir=str(tmp_path))['a' * 32] = {'file_name': 'a.pdf'}
+
+    reopened = DocumentCache(cache_dir=str(tmp_path))
+
+    assert reopened['a' * 32] == {'file_name': 'a.pdf'}
+    assert 'a' * 32 in reopened
+    assert list(reopened) == ['a' * 32]
+    assert len(reopened) == 1
+
+def test_memory_hits_see_writes_from_other_workers(tmp_path):
+    worker_a = DocumentCache(cache_dir=str(tmp_path))
+    worker_b = DocumentCache(cache_dir=str(tmp_path))
+    worker_a['a' * 32] = {'file_name': 'v1.pdf'}
+    assert worker_b['a' * 32] == {'file_name': 'v1.pdf'}
+
+    worker_a['a' * 32] = {'file_name': 'v2.pdf'}
+    assert worker_b['a' * 32] == {'file_name': 'v2.pdf'}
+
+    del worker_a['a' * 32]
+    assert 'a' * 32 not in worker_b
+    with pytest.raises(KeyError):
+        worker_b['a' * 32]
+
+def test_memory_backend_keeps_nothing_on_disk(tmp_path):
+    cache = DocumentCache(backend='memory', cache_dir=str(tmp_path))
+    cache['a' * 32] = {'file_name': 'a.pdf'}
+
+    assert cache['a' * 32] == {'file_name': 'a.pdf'}
+    assert cache.get_stats()['disk'] is None
+    assert 'a' * 32 not in DocumentCache(backend='memory', cache_dir=str(tmp_path))
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        DocumentCache(backend='redis', cache_dir=str(tmp_path))
@@ -0,0 +1,59 @@
+from utils.document_registry import DocumentRegistry
+
+def _document(file_hash, total_pages=2, text_length=100, file_size=1000):
+    return {
+        'file_hash': file_hash,
+        'file_name': f"{file_hash[:4]}.pdf",
+        'total_pages': total_pages,
+        'text_length': text_length,
+        'file_size': file_size,
+        'analysis': {'word_count': 10}
+    }
+
+def _totals(registry):
+    stats = registry.get_stats()
+    return stats['documents'], stats['chunks'], stats['pages'], stats['bytes'], stats['text_length']
+
+def test_insert_update_and_delete_keep_totals_exact(tmp_path):
+    registry = DocumentRegistry(str(tmp_path))
+    registry.upsert_document(_document('a' * 32), chunk_count=5)
+    registry.upsert_document(_document('b' * 32, total_pages=3, text_length=50, file_size=500), chunk_count=2)
+    assert _totals(registry) == (2, 7, 5, 1500, 150)
+
+    # Re-registering a document replaces its contribution instead of adding to it
+    registry.upsert_document(_document('a' * 32, total_pages=4, text_length=200, file_size=2000), chunk_count=8)
+    assert _totals(registry) == (2, 10, 7, 2500, 250)
+
+    registry.delete_document('b' * 32)
+    assert _totals(registry) == (1, 8, 4, 2000, 200)
+    assert registry.get_stats()['last_ingest'] is not None
+
+def test_clear_resets_totals_and_last_ingest(tmp_path):
+    registry = DocumentRegistry(str(tmp_path))
+    registry.upsert_document(_document('a' * 32), chunk_count=5)
+
+    registry.clear()
+
+    assert _totals(registry) == (0, 0, 0, 0, 0)
+    assert registry.get_stats()['last_ingest'] is None
+    assert registry.list_documents() == []
+
+def test_totals_are_seeded_from_existing_rows(tmp_path):
+    registry = DocumentRegistry(str(tmp_path))
+    registry.upsert_document(_document('a' * 32), chunk_count=5)
+    with registry._connect() as conn:
+        conn.execute('DROP TABLE registry_stats')
+
+    reopened = DocumentRegistry(str(tmp_path))
+
+    assert _totals(reopened) == (1, 5, 2, 1000, 100)
+
+def test_json_fields_round_trip(tmp_path):
+    registry = DocumentRegistry(str(tmp_path))
+    registry.upsert_document(_document('a' * 32), chunk_count=1)
+
+    record = registry.get_document('a' * 32)
+
+    assert record['analysis'] == {'word_count': 10}
+    assert registry.has_document('a' * 32)
+    assert not registry.has_document('b' * 32)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+from utils.vectorstore import VectorStore
+
+from conftest import HashEmbedder, make_document
+
+class CountingEmbedder(HashEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return super().encode(texts)
+
+def _vectors(*rows):
+    return np.array(rows, dtype=np.float32)
+
+def test_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    key = EmbeddingCache.make_key('model', 'text')
+    cache.put_many([key], _vectors([1, 2, 3]))
+
+    found = cache.get_many([key, EmbeddingCache.make_key('model', 'other')])
+
+    assert list(found) == [key]
+    assert found[key].tolist() == [1, 2, 3]
+    assert EmbeddingCache.make_key('other model', 'text') != key
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    # Two 8-dimensional float32 vectors fit
+    cache = EmbeddingCache(str(tmp_path), max_bytes=64)
+    cache.put_many(['a', 'b'], _vectors([1] * 8, [2] * 8))
+    assert 'a' in cache.get_many(['a'])
+    cache.put_many(['c'], _vectors([3] * 8))
+
+    assert set(cache.get_many(['a', 'b', 'c'])) == {'a', 'c'}
+    assert cache.get_stats()['size_bytes'] == 64
+
+def test_store_embeds_each_chunk_text_once(tmp_path):
+    embedder = CountingEmbedder()
+    store = VectorStore(str(tmp_path / 'chroma_db'), embedder=embedder, cache=EmbeddingCache(str(tmp_path / 'cache')))
+    pages = ['Same text in both uploads. ' * 20]
+
+    store.add_documents([make_document('a' * 32, pages)], chunk_size=200, overlap=40)
+    embedded = len(embedder.encoded)
+    store.add_documents([make_document('b' * 32, pages)], chunk_size=200, overlap=40)
+
+    assert embedded > 0
+    assert len(embedder.encoded) == embedded
+    assert store.last_ingest_stats['cache_hits'] == embedded
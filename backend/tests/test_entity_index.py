@@ -0,0 +1,45 @@
+from utils.entity_index import EntityIndex
+
+TEXT = 'Also, Al met the US team.\nUSB drives from the US.\nAl left. Alice stayed. Al-Amin called.'
+OFFSETS = [
+    {'page_number': 1, 'start': 0, 'end': 26},
+    {'page_number': 2, 'start': 26, 'end': 50},
+    {'page_number': 3, 'start': 50, 'end': len(TEXT)},
+]
+
+def _details(index, tenant_id=None):
+    return {record['entity']: record for record in index.get_entity_details(['a' * 32], tenant_id)}
+
+def test_only_whole_words_are_counted(tmp_path):
+    index = EntityIndex(str(tmp_path))
+
+    index.build('a' * 32, TEXT, OFFSETS, {'persons': ['Al', 'Alice'], 'locations': ['US']})
+    details = _details(index)
+
+    assert details['Al']['occurrences'] == 3
+    assert details['Al']['pages'] == {'a' * 32: [1, 3]}
+    assert details['US']['occurrences'] == 2
+    assert details['US']['pages'] == {'a' * 32: [1, 2]}
+    assert details['Alice']['occurrences'] == 1
+    assert details['Alice']['pages'] == {'a' * 32: [3]}
+
+def test_entities_with_punctuation_at_the_edges(tmp_path):
+    index = EntityIndex(str(tmp_path))
+
+    index.build('a' * 32, 'Paid $5 and 10% of $50.', [], {'money': ['$5'], 'percentages': ['10%']})
+    details = _details(index)
+
+    assert details['$5']['occurrences'] == 1
+    assert details['10%']['occurrences'] == 1
+
+def test_entries_are_scoped_by_tenant(tmp_path):
+    index = EntityIndex(str(tmp_path))
+    index.build('a' * 32, TEXT, OFFSETS, {'persons': ['Alice']}, 'acme')
+
+    assert index.has_document('a' * 32, 'acme')
+    assert not index.has_document('a' * 32)
+    assert index.get_entities(['a' * 32], 'acme')['persons'] == ['Alice']
+    assert index.get_entities(['a' * 32])['persons'] == []
+
+    index.clear('acme')
+    assert not index.has_document('a' * 32, 'acme')
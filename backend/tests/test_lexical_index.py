@@ -0,0 +1,62 @@
+import pytest
+
+from utils.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+@pytest.fixture
+def index(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add_chunks(
+        ['a_0', 'a_1', 'b_0'],
+        [
+            'Quarterly revenue grew to 4.2 million dollars',
+            'The board approved the annual budget',
+            'Revenue revenue revenue from the new product line'
+        ],
+        ['a' * 32, 'a' * 32, 'b' * 32]
+    )
+    return index
+
+def test_tokenize_lowercases_words():
+    assert tokenize('Revenue, GREW!') == ['revenue', 'grew']
+
+def test_bm25_ranks_by_term_frequency(index):
+    results = index.search('revenue', n_results=5)
+
+    assert [chunk_id for chunk_id, _ in results] == ['b_0', 'a_0']
+    assert results[0][1] > results[1][1] > 0
+
+def test_search_filters_by_file_hash(index):
+    results = index.search('revenue', file_hashes=['a' * 32])
+
+    assert [chunk_id for chunk_id, _ in results] == ['a_0']
+
+def test_unknown_terms_return_nothing(index):
+    assert index.search('zeppelin') == []
+
+def test_re_adding_a_chunk_replaces_its_postings(index):
+    index.add_chunks(['a_0'], ['Nothing about money here'], ['a' * 32])
+
+    assert [chunk_id for chunk_id, _ in index.search('revenue')] == ['b_0']
+    assert index.count() == 3
+
+def test_delete_document_and_chunks(index):
+    index.delete_chunks(['a_1'])
+    assert index.search('budget') == []
+
+    index.delete_document('b' * 32)
+    assert [chunk_id for chunk_id, _ in index.search('revenue')] == ['a_0']
+    assert index.count() == 1
+
+def test_reciprocal_rank_fusion_sums_reciprocal_ranks():
+    fused = reciprocal_rank_fusion([['x', 'y', 'z'], ['y', 'x']], k=60)
+
+    scores = dict(fused)
+    assert scores['x'] == pytest.approx(1 / 61 + 1 / 62)
+    assert scores['y'] == pytest.approx(1 / 62 + 1 / 61)
+    assert scores['z'] == pytest.approx(1 / 63)
+    assert fused[-1][0] == 'z'
+
+def test_reciprocal_rank_fusion_prefers_items_in_both_rankings():
+    fused = reciprocal_rank_fusion([['only_vector', 'both'], ['both', 'only_lexical']])
+
+    assert fused[0][0] == 'both'
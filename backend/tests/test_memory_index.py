@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from utils.embedding_cache import EmbeddingCache
+from utils.memory_index import MemoryIndex
+from utils.vectorstore import VectorStore
+
+from conftest import HashEmbedder, make_document
+
+class UnitHashEmbedder(HashEmbedder):
+    """Unit-length vectors, like the sentence-transformers backend returns"""
+
+    def encode(self, texts):
+        vectors = super().encode(texts)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+PAGES = [f"Sentence {i} about topic {i % 7}. " * 4 for i in range(60)]
+
+@pytest.mark.parametrize('space, embedder', [('l2', UnitHashEmbedder()), ('cosine', HashEmbedder())])
+def test_top_k_matches_chroma(tmp_path, space, embedder):
+    store = VectorStore(str(tmp_path / 'chroma_db'), embedder=embedder,
+                        cache=EmbeddingCache(str(tmp_path / 'cache')), hnsw_params={'space': space})
+    store.add_documents([make_document('a' * 32, PAGES[:30]), make_document('b' * 32, PAGES[30:])],
+                        chunk_size=200, overlap=40)
+    where = {'file_hash': {'$in': ['a' * 32, 'b' * 32]}}
+
+    for query in ('topic 3', 'Sentence 41', 'unrelated words'):
+        chroma = store.search(query, n_results=5, filter_metadata=where, backend='chroma')
+        memory = store.search(query, n_results=5, filter_metadata=where, backend='memory')
+
+        assert [result['id'] for result in memory] == [result['id'] for result in chroma]
+        assert [result['distance'] for result in memory] == pytest.approx(
+            [result['distance'] for result in chroma], abs=1e-4)
+
+def test_embeddings_are_normalised_on_insert():
+    vectors = np.array([[3.0, 0.0], [0.0, 0.5], [1.0, 1.0]], dtype=np.float32)
+    index = MemoryIndex(lambda file_hash: (['x', 'y', 'z'], ['X', 'Y', 'Z'], [{}, {}, {}], vectors))
+
+    results = index.search([0.0, 10.0], 3, ['a' * 32])
+
+    # Ranked by cosine, not by dot product with the raw vectors
+    assert [result['id'] for result in results] == ['y', 'z', 'x']
+    assert [result['distance'] for result in results] == pytest.approx([0.0, 2 - 2 ** 0.5, 2.0])
+
+def test_only_requested_documents_are_searched_and_lru_is_evicted():
+    documents = {
+        'a' * 32: (['a_0'], ['A'], [{}], [[1.0, 0.0]]),
+        'b' * 32: (['b_0', 'b_1'], ['B0', 'B1'], [{}, {}], [[0.0, 1.0], [1.0, 1.0]]),
+    }
+    index = MemoryIndex(documents.get, max_chunks=2)
+
+    assert [result['id'] for result in index.search([1.0, 0.0], 5, ['b' * 32])] == ['b_1', 'b_0']
+    assert [result['id'] for result in index.search([1.0, 0.0], 5, ['a' * 32])] == ['a_0']
+    assert index.get_stats()['documents'] == 1
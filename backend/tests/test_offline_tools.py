@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_offline_tools_do_not_open_the_live_store_on_import(tmp_path):
+    script = (
+        "import utils.backfill_entities, utils.rebuild_index, utils.maintenance\n"
+        "import utils.vectorstore\n"
+        "assert utils.vectorstore._vector_store is None\n"
+    )
+    env = dict(os.environ, PYTHONPATH=BACKEND)
+
+    result = subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert not (tmp_path / 'chroma_db' / 'chroma.sqlite3').exists()
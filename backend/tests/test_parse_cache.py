@@ -0,0 +1,35 @@
+from utils.parse_cache import ParseCache
+
+def test_round_trip(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    result = {'text_content': 'hello', 'total_pages': 1, 'tables': [{'page_number': 1}]}
+
+    assert cache.put('a' * 32, 4, result)
+    assert cache.get('a' * 32, 4) == result
+    assert cache.get('b' * 32, 4) is None
+
+def test_schema_version_mismatch_is_a_miss_and_drops_the_entry(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    cache.put('a' * 32, 3, {'text_content': 'old shape'})
+
+    assert cache.get('a' * 32, 4) is None
+    assert cache.get('a' * 32, 3) is None
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    payload = {'text_content': 'x' * 1000}
+    cache = ParseCache(str(tmp_path), max_bytes=2500)
+    cache.put('a' * 32, 1, payload)
+    cache.put('b' * 32, 1, payload)
+    # Touch a so b is the least recently used
+    assert cache.get('a' * 32, 1) == payload
+    cache.put('c' * 32, 1, payload)
+
+    assert cache.get('b' * 32, 1) is None
+    assert cache.get('a' * 32, 1) == payload
+    assert cache.get('c' * 32, 1) == payload
+
+def test_rejects_results_larger_than_the_budget(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=100)
+
+    assert not cache.put('a' * 32, 1, {'text_content': 'x' * 1000})
+    assert cache.get('a' * 32, 1) is None
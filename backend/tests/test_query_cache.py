@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from utils.embedding_cache import EmbeddingCache
+from utils.query_cache import TTLCache
+from utils.vectorstore import VectorStore
+
+from conftest import make_document
+
+@pytest.fixture
+def store(tmp_path, embedder):
+    return VectorStore(str(tmp_path / 'chroma_db'), embedder=embedder, cache=EmbeddingCache(str(tmp_path / 'cache')))
+
+def test_ttl_cache_evicts_least_recently_used_and_expired_entries():
+    cache = TTLCache(max_entries=2, ttl=0.05)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    time.sleep(0.06)
+    assert cache.get('c') is None
+
+def test_repeated_search_is_served_from_the_cache(store):
+    store.add_documents([make_document('a' * 32, ['Revenue grew in the third quarter.'])])
+
+    first = store.search('revenue', n_results=3)
+    second = store.search('revenue', n_results=3)
+
+    assert first == second
+    assert store.search_result_cache.get_stats()['hits'] == 1
+    assert store.query_embedding_cache.get_stats()['entries'] == 1
+    # Callers may modify results without corrupting the cached copy
+    second[0]['document'] = 'changed'
+    assert store.search('revenue', n_results=3) == first
+
+def test_writes_invalidate_cached_results(store):
+    store.add_documents([make_document('a' * 32, ['Revenue grew in the third quarter.'])])
+    version = store._collection_version
+    assert len(store.search('revenue', n_results=3)) == 1
+
+    store.add_documents([make_document('b' * 32, ['Revenue fell in the fourth quarter.'])])
+
+    assert store._collection_version > version
+    assert len(store.search('revenue', n_results=3)) == 2
+    assert store.search_result_cache.get_stats()['hits'] == 0
+
+    store.delete_document('b' * 32)
+    assert len(store.search('revenue', n_results=3)) == 1
+    # The query vector outlives collection changes
+    assert store.query_embedding_cache.get_stats()['hits'] == 2
@@ -0,0 +1,52 @@
+import pytest
+
+from utils.chunking import ChunkStream, legacy_chunk_spans
+from utils.embedding_cache import EmbeddingCache
+from utils.vectorstore import VectorStore
+
+from conftest import make_document
+
+PAGES = [f"Page {n} sentence {i} ends here. " * 3 + "\n" for n in range(1, 9) for i in range(4)]
+
+def _store(path, embedder):
+    return VectorStore(str(path / 'chroma_db'), embedder=embedder, cache=EmbeddingCache(str(path / 'cache')))
+
+def _chunks(store, file_hash):
+    results = store.collection.get(where={'file_hash': file_hash}, include=['documents', 'metadatas'])
+    return sorted(
+        (chunk_id, document, {key: value for key, value in metadata.items() if key != 'upload_timestamp'})
+        for chunk_id, document, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+    )
+
+def test_chunk_stream_matches_whole_text_chunking():
+    text = "".join(PAGES)
+    chunk_fn = lambda piece: legacy_chunk_spans(piece, 300, 60)
+    stream = ChunkStream(chunk_fn, 300)
+
+    spans = []
+    for page in PAGES:
+        spans.extend(stream.feed(page))
+    spans.extend(stream.finish())
+
+    assert [(start, end) for start, end, _ in spans] == chunk_fn(text)
+    assert all(chunk == text[start:end] for start, end, chunk in spans)
+
+@pytest.mark.parametrize('chunker', ['legacy', 'sentence'])
+def test_streamed_document_gets_the_same_chunks_as_add_documents(tmp_path, embedder, chunker):
+    document = make_document('a' * 32, PAGES)
+    whole = _store(tmp_path / 'whole', embedder)
+    streamed = _store(tmp_path / 'streamed', embedder)
+    whole.chunker = streamed.chunker = chunker
+
+    whole.add_documents([document], chunk_size=300, overlap=60)
+    stream = streamed.open_document_stream(document, chunk_size=300, overlap=60)
+    # Pages arrive out of order, as late OCR pages do
+    events = [{'page_number': page['page_number'], 'text': PAGES[page['page_number'] - 1]}
+              for page in document['page_offsets']]
+    stream.add_pages(events[2:5])
+    stream.add_pages(events[:2])
+    stream.add_pages(events[5:])
+    stream.finish(document)
+
+    assert _chunks(streamed, 'a' * 32) == _chunks(whole, 'a' * 32)
+    assert stream.chunk_count == whole.get_document_info('a' * 32)['chunk_count']
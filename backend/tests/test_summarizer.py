@@ -0,0 +1,117 @@
+import pytest
+
+from utils.summarizer import MapReduceSummarizer, SummaryCache, group_sections
+
+@pytest.fixture
+def cache(tmp_path):
+    return SummaryCache(str(tmp_path))
+
+def test_group_sections_packs_and_splits():
+    groups = group_sections(['a' * 40, 'b' * 40, 'c' * 150], max_chars=100)
+
+    assert groups[0] == 'a' * 40 + '\n\n' + 'b' * 40
+    assert all(len(group) <= 100 for group in groups)
+    assert ''.join(groups[1:]).replace('\n\n', '') == 'c' * 150
+
+def test_single_group_is_summarised_once(cache):
+    summarizer = MapReduceSummarizer(cache, workers=2, group_chars=1000)
+    calls = []
+
+    summary = summarizer.summarize(['short page'], lambda text: calls.append(text) or 'S', lambda text: 'M', 'test')
+
+    assert summary == 'S'
+    assert calls == ['short page']
+
+def test_map_then_merge(cache):
+    summarizer = MapReduceSummarizer(cache, workers=2, group_chars=100)
+    merged = []
+
+    def merge(text):
+        merged.append(text)
+        return 'final'
+
+    summary = summarizer.summarize(['x' * 90, 'y' * 90, 'z' * 90], lambda text: text[0], merge, 'test')
+
+    assert summary == 'final'
+    assert merged == ['x\n\ny\n\nz']
+
+def test_merge_inputs_never_exceed_the_group_size(cache):
+    summarizer = MapReduceSummarizer(cache, workers=2, group_chars=1000)
+    inputs = []
+
+    def echo(text):
+        # A model that does not shorten anything: the worst case for the merge loop
+        inputs.append(len(text))
+        return text
+
+    summarizer.summarize([f"page {i} " * 150 for i in range(12)], echo, echo, 'test')
+
+    assert max(inputs) <= 1000
+
+def test_sections_are_cached_across_calls(cache):
+    summarizer = MapReduceSummarizer(cache, workers=2, group_chars=100)
+    calls = []
+
+    def summarize(text):
+        calls.append(text)
+        return text[:3]
+
+    sections = ['a' * 90, 'b' * 90]
+    first = summarizer.summarize(sections, summarize, summarize, 'test')
+    second = summarizer.summarize(sections, summarize, summarize, 'test')
+
+    assert first == second
+    assert len(calls) == 3
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = SummaryCache(str(tmp_path), max_entries=2)
+    cache.put('k1', 'one')
+    cache.put('k2', 'two')
+    assert cache.get('k1') == 'one'
+    cache.put('k3', 'three')
+
+    assert cache.get('k2') is None
+    assert cache.get('k1') == 'one'
+    assert cache.get('k3') == 'three'
+
+def test_cache_entries_are_dropped_with_their_documents(cache):
+    cache.put('k1', 'one', ['a' * 32])
+    cache.put('k2', 'two', ['a' * 32, 'b' * 32])
+    cache.put('k3', 'three', ['b' * 32])
+
+    cache.delete_documents(['a' * 32])
+
+    assert cache.get('k1') is None
+    assert cache.get('k2') is None
+    assert cache.get('k3') == 'three'
+
+def test_merges_are_cached_per_merge_namespace(cache):
+    summarizer = MapReduceSummarizer(cache, workers=2, group_chars=100)
+    sections = ['a' * 90, 'b' * 90]
+
+    first = summarizer.summarize(sections, lambda text: text[:3], lambda text: 'merged for one.pdf',
+                                 'test', merge_namespace='test:merge:one')
+    second = summarizer.summarize(sections, lambda text: text[:3], lambda text: 'merged for two.pdf',
+                                  'test', merge_namespace='test:merge:two')
+
+    assert first == 'merged for one.pdf'
+    assert second == 'merged for two.pdf'
+
+def test_service_merge_summaries_name_their_own_document(monkeypatch):
+    from services import langchain_pdf
+
+    class EchoTitleModel:
+        def generate_content(self, prompt):
+            title = prompt.split('the document: ', 1)[1].split('\n', 1)[0] if 'the document: ' in prompt else ''
+            return type('Response', (), {'text': f"summary of {title}" if title else 'part'})()
+
+    monkeypatch.setattr(langchain_pdf.pdf_service, 'api_key', 'test-key')
+    monkeypatch.setattr(langchain_pdf.pdf_service, 'model', EchoTitleModel(), raising=False)
+    monkeypatch.setattr(langchain_pdf.summarizer, 'group_chars', 100)
+    sections = ['Identical page text. ' * 4, 'Another identical page. ' * 4]
+
+    first = langchain_pdf.pdf_service._summarize_sections(sections, 'one.pdf')
+    second = langchain_pdf.pdf_service._summarize_sections(sections, 'two.pdf')
+
+    assert first == 'summary of one.pdf'
+    assert second == 'summary of two.pdf'
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.embedding_cache import EmbeddingCache
+from utils.table_store import TableStore, coerce_numeric_columns, frame_to_records, table_store
+from utils.tenants import TenantManager
+from utils.vectorstore import VectorStore
+
+from conftest import make_document
+
+def test_currency_separators_and_accounting_negatives_are_coerced():
+    frame = pd.DataFrame({
+        'item': ['Rent', 'Fees', 'Refund', 'Tax'],
+        'amount': ['$1,200', '€3.50', '(1,000)', '£ 12'],
+        'share': ['15 %', '7.5%', '0%', '100 %']
+    })
+
+    coerce_numeric_columns(frame)
+
+    assert frame['item'].dtype == object
+    assert frame['amount'].tolist() == [1200.0, 3.5, -1000.0, 12.0]
+    assert frame['share'].tolist() == [15.0, 7.5, 0.0, 100.0]
+
+def test_mixed_columns_need_min_ratio_of_numbers():
+    frame = pd.DataFrame({
+        'mostly_numbers': ['1', '2', '3', '4', 'n/a'],
+        'half_numbers': ['1', '2', 'three', 'four', '5'],
+        'with_blanks': ['1,000', '', None, '2,500', '3']
+    })
+
+    coerce_numeric_columns(frame)
+
+    assert frame['mostly_numbers'].tolist()[:4] == [1.0, 2.0, 3.0, 4.0]
+    assert np.isnan(frame['mostly_numbers'].iloc[4])
+    assert frame['half_numbers'].tolist() == ['1', '2', 'three', 'four', '5']
+    assert frame_to_records(frame[['with_blanks']]) == [
+        {'with_blanks': 1000.0}, {'with_blanks': None}, {'with_blanks': None},
+        {'with_blanks': 2500.0}, {'with_blanks': 3.0}
+    ]
+
+def test_tables_round_trip_with_their_types(tmp_path):
+    store = TableStore(str(tmp_path))
+    frame = coerce_numeric_columns(pd.DataFrame({'name': ['a', 'b'], 'value': ['1,000', '2']}))
+
+    manifest = store.put('a' * 32, [{'page_number': 3, 'table_index': 0, 'frame': frame},
+                                    {'page_number': 4, 'table_index': 0, 'frame': pd.DataFrame()}])
+
+    assert [table['table_id'] for table in manifest] == ['3_0']
+    assert manifest[0]['numeric_columns'] == ['value']
+    assert store.get_tables('a' * 32) == manifest
+    pd.testing.assert_frame_equal(TableStore(str(tmp_path)).load('a' * 32, '3_0'), frame)
+    # A document's tables are written once
+    assert store.put('a' * 32, []) == manifest
+
+    assert store.delete('a' * 32)
+    assert store.get_tables('a' * 32) == []
+    assert store.load('a' * 32, '3_0') is None
+
+@pytest.fixture
+def tenants(tmp_path, embedder):
+    store = VectorStore(str(tmp_path / 'chroma_db'), embedder=embedder, cache=EmbeddingCache(str(tmp_path / 'cache')))
+    return TenantManager(default_store=store)
+
+def test_tables_are_kept_until_no_collection_holds_the_document(tenants):
+    table_store.clear()
+    document = make_document('a' * 32, ['A page with a table.'])
+    frame = pd.DataFrame({'value': [1.0, 2.0]})
+    for tenant_id in ('acme', 'globex'):
+        tenants.get_store(tenant_id).add_documents([document])
+        tenants.record_documents(tenant_id, [document['file_hash']])
+    table_store.put('a' * 32, [{'page_number': 1, 'table_index': 0, 'frame': frame}])
+
+    tenants.drop_tenant('acme')
+    assert table_store.get_tables('a' * 32)
+
+    tenants.drop_tenant('globex')
+    assert table_store.get_tables('a' * 32) == []
@@ -0,0 +1,49 @@
+import hashlib
+import hmac
+
+import pytest
+from flask import Flask
+
+from routes import pdf_chat as routes
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv('PDF_ADMIN_TOKEN', raising=False)
+    monkeypatch.delenv('PDF_TENANT_SECRET', raising=False)
+    monkeypatch.setattr(routes.pdf_service, 'get_collection_stats', lambda tenant_id: {'tenant_id': tenant_id})
+    monkeypatch.setattr(routes.tenant_manager, 'drop_tenant', lambda tenant_id: True)
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    app.register_blueprint(routes.pdf_chat)
+    return app.test_client()
+
+def _token(secret, tenant_id):
+    return hmac.new(secret.encode('utf-8'), tenant_id.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def test_tenant_admin_routes_need_the_admin_token(client, monkeypatch):
+    assert client.delete('/api/pdf/tenants/acme').status_code == 403
+    assert client.get('/api/pdf/tenants').status_code == 403
+
+    monkeypatch.setenv('PDF_ADMIN_TOKEN', 'admin-secret')
+
+    assert client.delete('/api/pdf/tenants/acme', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.delete('/api/pdf/tenants/acme', headers={'Authorization': 'Bearer admin-secret'})
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'tenant_id': 'acme'}
+
+def test_session_stays_bound_to_its_first_tenant(client):
+    assert client.get('/api/pdf/stats', headers={'X-Tenant-ID': 'acme'}).get_json() == {'tenant_id': 'acme'}
+
+    assert client.get('/api/pdf/stats', headers={'X-Tenant-ID': 'globex'}).status_code == 403
+    assert client.get('/api/pdf/stats?tenant_id=globex').status_code == 403
+    assert client.get('/api/pdf/stats', headers={'X-Tenant-ID': 'acme'}).status_code == 200
+
+def test_tenant_token_is_checked_when_a_secret_is_set(client, monkeypatch):
+    monkeypatch.setenv('PDF_TENANT_SECRET', 'tenant-secret')
+
+    assert client.get('/api/pdf/stats', headers={'X-Tenant-ID': 'acme'}).status_code == 403
+    assert client.get('/api/pdf/stats', headers={'X-Tenant-ID': 'acme',
+                                                  'X-Tenant-Token': _token('other', 'acme')}).status_code == 403
+    response = client.get('/api/pdf/stats', headers={'X-Tenant-ID': 'acme',
+                                                      'X-Tenant-Token': _token('tenant-secret', 'acme')})
+    assert response.get_json() == {'tenant_id': 'acme'}
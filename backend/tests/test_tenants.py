@@ -0,0 +1,79 @@
+import pytest
+
+from utils.embedding_cache import EmbeddingCache
+from utils.vectorstore import VectorStore
+from utils.tenants import TenantManager
+from utils.text_store import text_store
+from utils.entity_index import entity_index
+from utils.document_cache import document_cache
+
+from conftest import make_document
+
+SHARED_HASH = 'a' * 32
+PRIVATE_HASH = 'b' * 32
+
+@pytest.fixture
+def tenants(tmp_path, embedder):
+    store = VectorStore(str(tmp_path / 'chroma_db'), embedder=embedder, cache=EmbeddingCache(str(tmp_path / 'cache')))
+    return TenantManager(default_store=store)
+
+@pytest.fixture(autouse=True)
+def clean_document_data():
+    """The per-document stores are the process-wide instances; start each test empty"""
+    text_store.clear()
+    document_cache.clear()
+    for tenant_id in (None, 'acme', 'globex'):
+        entity_index.clear(tenant_id)
+
+def _ingest(tenants, tenant_id, document):
+    """What AdvancedPDFService does on upload, minus parsing"""
+    tenants.get_store(tenant_id).add_documents([document])
+    tenants.record_documents(tenant_id, [document['file_hash']])
+    text_store.put(document['file_hash'], document['text_content'], document['page_offsets'])
+    entity_index.build(document['file_hash'], document['text_content'], document['page_offsets'],
+                       {'persons': ['Alice']}, tenant_id)
+    document_cache[document['file_hash']] = {'file_name': document['file_name']}
+
+def test_tenants_only_see_their_own_documents(tenants):
+    _ingest(tenants, 'acme', make_document(PRIVATE_HASH, ['Alice signed the acme contract.']))
+
+    assert tenants.has_document(PRIVATE_HASH, 'acme')
+    assert not tenants.has_document(PRIVATE_HASH, 'globex')
+    assert not tenants.has_document(PRIVATE_HASH, None)
+    assert tenants.document_hashes('globex') == []
+    assert tenants.store_for_document(PRIVATE_HASH, 'globex').get_document_by_hash(PRIVATE_HASH) == []
+    assert tenants.store_for_document(PRIVATE_HASH, 'acme').get_document_by_hash(PRIVATE_HASH)
+
+    assert entity_index.get_entities([PRIVATE_HASH], 'acme')['persons'] == ['Alice']
+    assert entity_index.get_entities([PRIVATE_HASH], 'globex')['persons'] == []
+
+def test_search_stays_inside_the_tenant_collection(tenants):
+    _ingest(tenants, 'acme', make_document(PRIVATE_HASH, ['Alice signed the acme contract.']))
+
+    assert tenants.get_store('globex').search('acme contract', n_results=5) == []
+    assert tenants.get_store('acme').search('acme contract', n_results=5)
+
+def test_drop_tenant_purges_only_unshared_documents(tenants):
+    _ingest(tenants, 'acme', make_document(PRIVATE_HASH, ['Only acme has this.']))
+    _ingest(tenants, 'acme', make_document(SHARED_HASH, ['Both tenants have this.']))
+    _ingest(tenants, 'globex', make_document(SHARED_HASH, ['Both tenants have this.']))
+
+    assert tenants.drop_tenant('acme')
+
+    assert not text_store.has(PRIVATE_HASH)
+    assert PRIVATE_HASH not in document_cache
+    assert text_store.has(SHARED_HASH)
+    assert SHARED_HASH in document_cache
+    assert not entity_index.has_document(SHARED_HASH, 'acme')
+    assert entity_index.has_document(SHARED_HASH, 'globex')
+    assert [tenant['tenant_id'] for tenant in tenants.list_tenants()] == ['globex']
+
+def test_documents_in_the_shared_collection_keep_their_data(tenants):
+    _ingest(tenants, None, make_document(SHARED_HASH, ['Shared collection text.']))
+    _ingest(tenants, 'acme', make_document(SHARED_HASH, ['Shared collection text.']))
+
+    tenants.drop_tenant('acme')
+
+    assert tenants.is_referenced(SHARED_HASH)
+    assert tenants.purge_unreferenced([SHARED_HASH]) == []
+    assert text_store.has(SHARED_HASH)
@@ -0,0 +1,44 @@
+from utils.text_store import TextStore
+
+from conftest import make_document
+
+def test_pages_are_sliced_by_their_offsets(tmp_path):
+    store = TextStore(str(tmp_path))
+    pages = ['First page.\n', 'Zweite Seite – größer.\n', 'Третья страница.\n']
+    document = make_document('a' * 32, pages)
+
+    assert store.put(document['file_hash'], document['text_content'], document['page_offsets'])
+
+    assert store.get_text('a' * 32) == document['text_content']
+    assert store.get_pages('a' * 32, [1, 2, 3]) == {1: pages[0], 2: pages[1], 3: pages[2]}
+    assert store.get_pages('a' * 32, [2]) == {2: pages[1]}
+
+def test_page_offsets_are_byte_ranges(tmp_path):
+    store = TextStore(str(tmp_path))
+    pages = ['ab', 'é€', 'cd']
+    document = make_document('a' * 32, pages)
+    store.put(document['file_hash'], document['text_content'], document['page_offsets'])
+
+    offsets = store.get_page_offsets('a' * 32)
+
+    assert [(page['start'], page['end']) for page in offsets] == [(0, 2), (2, 7), (7, 9)]
+
+def test_text_between_pages_is_kept_out_of_pages(tmp_path):
+    store = TextStore(str(tmp_path))
+    text = 'headerPAGE1--PAGE2'
+    offsets = [{'page_number': 1, 'start': 6, 'end': 11}, {'page_number': 2, 'start': 13, 'end': 18}]
+    store.put('a' * 32, text, offsets)
+
+    assert store.get_pages('a' * 32, [1, 2]) == {1: 'PAGE1', 2: 'PAGE2'}
+    assert store.get_text('a' * 32) == text
+
+def test_missing_and_deleted_documents(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.put('a' * 32, 'text', [{'page_number': 1, 'start': 0, 'end': 4}])
+
+    assert store.delete('a' * 32)
+
+    assert not store.has('a' * 32)
+    assert store.get_text('a' * 32) is None
+    assert store.get_pages('a' * 32, [1]) is None
+    assert not store.has('not a hash')
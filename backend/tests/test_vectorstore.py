@@ -0,0 +1,57 @@
+import pytest
+
+from utils.embedding_cache import EmbeddingCache
+from utils.vectorstore import VectorStore
+
+from conftest import make_document
+
+PAGES = ['First page sentence. ' * 30, 'Second page sentence. ' * 30]
+
+@pytest.fixture
+def store(tmp_path, embedder):
+    return VectorStore(str(tmp_path / 'chroma_db'), embedder=embedder, cache=EmbeddingCache(str(tmp_path / 'cache')))
+
+def _ids(store, file_hash):
+    return sorted(store.collection.get(where={'file_hash': file_hash}, include=[])['ids'])
+
+def test_adding_a_document_twice_writes_nothing_the_second_time(store):
+    document = make_document('a' * 32, PAGES)
+
+    added = store.add_documents([document], chunk_size=200, overlap=40)
+    ids = _ids(store, 'a' * 32)
+
+    assert added == len(ids) > 1
+    assert store.add_documents([document], chunk_size=200, overlap=40) == 0
+    assert store.add_documents([document, document], chunk_size=200, overlap=40) == 0
+    assert _ids(store, 'a' * 32) == ids
+    assert store.registry.get_document('a' * 32)['chunk_count'] == len(ids)
+
+def test_chunk_ids_are_file_hash_and_character_offset(store):
+    store.add_documents([make_document('a' * 32, PAGES)], chunk_size=200, overlap=40)
+
+    chunks = store.get_document_by_hash('a' * 32)
+
+    assert {chunk['id'] for chunk in chunks} == {f"{'a' * 32}_{chunk['metadata']['char_start']}" for chunk in chunks}
+
+def test_partially_indexed_document_only_gets_missing_chunks(store):
+    document = make_document('a' * 32, PAGES)
+    store.add_documents([document], chunk_size=200, overlap=40)
+    ids = _ids(store, 'a' * 32)
+    # An upload interrupted before registration left only some chunks behind
+    store.collection.delete(ids=ids[:2])
+    store.registry.delete_document('a' * 32)
+
+    assert store.add_documents([document], chunk_size=200, overlap=40) == 2
+    assert _ids(store, 'a' * 32) == ids
+
+def test_delete_then_add_indexes_the_document_again(store):
+    document = make_document('a' * 32, PAGES)
+    added = store.add_documents([document], chunk_size=200, overlap=40)
+    ids = _ids(store, 'a' * 32)
+
+    assert store.delete_document('a' * 32)
+    assert _ids(store, 'a' * 32) == []
+    assert not store.is_indexed('a' * 32)
+
+    assert store.add_documents([document], chunk_size=200, overlap=40) == added
+    assert _ids(store, 'a' * 32) == ids
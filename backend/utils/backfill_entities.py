@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Offline backfill of the entity index for documents ingested before it existed
+
+Usage:
+    python -m utils.backfill_entities [--tenant ID | --all-tenants] [--rebuild] [--dry-run]
+
+Indexes every document of the shared collection (or of one tenant, or of
+the shared collection and every tenant with --all-tenants) that has no
+entity index entries yet, or every document with --rebuild. Entities come from the document's cached
+analysis; documents whose analysis is no longer cached are run through
+spaCy, which is why this is a separate command and not done on the
+first entity question. Prints a JSON report.
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.text_store import text_store
+from utils.entity_index import entity_index
+from utils.document_cache import document_cache
+from utils.tenants import tenant_manager
+
+def document_text(file_hash: str, tenant_id: Optional[str]) -> Tuple[str, List[Dict[str, int]]]:
+    """
+    Full text of a document with the character range of each page.
+    Documents without stored text are rebuilt from their chunks, without
+    page ranges.
+    """
+    if text_store.has(file_hash):
+        page_numbers = [page['page_number'] for page in text_store.get_page_offsets(file_hash)]
+        pages = text_store.get_pages(file_hash, page_numbers) or {}
+
+        parts = []
+        page_offsets = []
+        length = 0
+        for page_number in sorted(pages):
+            page_text = pages[page_number]
+            page_offsets.append({'page_number': page_number, 'start': length, 'end': length + len(page_text)})
+            parts.append(page_text)
+            length += len(page_text)
+        return ''.join(parts), page_offsets
+
+    store = tenant_manager.store_for_document(file_hash, tenant_id)
+    chunks = store.get_document_by_hash(file_hash)
+    chunks.sort(key=lambda chunk: chunk['metadata'].get('chunk_index', 0))
+    return " ".join(chunk['document'] for chunk in chunks), []
+
+def backfill_tenant(tenant_id: Optional[str], dry_run: bool = False, rebuild: bool = False) -> Dict[str, Any]:
+    """
+    Index the documents of one tenant (the shared collection when tenant_id
+    is None) that lack entries, or all of them when rebuild is set
+    """
+    report = {'tenant_id': tenant_id, 'indexed': [], 'extracted_with_spacy': [], 'errors': []}
+    for file_hash in tenant_manager.document_hashes(tenant_id):
+        if not rebuild and entity_index.has_document(file_hash, tenant_id):
+            continue
+        if dry_run:
+            report['indexed'].append(file_hash)
+            continue
+        try:
+            text, page_offsets = document_text(file_hash, tenant_id)
+            cached = document_cache.get(file_hash) or {}
+            named_entities = cached.get('analysis', {}).get('named_entities')
+            if named_entities is None:
+                from utils.file_parser import pdf_parser
+                named_entities = pdf_parser.extract_named_entities(text)
+                report['extracted_with_spacy'].append(file_hash)
+            if entity_index.build(file_hash, text, page_offsets, named_entities, tenant_id):
+                report['indexed'].append(file_hash)
+            else:
+                report['errors'].append(f"Indexing {file_hash} failed")
+        except Exception as e:
+            report['errors'].append(f"Indexing {file_hash} failed: {str(e)}")
+    return report
+
+def backfill(tenant_id: Optional[str] = None, all_tenants: bool = False, dry_run: bool = False,
+             rebuild: bool = False) -> Dict[str, Any]:
+    """Backfill the entity index of the selected tenants"""
+    started = time.perf_counter()
+    tenant_ids = [tenant_id]
+    if all_tenants:
+        tenant_ids = [None] + [tenant['tenant_id'] for tenant in tenant_manager.list_tenants()]
+
+    tenants = [backfill_tenant(tenant, dry_run, rebuild) for tenant in tenant_ids]
+    return {
+        'dry_run': dry_run,
+        'rebuild': rebuild,
+        'tenants': tenants,
+        'documents_indexed': sum(len(tenant['indexed']) for tenant in tenants),
+        'errors': [error for tenant in tenants for error in tenant['errors']],
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Index entities of documents ingested before the entity index")
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument('--tenant', default=None, help="Backfill this tenant's documents instead of the shared ones")
+    scope.add_argument('--all-tenants', action='store_true',
+                       help="Backfill the shared collection and every tenant")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Re-index documents that already have entries, e.g. to recount occurrences")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="List the documents that would be indexed without indexing them")
+    args = parser.parse_args(argv)
+
+    report = backfill(args.tenant, args.all_tenants, args.dry_run, args.rebuild)
+    print(json.dumps(report, indent=2))
+    return 1 if report['errors'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
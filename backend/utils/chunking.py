@@ -0,0 +1,218 @@
+import re
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+_WORD_PATTERN = re.compile(r'\S+')
+
+_WHITESPACE = np.array([9, 10, 11, 12, 13, 32, 0x85, 0xa0, 0x2028, 0x2029], dtype=np.uint32)
+_SENTENCE_PUNCT = np.array([ord(c) for c in '.!?'], dtype=np.uint32)
+_CLOSERS = np.array([ord(c) for c in '"\')]'], dtype=np.uint32)
+_NEWLINE = 10
+
+class TextBoundaries:
+    """
+    Sentence/paragraph ends and word positions of a text, computed once with
+    vectorised NumPy passes over the text's code points
+    """
+
+    def __init__(self, text: str):
+        self.length = len(text)
+        codes = np.frombuffer(text.encode('utf-32-le', errors='surrogatepass'), dtype=np.uint32)
+        whitespace = np.isin(codes, _WHITESPACE)
+
+        # Words are maximal runs of non-whitespace
+        edges = np.diff(np.concatenate(([0], (~whitespace).view(np.int8), [0])))
+        self.word_starts = np.flatnonzero(edges == 1)
+        self.word_ends = np.flatnonzero(edges == -1)
+
+        # Sentence ends: .!? (optionally followed by one closing quote or
+        # bracket) followed by whitespace
+        next_is_space = np.zeros(len(codes), dtype=bool)
+        next_is_space[:-1] = whitespace[1:]
+        punct = np.isin(codes, _SENTENCE_PUNCT)
+        closer = np.zeros(len(codes), dtype=bool)
+        closer[1:] = np.isin(codes[1:], _CLOSERS) & punct[:-1]
+        sentence_ends = np.flatnonzero((punct | closer) & next_is_space) + 1
+
+        # Paragraph breaks: two newlines with only whitespace between them
+        newlines = np.flatnonzero(codes == _NEWLINE)
+        non_space_seen = np.cumsum(~whitespace)
+        blank_between = non_space_seen[newlines[1:]] == non_space_seen[newlines[:-1]]
+        paragraph_ends = newlines[1:][blank_between] + 1
+
+        self.sentence_ends = np.union1d(sentence_ends, paragraph_ends)
+
+    def last_sentence_end(self, low: int, high: int) -> Optional[int]:
+        """Latest sentence/paragraph end in (low, high], or None"""
+        idx = np.searchsorted(self.sentence_ends, high, side='right') - 1
+        if idx >= 0 and self.sentence_ends[idx] > low:
+            return int(self.sentence_ends[idx])
+        return None
+
+    def first_sentence_end(self, low: int, high: int) -> Optional[int]:
+        """Earliest sentence/paragraph end in [low, high), or None"""
+        idx = np.searchsorted(self.sentence_ends, low, side='left')
+        if idx < len(self.sentence_ends) and self.sentence_ends[idx] < high:
+            return int(self.sentence_ends[idx])
+        return None
+
+    def last_word_end(self, low: int, high: int) -> Optional[int]:
+        """Latest word end in (low, high], or None"""
+        idx = np.searchsorted(self.word_ends, high, side='right') - 1
+        if idx >= 0 and self.word_ends[idx] > low:
+            return int(self.word_ends[idx])
+        return None
+
+    def token_limit(self, start: int, token_budget: int) -> int:
+        """
+        Character offset at which token_budget whitespace-delimited tokens
+        starting at start end; a word that start cuts through counts as the first
+        """
+        first = np.searchsorted(self.word_ends, start, side='right')
+        last = first + token_budget - 1
+        if last >= len(self.word_ends):
+            return self.length
+        return int(self.word_ends[last])
+
+def chunk_spans(text: str, chunk_size: int = 1000, overlap: int = 200,
+                token_budget: Optional[int] = None,
+                boundaries: Optional[TextBoundaries] = None) -> List[Tuple[int, int]]:
+    """
+    Split text into overlapping [start, end) spans in linear time.
+
+    Each chunk is at most chunk_size characters (and at most token_budget
+    whitespace-delimited tokens when given) and ends at the latest sentence
+    or paragraph boundary in its second half, falling back to a word
+    boundary and then a hard cut. The next chunk starts overlap characters
+    before the end, moved to a sentence boundary within half the overlap of
+    that point when there is one, so between half and one and a half times
+    the overlap is kept. Overlap is capped at half the chunk, so every
+    chunk starts well past the previous one and the loop always terminates.
+    """
+    if not text:
+        return []
+
+    boundaries = boundaries or TextBoundaries(text)
+    length = len(text)
+    overlap = max(0, overlap)
+
+    spans = []
+    start = 0
+    prev_end = 0
+    while start < length:
+        limit = min(start + chunk_size, length)
+        if token_budget:
+            limit = min(limit, boundaries.token_limit(start, token_budget))
+        limit = max(limit, start + 1)
+
+        end = limit
+        if limit < length:
+            # Prefer a sentence end in the second half of the window, then a word
+            # end, past the previous chunk's end so no chunk repeats its predecessor
+            low = max(start + (limit - start) // 2, min(prev_end, limit - 1))
+            end = (boundaries.last_sentence_end(low, limit)
+                   or boundaries.last_word_end(low, limit)
+                   or limit)
+        spans.append((start, end))
+
+        if end >= length:
+            break
+        prev_end = end
+
+        # Begin the next chunk on a sentence boundary near the overlap target,
+        # preferring one before it so at least the configured overlap is kept;
+        # overlap never exceeds half the chunk so each step makes real progress
+        chunk_overlap = min(overlap, (end - start) // 2)
+        next_start = end - chunk_overlap
+        if chunk_overlap:
+            slack = chunk_overlap // 2
+            next_start = (boundaries.last_sentence_end(max(start, next_start - slack - 1), next_start)
+                          or boundaries.first_sentence_end(next_start, next_start + slack)
+                          or next_start)
+        start = max(next_start, start + 1)
+
+    return spans
+
+def legacy_chunk_spans(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[Tuple[int, int]]:
+    """
+    Split text into overlapping [start, end) spans of chunk_size
+    characters, ending each at the last .!? in its final 100 characters
+    when there is one; the next chunk starts overlap characters before the
+    end. This is the chunker VectorStore has always used. Chunking stops
+    at the first chunk that reaches the end of the text, and each chunk
+    starts at least one character after the previous one.
+    """
+    length = len(text)
+    if length <= chunk_size:
+        return [(0, length)] if text else []
+
+    spans = []
+    start = 0
+    while start < length:
+        end = start + chunk_size
+        if end < length:
+            for i in range(end, max(start + chunk_size - 100, start), -1):
+                if text[i] in '.!?':
+                    end = i + 1
+                    break
+        end = min(end, length)
+        spans.append((start, end))
+        if end >= length:
+            break
+        start = max(end - overlap, start + 1)
+
+    return spans
+
+class ChunkStream:
+    """
+    Incremental chunking of text that arrives in pieces (streaming
+    ingestion). Yields exactly the spans chunk_fn yields for the whole
+    text: a span is only emitted once the chunk_size window after its
+    start has been received, and text from the next chunk start on is
+    kept, so overlap carries across the pieces.
+    """
+
+    def __init__(self, chunk_fn: Callable[[str], List[Tuple[int, int]]], chunk_size: int):
+        self.chunk_fn = chunk_fn
+        self.chunk_size = chunk_size
+        # Global offset of buffer[0], which is always the next chunk start
+        self.offset = 0
+        self.buffer = ''
+
+    @property
+    def length(self) -> int:
+        """Characters received so far"""
+        return self.offset + len(self.buffer)
+
+    def feed(self, text: str) -> List[Tuple[int, int, str]]:
+        """Append text and return the (start, end, chunk) spans it completes, in global offsets"""
+        self.buffer += text
+        return self._drain(final=False)
+
+    def finish(self, text: str = '') -> List[Tuple[int, int, str]]:
+        """Append the last of the text and return every remaining span"""
+        self.buffer += text
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> List[Tuple[int, int, str]]:
+        spans = self.chunk_fn(self.buffer) if self.buffer else []
+        ready = len(spans)
+        if not final:
+            # A span is settled once its whole window lies before the end of the buffer
+            ready = 0
+            while ready < len(spans) and spans[ready][0] + self.chunk_size < len(self.buffer) \
+                    and spans[ready][1] < len(self.buffer):
+                ready += 1
+
+        emitted = [
+            (self.offset + start, self.offset + end, self.buffer[start:end])
+            for start, end in spans[:ready]
+        ]
+        consumed = len(self.buffer) if final or ready == len(spans) else spans[ready][0]
+        self.offset += consumed
+        self.buffer = self.buffer[consumed:]
+        return emitted
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (whitespace-delimited words)"""
+    return len(_WORD_PATTERN.findall(text))
@@ -0,0 +1,261 @@
+import os
+import uuid
+import pickle
+import sqlite3
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+from utils.sqlite_db import connect, evict_lru
+
+class MemoryTier:
+    """
+    In-process LRU of document entries, bounded by the pickled size of the
+    entries. Each entry keeps the SQLite row version it was read or
+    written as, so hits can be checked against the shared tier.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_hash: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        """The entry's value and row version, or None"""
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is None:
+                return None
+            self._entries.move_to_end(file_hash)
+            return entry[0], entry[2]
+
+    def put(self, file_hash: str, value: Dict[str, Any], size_bytes: int, version: Optional[str] = None):
+        with self._lock:
+            self._remove(file_hash)
+            if size_bytes > self.max_bytes:
+                return
+            self._entries[file_hash] = (value, size_bytes, version)
+            self.size_bytes += size_bytes
+            while self.size_bytes > self.max_bytes:
+                _, (_, evicted_bytes, _) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_bytes
+
+    def delete(self, file_hash: str):
+        with self._lock:
+            self._remove(file_hash)
+
+    def _remove(self, file_hash: str):
+        entry = self._entries.pop(file_hash, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'entries': len(self._entries), 'size_bytes': self.size_bytes, 'max_bytes': self.max_bytes}
+
+class SQLiteTier:
+    """
+    On-disk document entries in SQLite, shared by all workers and kept
+    across restarts. Every write gives the row a new version.
+    """
+
+    # Minimum seconds between last_access updates of an entry read while current in memory
+    ACCESS_UPDATE_INTERVAL = 60
+
+    def __init__(self, db_path: str, max_bytes: int):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self, wal: bool = False) -> ContextManager[sqlite3.Connection]:
+        return connect(self.db_path, wal=wal)
+
+    def _init_db(self):
+        """Create the documents table if it does not exist"""
+        with self._connect(wal=True) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    file_hash TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    version TEXT NOT NULL DEFAULT ''
+                )
+            ''')
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(documents)')]
+            if 'version' not in columns:
+                conn.execute("ALTER TABLE documents ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_documents_access ON documents (last_access)')
+
+    def get(self, file_hash: str, cached_version: Optional[str] = None) -> Optional[Tuple[Optional[Dict[str, Any]], int, str]]:
+        """
+        (value, size_bytes, version) of an entry, or None if there is none.
+        The value is None when the row still has cached_version, so a
+        current memory entry is confirmed without reading the payload.
+        """
+        now = datetime.now().timestamp()
+        with self._lock, self._connect() as conn:
+            row = conn.execute('''
+                SELECT CASE WHEN version = ? THEN NULL ELSE payload END, size_bytes, version
+                FROM documents WHERE file_hash = ?
+            ''', (cached_version, file_hash)).fetchone()
+            if row is None:
+                return None
+            # Hits confirming a memory entry only refresh last_access now and then
+            refresh_before = now - self.ACCESS_UPDATE_INTERVAL if row[0] is None else now
+            conn.execute(
+                'UPDATE documents SET last_access = ? WHERE file_hash = ? AND last_access < ?',
+                (now, file_hash, refresh_before)
+            )
+        value = pickle.loads(row[0]) if row[0] is not None else None
+        return value, row[1], row[2]
+
+    def put(self, file_hash: str, payload: bytes) -> str:
+        """Write an entry and return its new row version"""
+        version = uuid.uuid4().hex
+        with self._lock, self._connect() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO documents (file_hash, payload, size_bytes, created_at, last_access, version)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (file_hash, payload, len(payload), datetime.now().isoformat(), datetime.now().timestamp(), version))
+            self._evict(conn)
+        return version
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the tier fits in max_bytes"""
+        evict_lru(conn, 'documents', 'file_hash', 'size_bytes', self.max_bytes)
+
+    def delete(self, file_hash: str):
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM documents WHERE file_hash = ?', (file_hash,))
+
+    def keys(self) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute('SELECT file_hash FROM documents ORDER BY created_at')]
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM documents')
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            entries, total = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM documents'
+            ).fetchone()
+        return {'entries': entries, 'size_bytes': total, 'max_bytes': self.max_bytes, 'db_path': self.db_path}
+
+class DocumentCache(MutableMapping):
+    """
+    Per-document metadata (file name, analysis, tables, images, forms,
+    annotations) keyed by file hash. A byte-bounded in-memory LRU sits in
+    front of an optional SQLite tier that is written through, so entries
+    survive restarts and are visible to every worker. Memory hits are
+    checked against the SQLite row version, so an entry another worker
+    rewrote or deleted is re-read or dropped rather than served stale.
+    Backend 'memory' keeps only the in-process tier.
+    """
+
+    def __init__(self, backend: Optional[str] = None, cache_dir: Optional[str] = None,
+                 memory_max_bytes: Optional[int] = None, disk_max_bytes: Optional[int] = None):
+        self.backend = backend or os.getenv('PDF_DOCUMENT_CACHE_BACKEND', 'sqlite')
+        if self.backend not in ('sqlite', 'memory'):
+            raise ValueError(f"Unknown document cache backend: {self.backend}")
+        self.cache_dir = cache_dir or os.getenv('PDF_CACHE_DIR', './pdf_cache')
+        self.memory = MemoryTier(int(memory_max_bytes or os.getenv('PDF_DOCUMENT_CACHE_MAX_BYTES', 256 * 1024 * 1024)))
+        self.disk = None
+        if self.backend == 'sqlite':
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.disk = SQLiteTier(
+                os.path.join(self.cache_dir, 'document_cache.sqlite3'),
+                int(disk_max_bytes or os.getenv('PDF_DOCUMENT_CACHE_DISK_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+            )
+
+    def __getitem__(self, file_hash: str) -> Dict[str, Any]:
+        cached = self.memory.get(file_hash)
+        if self.disk is None:
+            if cached is not None:
+                return cached[0]
+            raise KeyError(file_hash)
+
+        try:
+            entry = self.disk.get(file_hash, cached[1] if cached is not None else None)
+        except Exception as e:
+            print(f"Error reading document cache: {str(e)}")
+            if cached is not None:
+                return cached[0]
+            raise KeyError(file_hash)
+
+        if entry is None:
+            # Deleted or evicted by another worker
+            self.memory.delete(file_hash)
+            raise KeyError(file_hash)
+        value, size_bytes, version = entry
+        if value is None:
+            return cached[0]
+        self.memory.put(file_hash, value, size_bytes, version)
+        return value
+
+    def __setitem__(self, file_hash: str, value: Dict[str, Any]):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        version = None
+        if self.disk is not None:
+            try:
+                version = self.disk.put(file_hash, payload)
+            except Exception as e:
+                print(f"Error writing document cache: {str(e)}")
+        self.memory.put(file_hash, value, len(payload), version)
+
+    def __delitem__(self, file_hash: str):
+        if file_hash not in self:
+            raise KeyError(file_hash)
+        self.memory.delete(file_hash)
+        if self.disk is not None:
+            self.disk.delete(file_hash)
+
+    def __contains__(self, file_hash: object) -> bool:
+        try:
+            self[file_hash]
+            return True
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        keys = self.memory.keys() if self.disk is None else self.disk.keys()
+        return iter(keys)
+
+    def __len__(self) -> int:
+        if self.disk is None:
+            return len(self.memory.keys())
+        return self.disk.get_stats()['entries']
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Entry counts and sizes of each tier"""
+        try:
+            return {
+                'backend': self.backend,
+                'memory': self.memory.get_stats(),
+                'disk': self.disk.get_stats() if self.disk is not None else None
+            }
+        except Exception as e:
+            print(f"Error getting document cache stats: {str(e)}")
+            return {'backend': self.backend}
+
+# Global document cache instance
+document_cache = DocumentCache()
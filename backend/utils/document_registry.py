@@ -0,0 +1,230 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import ContextManager, List, Dict, Any, Optional
+from utils.sqlite_db import connect
+
+def _json_default(obj):
+    """Serialize PyMuPDF geometry (Rect, Point, ...) and other iterables as lists"""
+    try:
+        return list(obj)
+    except TypeError:
+        return str(obj)
+
+class DocumentRegistry:
+    """
+    SQLite table of document-level data (metadata, analysis, pages_info,
+    page offsets) stored once per file hash, so vector store chunks only
+    carry scalar fields. Collection-wide totals are kept in a one-row
+    table maintained by triggers, so statistics are exact and read in
+    constant time.
+    """
+
+    JSON_FIELDS = ('metadata', 'analysis', 'pages_info', 'page_offsets')
+
+    def __init__(self, persist_directory: str):
+        self.db_path = os.path.join(persist_directory, 'document_registry.sqlite3')
+        self._lock = threading.Lock()
+        os.makedirs(persist_directory, exist_ok=True)
+        self._init_db()
+
+    def _connect(self, wal: bool = False) -> ContextManager[sqlite3.Connection]:
+        return connect(self.db_path, sqlite3.Row, wal=wal)
+
+    def _init_db(self):
+        """Create the documents and totals tables and their triggers if they do not exist"""
+        with self._connect(wal=True) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    file_hash TEXT PRIMARY KEY,
+                    file_name TEXT,
+                    file_path TEXT,
+                    total_pages INTEGER,
+                    text_length INTEGER,
+                    chunk_count INTEGER,
+                    metadata TEXT,
+                    analysis TEXT,
+                    pages_info TEXT,
+                    page_offsets TEXT,
+                    upload_timestamp TEXT,
+                    file_size INTEGER
+                )
+            ''')
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(documents)')}
+            if 'file_size' not in columns:
+                conn.execute('ALTER TABLE documents ADD COLUMN file_size INTEGER')
+            
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS registry_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    documents INTEGER NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    pages INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    text_length INTEGER NOT NULL,
+                    last_ingest TEXT
+                )
+            ''')
+            # Seed the totals from rows registered before this table existed
+            conn.execute('''
+                INSERT OR IGNORE INTO registry_stats
+                SELECT 1, COUNT(*), COALESCE(SUM(chunk_count), 0), COALESCE(SUM(total_pages), 0),
+                       COALESCE(SUM(file_size), 0), COALESCE(SUM(text_length), 0), MAX(upload_timestamp)
+                FROM documents
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS documents_stats_insert AFTER INSERT ON documents
+                BEGIN
+                    UPDATE registry_stats SET
+                        documents = documents + 1,
+                        chunks = chunks + COALESCE(NEW.chunk_count, 0),
+                        pages = pages + COALESCE(NEW.total_pages, 0),
+                        bytes = bytes + COALESCE(NEW.file_size, 0),
+                        text_length = text_length + COALESCE(NEW.text_length, 0),
+                        last_ingest = NEW.upload_timestamp
+                    WHERE id = 1;
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS documents_stats_update AFTER UPDATE ON documents
+                BEGIN
+                    UPDATE registry_stats SET
+                        chunks = chunks - COALESCE(OLD.chunk_count, 0) + COALESCE(NEW.chunk_count, 0),
+                        pages = pages - COALESCE(OLD.total_pages, 0) + COALESCE(NEW.total_pages, 0),
+                        bytes = bytes - COALESCE(OLD.file_size, 0) + COALESCE(NEW.file_size, 0),
+                        text_length = text_length - COALESCE(OLD.text_length, 0) + COALESCE(NEW.text_length, 0),
+                        last_ingest = NEW.upload_timestamp
+                    WHERE id = 1;
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS documents_stats_delete AFTER DELETE ON documents
+                BEGIN
+                    UPDATE registry_stats SET
+                        documents = documents - 1,
+                        chunks = chunks - COALESCE(OLD.chunk_count, 0),
+                        pages = pages - COALESCE(OLD.total_pages, 0),
+                        bytes = bytes - COALESCE(OLD.file_size, 0),
+                        text_length = text_length - COALESCE(OLD.text_length, 0)
+                    WHERE id = 1;
+                END
+            ''')
+
+    def upsert_document(self, doc: Dict[str, Any], chunk_count: int) -> bool:
+        """Insert or update the document-level record for a parsed document"""
+        try:
+            with self._lock, self._connect() as conn:
+                # An upsert (not INSERT OR REPLACE) so the update trigger keeps totals exact
+                conn.execute('''
+                    INSERT INTO documents
+                    (file_hash, file_name, file_path, total_pages, text_length, chunk_count,
+                     metadata, analysis, pages_info, page_offsets, upload_timestamp, file_size)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (file_hash) DO UPDATE SET
+                        file_name = excluded.file_name,
+                        file_path = excluded.file_path,
+                        total_pages = excluded.total_pages,
+                        text_length = excluded.text_length,
+                        chunk_count = excluded.chunk_count,
+                        metadata = excluded.metadata,
+                        analysis = excluded.analysis,
+                        pages_info = excluded.pages_info,
+                        page_offsets = excluded.page_offsets,
+                        upload_timestamp = excluded.upload_timestamp,
+                        file_size = excluded.file_size
+                ''', (
+                    doc['file_hash'],
+                    doc.get('file_name'),
+                    doc.get('file_path'),
+                    doc.get('total_pages'),
+                    doc.get('text_length'),
+                    chunk_count,
+                    json.dumps(doc.get('metadata', {}), default=_json_default),
+                    json.dumps(doc.get('analysis', {}), default=_json_default),
+                    json.dumps(doc.get('pages_info', []), default=_json_default),
+                    json.dumps(doc.get('page_offsets', []), default=_json_default),
+                    datetime.now().isoformat(),
+                    doc.get('file_size')
+                ))
+            return True
+        except Exception as e:
+            print(f"Error registering document: {str(e)}")
+            return False
+
+    def get_document(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Get the document-level record for a file hash"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT * FROM documents WHERE file_hash = ?', (file_hash,)).fetchone()
+            return self._row_to_dict(row) if row else None
+        except Exception as e:
+            print(f"Error reading document registry: {str(e)}")
+            return None
+
+    def has_document(self, file_hash: str) -> bool:
+        """Whether a record exists for a file hash"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT 1 FROM documents WHERE file_hash = ?', (file_hash,)).fetchone()
+            return row is not None
+        except Exception as e:
+            print(f"Error reading document registry: {str(e)}")
+            return False
+
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """List all registered documents without their JSON payloads"""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute('''
+                    SELECT file_hash, file_name, total_pages, text_length, file_size, chunk_count, upload_timestamp
+                    FROM documents
+                ''').fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"Error listing document registry: {str(e)}")
+            return []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Exact collection-wide totals, read from the trigger-maintained stats row"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT documents, chunks, pages, bytes, text_length, last_ingest FROM registry_stats WHERE id = 1'
+                ).fetchone()
+            return dict(row) if row else {}
+        except Exception as e:
+            print(f"Error reading document registry stats: {str(e)}")
+            return {}
+
+    def delete_document(self, file_hash: str) -> bool:
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM documents WHERE file_hash = ?', (file_hash,))
+            return True
+        except Exception as e:
+            print(f"Error deleting from document registry: {str(e)}")
+            return False
+
+    def clear(self) -> bool:
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM documents')
+                # The triggers zero the counters; last_ingest has no previous value to fall back to
+                conn.execute('''
+                    UPDATE registry_stats SET documents = 0, chunks = 0, pages = 0, bytes = 0,
+                                              text_length = 0, last_ingest = NULL
+                    WHERE id = 1
+                ''')
+            return True
+        except Exception as e:
+            print(f"Error clearing document registry: {str(e)}")
+            return False
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        for field in self.JSON_FIELDS:
+            if record.get(field):
+                record[field] = json.loads(record[field])
+        return record
@@ -0,0 +1,129 @@
+import os
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from typing import ContextManager, List, Dict, Any, Optional
+import numpy as np
+from utils.sqlite_db import connect, evict_lru
+
+class EmbeddingCache:
+    """
+    Persistent, size-bounded LRU cache of chunk embeddings keyed by
+    SHA-256 of (model name, chunk text), so re-uploaded or overlapping
+    documents skip the embedding model for chunks it has already seen
+    """
+
+    # SQLite limits the number of bound parameters per statement
+    LOOKUP_BATCH = 500
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv('PDF_CACHE_DIR', './pdf_cache')
+        self.max_bytes = int(max_bytes or os.getenv('EMBEDDING_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+        self.db_path = os.path.join(self.cache_dir, 'embedding_cache.sqlite3')
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._init_db()
+
+    def _connect(self, wal: bool = False) -> ContextManager[sqlite3.Connection]:
+        return connect(self.db_path, wal=wal)
+
+    def _init_db(self):
+        """Create the cache table if it does not exist"""
+        with self._connect(wal=True) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_embedding_cache_access ON embedding_cache (last_access)')
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """Cache key for a chunk embedded by a given model"""
+        return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return cached float32 vectors for the keys that are present"""
+        found = {}
+        if not keys:
+            return found
+        try:
+            unique_keys = list(dict.fromkeys(keys))
+            with self._lock, self._connect() as conn:
+                for i in range(0, len(unique_keys), self.LOOKUP_BATCH):
+                    batch = unique_keys[i:i + self.LOOKUP_BATCH]
+                    placeholders = ','.join('?' * len(batch))
+                    for key, dim, vector in conn.execute(
+                        f'SELECT key, dim, vector FROM embedding_cache WHERE key IN ({placeholders})',
+                        batch
+                    ):
+                        found[key] = np.frombuffer(vector, dtype=np.float32, count=dim)
+                if found:
+                    now = datetime.now().timestamp()
+                    conn.executemany(
+                        'UPDATE embedding_cache SET last_access = ? WHERE key = ?',
+                        [(now, key) for key in found]
+                    )
+        except Exception as e:
+            print(f"Error reading embedding cache: {e}")
+        return found
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> bool:
+        """Store vectors for keys and evict least recently used entries over the size budget"""
+        if not keys:
+            return True
+        try:
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            now = datetime.now().timestamp()
+            rows = [
+                (key, vectors.shape[1], vectors[i].tobytes(), now)
+                for i, key in enumerate(keys)
+            ]
+            with self._lock, self._connect() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO embedding_cache (key, dim, vector, last_access)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
+                self._evict(conn)
+            return True
+        except Exception as e:
+            print(f"Error writing embedding cache: {e}")
+            return False
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        evict_lru(conn, 'embedding_cache', 'key', 'dim * 4', self.max_bytes)
+
+    def clear(self) -> bool:
+        """Remove all entries"""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM embedding_cache')
+            return True
+        except Exception as e:
+            print(f"Error clearing embedding cache: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get entry count and vector bytes held by the cache"""
+        try:
+            with self._connect() as conn:
+                entries, total = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(dim * 4), 0) FROM embedding_cache'
+                ).fetchone()
+            return {
+                'entries': entries,
+                'size_bytes': total,
+                'max_bytes': self.max_bytes,
+                'db_path': self.db_path
+            }
+        except Exception as e:
+            print(f"Error getting embedding cache stats: {e}")
+            return {}
+
+# Global embedding cache instance
+embedding_cache = EmbeddingCache()
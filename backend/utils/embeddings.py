@@ -0,0 +1,61 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Optional
+import numpy as np
+
+class EmbeddingBackend:
+    """
+    Local sentence-transformers embedding model shared by all requests.
+    The default model matches Chroma's built-in embedding function, so
+    vectors stay compatible with collections indexed before this backend.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, batch_size: Optional[int] = None,
+                 workers: Optional[int] = None):
+        self.model_name = model_name or os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+        self.batch_size = int(batch_size or os.getenv('EMBEDDING_BATCH_SIZE', 256))
+        self.workers = int(workers or os.getenv('EMBEDDING_WORKERS', 2))
+        self._model = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """Load the model once, on first use"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Background worker pool for encode_async"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='embedding')
+        return self._executor
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into L2-normalised float32 vectors, batch_size texts per forward pass"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return embeddings.astype(np.float32, copy=False)
+
+    def encode_async(self, texts: List[str]) -> Future:
+        """Encode texts on the background worker pool"""
+        return self.executor.submit(self.encode, texts)
+
+# Global embedding backend instance
+embedding_backend = EmbeddingBackend()
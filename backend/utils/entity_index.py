@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import bisect
+import sqlite3
+import threading
+from typing import ContextManager, List, Dict, Any, Optional
+from utils.sqlite_db import connect
+
+ENTITY_TYPES = ('persons', 'organizations', 'dates', 'locations', 'money', 'percentages')
+# Tenant key of the shared collection's documents
+SHARED_TENANT = ''
+
+class EntityIndex:
+    """
+    Per-document named-entity index (entity -> type, occurrence count,
+    page numbers) built once at ingestion from the entities analyze_content
+    already extracted, so entity questions are answered by lookups instead
+    of re-running spaCy over the document text. Rows are keyed by tenant
+    (SHARED_TENANT for the shared collection) as well as file hash, so a
+    tenant only ever reads and deletes its own entries.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv('PDF_ENTITY_INDEX_DIR', './chroma_db')
+        self.db_path = os.path.join(self.directory, 'entity_index.sqlite3')
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._init_db()
+
+    def _connect(self, wal: bool = False) -> ContextManager[sqlite3.Connection]:
+        return connect(self.db_path, sqlite3.Row, wal=wal)
+
+    def _init_db(self):
+        """Create the entities and indexed_documents tables if they do not exist"""
+        with self._connect(wal=True) as conn:
+            columns = [row['name'] for row in conn.execute('PRAGMA table_info(entities)')]
+            if columns and 'tenant_id' not in columns:
+                # Indexes from before tenant scoping hold shared collection documents
+                conn.execute('ALTER TABLE entities RENAME TO entities_unscoped')
+                conn.execute('ALTER TABLE indexed_documents RENAME TO indexed_documents_unscoped')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS entities (
+                    tenant_id TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    entity_type TEXT NOT NULL,
+                    entity TEXT NOT NULL,
+                    occurrences INTEGER NOT NULL,
+                    pages TEXT NOT NULL,
+                    PRIMARY KEY (tenant_id, file_hash, entity_type, entity)
+                )
+            ''')
+            # Documents with an index, including those with no entities at all
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS indexed_documents (
+                    tenant_id TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    PRIMARY KEY (tenant_id, file_hash)
+                )
+            ''')
+            if columns and 'tenant_id' not in columns:
+                conn.execute('''
+                    INSERT INTO entities (tenant_id, file_hash, entity_type, entity, occurrences, pages)
+                    SELECT ?, file_hash, entity_type, entity, occurrences, pages FROM entities_unscoped
+                ''', (SHARED_TENANT,))
+                conn.execute('''
+                    INSERT INTO indexed_documents (tenant_id, file_hash)
+                    SELECT ?, file_hash FROM indexed_documents_unscoped
+                ''', (SHARED_TENANT,))
+                conn.execute('DROP TABLE entities_unscoped')
+                conn.execute('DROP TABLE indexed_documents_unscoped')
+
+    def has_document(self, file_hash: str, tenant_id: Optional[str] = None) -> bool:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT 1 FROM indexed_documents WHERE tenant_id = ? AND file_hash = ?',
+                    (tenant_id or SHARED_TENANT, file_hash)
+                ).fetchone()
+            return row is not None
+        except Exception as e:
+            print(f"Error reading entity index: {str(e)}")
+            return False
+
+    def build(self, file_hash: str, text: str, page_offsets: List[Dict[str, Any]],
+              named_entities: Dict[str, List[str]], tenant_id: Optional[str] = None) -> bool:
+        """
+        Index a document's entities. Occurrences and pages come from a
+        single regex pass over the text for all entity strings at once;
+        only whole-word matches count, so "Al" is not found in "Also".
+        """
+        try:
+            page_starts = [page['start'] for page in page_offsets]
+            page_numbers = [page['page_number'] for page in page_offsets]
+
+            types_by_entity = {}
+            for entity_type, values in named_entities.items():
+                for value in values:
+                    if value and value.strip():
+                        types_by_entity.setdefault(value, []).append(entity_type)
+
+            occurrences = {entity: 0 for entity in types_by_entity}
+            pages = {entity: set() for entity in types_by_entity}
+            if types_by_entity:
+                # Longest first, so overlapping entities match the most specific string
+                pattern = re.compile(r'(?<!\w)(?:' + '|'.join(
+                    re.escape(entity) for entity in sorted(types_by_entity, key=len, reverse=True)
+                ) + r')(?!\w)')
+                for match in pattern.finditer(text):
+                    entity = match.group(0)
+                    occurrences[entity] += 1
+                    if page_starts:
+                        position = max(bisect.bisect_right(page_starts, match.start()) - 1, 0)
+                        pages[entity].add(page_numbers[position])
+
+            tenant_key = tenant_id or SHARED_TENANT
+            rows = [
+                (tenant_key, file_hash, entity_type, entity, occurrences[entity], json.dumps(sorted(pages[entity])))
+                for entity, entity_types in types_by_entity.items()
+                for entity_type in entity_types
+            ]
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM entities WHERE tenant_id = ? AND file_hash = ?', (tenant_key, file_hash))
+                conn.executemany('''
+                    INSERT INTO entities (tenant_id, file_hash, entity_type, entity, occurrences, pages)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                conn.execute(
+                    'INSERT OR IGNORE INTO indexed_documents (tenant_id, file_hash) VALUES (?, ?)',
+                    (tenant_key, file_hash)
+                )
+            return True
+        except Exception as e:
+            print(f"Error building entity index: {str(e)}")
+            return False
+
+    def get_entities(self, file_hashes: List[str], tenant_id: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        Entities of the given documents grouped by type, most frequent
+        first, in the same shape as AdvancedPDFParser.extract_named_entities
+        """
+        entities = {entity_type: [] for entity_type in ENTITY_TYPES}
+        for record in self.get_entity_details(file_hashes, tenant_id):
+            entities.setdefault(record['type'], []).append(record['entity'])
+        return entities
+
+    def get_entity_details(self, file_hashes: List[str], tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entity records (entity, type, occurrences, pages) summed over the tenant's given documents"""
+        if not file_hashes:
+            return []
+        try:
+            placeholders = ','.join('?' * len(file_hashes))
+            with self._connect() as conn:
+                rows = conn.execute(f'''
+                    SELECT entity, entity_type, occurrences, pages, file_hash FROM entities
+                    WHERE tenant_id = ? AND file_hash IN ({placeholders})
+                ''', [tenant_id or SHARED_TENANT, *file_hashes]).fetchall()
+
+            merged = {}
+            for row in rows:
+                key = (row['entity_type'], row['entity'])
+                record = merged.setdefault(key, {
+                    'entity': row['entity'],
+                    'type': row['entity_type'],
+                    'occurrences': 0,
+                    'pages': {}
+                })
+                record['occurrences'] += row['occurrences']
+                record['pages'][row['file_hash']] = json.loads(row['pages'])
+            return sorted(merged.values(), key=lambda record: record['occurrences'], reverse=True)
+        except Exception as e:
+            print(f"Error reading entity index: {str(e)}")
+            return []
+
+    def delete_document(self, file_hash: str, tenant_id: Optional[str] = None) -> bool:
+        try:
+            tenant_key = tenant_id or SHARED_TENANT
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM entities WHERE tenant_id = ? AND file_hash = ?', (tenant_key, file_hash))
+                conn.execute('DELETE FROM indexed_documents WHERE tenant_id = ? AND file_hash = ?', (tenant_key, file_hash))
+            return True
+        except Exception as e:
+            print(f"Error deleting from entity index: {str(e)}")
+            return False
+
+    def clear(self, tenant_id: Optional[str] = None) -> bool:
+        """Delete every entry of one tenant (the shared collection when tenant_id is None)"""
+        try:
+            tenant_key = tenant_id or SHARED_TENANT
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM entities WHERE tenant_id = ?', (tenant_key,))
+                conn.execute('DELETE FROM indexed_documents WHERE tenant_id = ?', (tenant_key,))
+            return True
+        except Exception as e:
+            print(f"Error clearing entity index: {str(e)}")
+            return False
+
+# Global entity index instance
+entity_index = EntityIndex()
@@ -6,162 +6,444 @@ import re
 import json
 from datetime import datetime
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import cv2
 import numpy as np
 import pytesseract
 from PIL import Image
-import io
 import pandas as pd
 import tabula
-import easyocr
-import spacy
-from transformers import pipeline
+import threading
 import fitz  # PyMuPDF for advanced features
+from utils.parse_cache import parse_cache
+from utils.table_store import coerce_numeric_columns
+
+# Bump whenever the shape of extract_text_from_pdf's result changes so stale
+# parse cache entries are ignored. 4: sharded pages with table scores, OCR text,
+# page_offsets and tables as typed frames
+PARSE_SCHEMA_VERSION = 4
+
+# Page-sharded extraction settings
+PARSE_WORKERS = int(os.getenv('PDF_PARSE_WORKERS', os.cpu_count() or 1))
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 16))
+
+# Pages scoring below this table likelihood are not sent to tabula
+TABLE_SCORE_THRESHOLD = float(os.getenv('PDF_TABLE_SCORE_THRESHOLD', 0.5))
+
+# Batched OCR settings for low-text (likely scanned) pages
+OCR_DPI = int(os.getenv('PDF_OCR_DPI', 72))
+OCR_BATCH_SIZE = int(os.getenv('PDF_OCR_BATCH_SIZE', 8))
 
 class AdvancedPDFParser:
     """Advanced PDF parser with OCR, table extraction, and comprehensive analysis"""
     
-    def __init__(self):
+    def __init__(self, cache=None):
         self.supported_extensions = ['.pdf']
-        self.ocr_reader = None
-        self.nlp = None
-        self.ner_pipeline = None
+        self.parse_cache = cache or parse_cache
+        
+        # Model backends are loaded lazily on first use (see _get_backend)
+        self._backends = {}
+        self._backend_loaders = {
+            'ocr_reader': self._load_ocr_reader,
+            'nlp': self._load_nlp,
+            'ner_pipeline': self._load_ner_pipeline
+        }
+        self._backend_locks = {name: threading.Lock() for name in self._backend_loaders}
+    
+    @property
+    def ocr_reader(self):
+        return self._get_backend('ocr_reader')
+    
+    @property
+    def nlp(self):
+        return self._get_backend('nlp')
+    
+    @property
+    def ner_pipeline(self):
+        return self._get_backend('ner_pipeline')
+    
+    def _get_backend(self, name: str):
+        """Return a model backend, loading it once under its own lock; None if unavailable"""
+        if name in self._backends:
+            return self._backends[name]
         
-        # Initialize OCR
+        with self._backend_locks[name]:
+            if name not in self._backends:
+                self._backends[name] = self._backend_loaders[name]()
+        return self._backends[name]
+    
+    def _load_ocr_reader(self):
         try:
-            self.ocr_reader = easyocr.Reader(['en'])
+            import easyocr
+            return easyocr.Reader(['en'])
         except:
             print("EasyOCR not available, using Tesseract")
-        
-        # Initialize NLP
+            return None
+    
+    def _load_nlp(self):
         try:
-            self.nlp = spacy.load("en_core_web_sm")
+            import spacy
+            return spacy.load("en_core_web_sm")
         except:
             print("SpaCy model not available")
-        
-        # Initialize NER pipeline
+            return None
+    
+    def _load_ner_pipeline(self):
         try:
-            self.ner_pipeline = pipeline("ner", model="dbmdz/bert-large-cased-finetuned-conll03-english")
+            from transformers import pipeline
+            return pipeline("ner", model="dbmdz/bert-large-cased-finetuned-conll03-english")
         except:
             print("NER pipeline not available")
+            return None
+    
+    def warm_up(self, backends: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Load model backends ahead of the first request (e.g. from a readiness
+        probe) and report which of them are available
+        """
+        names = backends or list(self._backend_loaders)
+        return {name: self._get_backend(name) is not None for name in names}
     
-    def extract_text_from_pdf(self, file_path: str) -> Dict[str, Any]:
+    def extract_text_from_pdf(self, file_path: str, use_cache: bool = True,
+                              parallel: Optional[bool] = None) -> Dict[str, Any]:
         """
-        Extract comprehensive text, tables, images, and metadata from PDF
+        Extract comprehensive text, tables, images, and metadata from PDF.
+        Results are cached on disk by file hash so re-uploads skip parsing.
+        Large documents are sharded across a process pool unless parallel is
+        set explicitly.
         """
         try:
-            doc = fitz.open(file_path)
-            text_content = ""
-            pages_info = []
-            tables = []
-            images = []
-            forms = []
-            annotations = []
+            for event in self.iter_extract_pdf(file_path, use_cache, parallel):
+                if event['type'] == 'document':
+                    return event['document']
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF {file_path}: {str(e)}")
+    
+    def iter_extract_pdf(self, file_path: str, use_cache: bool = True,
+                         parallel: Optional[bool] = None):
+        """
+        Generator version of extract_text_from_pdf for streaming ingestion.
+        
+        Yields a 'page' event ({'type', 'file_hash', 'page_number',
+        'total_pages', 'text'}) as soon as each page's text is available,
+        and finally a 'document' event carrying the full result. Pages that
+        need OCR are yielded after their OCR batch, so page events may
+        arrive out of order. A parse cache hit yields only the document.
+        """
+        # Hash first so a re-upload can be served from the parse cache
+        file_hash = self._generate_file_hash(file_path)
+        if use_cache:
+            cached = self.parse_cache.get(file_hash, PARSE_SCHEMA_VERSION)
+            if cached is not None:
+                cached.update({
+                    'file_path': file_path,
+                    'file_name': os.path.basename(file_path),
+                    'cache_hit': True
+                })
+                yield {'type': 'document', 'document': cached}
+                return
+        
+        doc = fitz.open(file_path)
+        total_pages = len(doc)
+        metadata = doc.metadata
+        
+        if parallel is None:
+            parallel = total_pages >= PARALLEL_MIN_PAGES and PARSE_WORKERS > 1
+        
+        if parallel:
+            # Workers open their own document, so release ours first
+            doc.close()
+            page_iter = self._iter_pages_parallel(file_path, total_pages)
+        else:
+            page_iter = self._iter_pages_sequential(doc, total_pages)
+        
+        def page_event(page_number: int) -> Dict[str, Any]:
+            return {
+                'type': 'page',
+                'file_hash': file_hash,
+                'page_number': page_number,
+                'total_pages': total_pages,
+                'text': self._page_segment(page_number, page_texts[page_number], ocr_texts.get(page_number))
+            }
+        
+        page_results = []
+        page_texts = {}
+        ocr_texts = {}
+        ocr_pending = []
+        
+        for page_result in page_iter:
+            page_results.append(page_result)
+            page_number = page_result['page_info']['page_number']
+            page_texts[page_number] = page_result['text']
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                # Extract text
-                page_text = page.get_text()
-                text_content += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                
-                # Extract tables
-                page_tables = self._extract_tables_from_page(page, page_num)
-                tables.extend(page_tables)
-                
-                # Extract images
-                page_images = self._extract_images_from_page(page, page_num)
-                images.extend(page_images)
-                
-                # Extract forms
-                page_forms = self._extract_forms_from_page(page, page_num)
-                forms.extend(page_forms)
-                
-                # Extract annotations
-                page_annotations = self._extract_annotations_from_page(page, page_num)
-                annotations.extend(page_annotations)
-                
-                # OCR for scanned content
-                if len(page_text.strip()) < 100:  # Likely scanned
-                    ocr_text = self._perform_ocr_on_page(page)
-                    if ocr_text:
-                        text_content += f"\n--- OCR Text (Page {page_num + 1}) ---\n{ocr_text}\n"
-                
-                # Page metadata
-                page_info = {
-                    'page_number': page_num + 1,
-                    'text_length': len(page_text),
-                    'has_images': len(page.get_images()) > 0,
-                    'has_drawings': len(page.get_drawings()) > 0,
-                    'has_tables': len(page_tables) > 0,
-                    'has_forms': len(page_forms) > 0,
-                    'has_annotations': len(page_annotations) > 0,
-                    'rotation': page.rotation,
-                    'rect': page.rect,
-                    'ocr_performed': len(page_text.strip()) < 100
-                }
-                pages_info.append(page_info)
+            if not page_result['page_info']['ocr_performed']:
+                yield page_event(page_number)
+                continue
+            
+            # OCR low-text pages in batches as they accumulate
+            ocr_pending.append(page_number)
+            if len(ocr_pending) >= OCR_BATCH_SIZE:
+                ocr_texts.update(self._perform_ocr_batch(file_path, ocr_pending))
+                for pending_page in ocr_pending:
+                    yield page_event(pending_page)
+                ocr_pending = []
+        
+        if ocr_pending:
+            ocr_texts.update(self._perform_ocr_batch(file_path, ocr_pending))
+            for pending_page in ocr_pending:
+                yield page_event(pending_page)
+        
+        text_segments = []
+        page_offsets = []
+        text_offset = 0
+        pages_info = []
+        tables = []
+        images = []
+        forms = []
+        annotations = []
+        
+        # Merge page results in page order, recording where each page's
+        # segment starts and ends in text_content
+        for page_result in page_results:
+            page_number = page_result['page_info']['page_number']
+            segment = self._page_segment(page_number, page_result['text'], ocr_texts.get(page_number))
+            text_segments.append(segment)
+            page_offsets.append({
+                'page_number': page_number,
+                'start': text_offset,
+                'end': text_offset + len(segment)
+            })
+            text_offset += len(segment)
             
-            # Extract document metadata
-            metadata = doc.metadata
+            images.extend(page_result['images'])
+            forms.extend(page_result['forms'])
+            annotations.extend(page_result['annotations'])
+            pages_info.append(page_result['page_info'])
+        
+        text_content = "".join(text_segments)
+        
+        # Tables are extracted for the whole document in one tabula call,
+        # restricted to pages the cheap detector flagged as tabular
+        candidate_pages = [info['page_number'] for info in pages_info if info['table_candidate']]
+        tables_by_page = self._extract_tables_from_document(file_path, candidate_pages)
+        for page_info in pages_info:
+            page_tables = tables_by_page.get(page_info['page_number'], [])
+            page_info['has_tables'] = len(page_tables) > 0
+            tables.extend(page_tables)
+        
+        # Perform advanced analysis
+        analysis = self.analyze_content(text_content)
+        
+        result = {
+            'file_path': file_path,
+            'file_name': os.path.basename(file_path),
+            'file_size': os.path.getsize(file_path),
+            'file_hash': file_hash,
+            'text_content': text_content,
+            'metadata': metadata,
+            'pages_info': pages_info,
+            'page_offsets': page_offsets,
+            'tables': tables,
+            'images': images,
+            'forms': forms,
+            'annotations': annotations,
+            'total_pages': len(pages_info),
+            'extraction_timestamp': datetime.now().isoformat(),
+            'text_length': len(text_content),
+            'analysis': analysis
+        }
+        
+        if use_cache:
+            self.parse_cache.put(file_hash, PARSE_SCHEMA_VERSION, result)
+        result['cache_hit'] = False
+        
+        yield {'type': 'document', 'document': result}
+    
+    def _page_segment(self, page_number: int, page_text: str, ocr_text: Optional[str] = None) -> str:
+        """Text contributed by one page to the document's text_content"""
+        segment = f"\n--- Page {page_number} ---\n{page_text}\n"
+        if ocr_text:
+            segment += f"\n--- OCR Text (Page {page_number}) ---\n{ocr_text}\n"
+        return segment
+    
+    def _iter_pages_sequential(self, doc, total_pages: int):
+        """Extract pages one by one from an open document, closing it when done"""
+        try:
+            for page_num in range(total_pages):
+                yield self._process_page(doc.load_page(page_num), page_num)
+        finally:
             doc.close()
+    
+    def _process_page(self, page, page_num: int) -> Dict[str, Any]:
+        """Extract text, images, forms and annotations from one page and flag it for OCR"""
+        page_text = page.get_text()
+        page_images = self._extract_images_from_page(page, page_num)
+        page_forms = self._extract_forms_from_page(page, page_num)
+        page_annotations = self._extract_annotations_from_page(page, page_num)
+        drawings = page.get_drawings()
+        table_score = self._score_table_likelihood(page, drawings)
+        
+        # OCR for scanned content is done later in one batch per document
+        needs_ocr = len(page_text.strip()) < 100  # Likely scanned
+        
+        return {
+            'text': page_text,
+            'images': page_images,
+            'forms': page_forms,
+            'annotations': page_annotations,
+            'page_info': {
+                'page_number': page_num + 1,
+                'text_length': len(page_text),
+                'has_images': len(page.get_images()) > 0,
+                'has_drawings': len(drawings) > 0,
+                'table_score': table_score,
+                'table_candidate': table_score >= TABLE_SCORE_THRESHOLD,
+                'has_forms': len(page_forms) > 0,
+                'has_annotations': len(page_annotations) > 0,
+                'rotation': page.rotation,
+                'rect': page.rect,
+                'ocr_performed': needs_ocr
+            }
+        }
+    
+    def _score_table_likelihood(self, page, drawings: List[Dict[str, Any]]) -> float:
+        """
+        Cheaply score how likely a page is to contain a table (0.0 - 1.0)
+        from ruling lines in its vector drawings and from words that line
+        up in columns across several rows
+        """
+        try:
+            # Ruling lines: lattice tables draw a grid, booktabs-style tables
+            # only horizontal rules
+            horizontal = vertical = 0
+            for path in drawings:
+                for item in path.get('items', []):
+                    if item[0] == 'l':
+                        p1, p2 = item[1], item[2]
+                        if abs(p1.y - p2.y) < 1 and abs(p1.x - p2.x) > 20:
+                            horizontal += 1
+                        elif abs(p1.x - p2.x) < 1 and abs(p1.y - p2.y) > 10:
+                            vertical += 1
+                    elif item[0] == 're':
+                        rect = item[1]
+                        if rect.height < 2 and rect.width > 20:
+                            horizontal += 1
+                        elif rect.width < 2 and rect.height > 10:
+                            vertical += 1
+                        elif rect.width > 5 and rect.height > 5:
+                            horizontal += 2
+                            vertical += 2
             
-            # Generate file hash for caching
-            file_hash = self._generate_file_hash(file_path)
+            if horizontal >= 3 and vertical >= 3:
+                ruling_score = 1.0
+            elif horizontal >= 3:
+                ruling_score = 0.5
+            else:
+                ruling_score = 0.0
             
-            # Perform advanced analysis
-            analysis = self.analyze_content(text_content)
+            # Column alignment: split each visual row into cells at wide gaps
+            # and count cell start positions shared by several rows
+            rows = {}
+            for x0, y0, x1, y1, *_ in page.get_text('words'):
+                rows.setdefault(round(y0 / 3), []).append((x0, x1))
             
-            return {
-                'file_path': file_path,
-                'file_name': os.path.basename(file_path),
-                'file_size': os.path.getsize(file_path),
-                'file_hash': file_hash,
-                'text_content': text_content,
-                'metadata': metadata,
-                'pages_info': pages_info,
-                'tables': tables,
-                'images': images,
-                'forms': forms,
-                'annotations': annotations,
-                'total_pages': len(pages_info),
-                'extraction_timestamp': datetime.now().isoformat(),
-                'text_length': len(text_content),
-                'analysis': analysis
-            }
+            tabular_rows = 0
+            column_hits = {}
+            for words in rows.values():
+                words.sort()
+                cell_starts = [words[0][0]]
+                for (_, prev_x1), (x0, _) in zip(words, words[1:]):
+                    if x0 - prev_x1 > 10:
+                        cell_starts.append(x0)
+                if len(cell_starts) < 2:
+                    continue
+                tabular_rows += 1
+                for x in set(round(x / 8) for x in cell_starts):
+                    column_hits[x] = column_hits.get(x, 0) + 1
             
+            aligned_columns = sum(1 for hits in column_hits.values() if hits >= 3)
+            alignment_score = min(1.0, tabular_rows / 5) * min(1.0, max(0, aligned_columns - 1) / 3)
+            
+            return round(max(ruling_score, alignment_score), 3)
         except Exception as e:
-            raise Exception(f"Error extracting text from PDF {file_path}: {str(e)}")
+            print(f"Error scoring table likelihood: {e}")
+            # Fall back to the heavy extractor rather than miss a table
+            return 1.0
     
-    def _extract_tables_from_page(self, page, page_num: int) -> List[Dict[str, Any]]:
-        """Extract tables from a page"""
-        tables = []
+    def _iter_pages_parallel(self, file_path: str, total_pages: int):
+        """Fan contiguous page ranges out across a process pool and yield them in page order"""
+        workers = min(PARSE_WORKERS, total_pages)
+        # A few shards per worker keeps the pool busy when some pages are slow
+        shard_size = max(1, -(-total_pages // (workers * 4)))
+        shards = [list(range(start, min(start + shard_size, total_pages)))
+                  for start in range(0, total_pages, shard_size)]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard_results in executor.map(_extract_page_range, [file_path] * len(shards), shards):
+                yield from shard_results
+    
+    def _extract_tables_from_document(self, file_path: str,
+                                      page_numbers: Optional[List[int]] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Extract tables for all requested pages (1-based, default all) with a
+        single tabula call and group them by page number
+        """
+        tables_by_page = {}
+        if page_numbers is not None and not page_numbers:
+            return tables_by_page
+        
         try:
-            # Use tabula for table extraction
-            page_tables = tabula.read_pdf(
-                page.parent.filename, 
-                pages=page_num + 1,
+            # JSON output keeps the page each table came from, which the
+            # DataFrame output of a multi-page call does not
+            raw_tables = tabula.read_pdf(
+                file_path,
+                pages=page_numbers or 'all',
                 multiple_tables=True,
                 lattice=True,
-                stream=True
+                stream=True,
+                output_format='json'
             )
             
-            for i, table in enumerate(page_tables):
-                if not table.empty:
-                    table_data = {
-                        'page_number': page_num + 1,
-                        'table_index': i,
-                        'data': table.to_dict('records'),
-                        'columns': table.columns.tolist(),
-                        'shape': table.shape,
-                        'html': table.to_html(),
-                        'csv': table.to_csv(index=False)
-                    }
-                    tables.append(table_data)
+            for raw_table in raw_tables:
+                page_number = raw_table.get('page_number')
+                if page_number is None and page_numbers and len(page_numbers) == 1:
+                    page_number = page_numbers[0]
+                if page_number is None:
+                    continue
+                
+                table = self._table_to_dataframe(raw_table.get('data', []))
+                if table.empty:
+                    continue
+                
+                page_tables = tables_by_page.setdefault(page_number, [])
+                page_tables.append({
+                    'page_number': page_number,
+                    'table_index': len(page_tables),
+                    'frame': table,
+                    'columns': table.columns.tolist(),
+                    'shape': table.shape
+                })
         except Exception as e:
-            print(f"Error extracting tables from page {page_num + 1}: {e}")
+            print(f"Error extracting tables from {file_path}: {e}")
+        
+        return tables_by_page
+    
+    def _table_to_dataframe(self, rows: List[List[Dict[str, Any]]]) -> pd.DataFrame:
+        """
+        Build a DataFrame from tabula JSON rows, using the first row as
+        header, with numeric-looking columns coerced to floats
+        """
+        values = [[cell.get('text') or None for cell in row] for row in rows]
+        if len(values) < 2:
+            return pd.DataFrame()
         
-        return tables
+        header = []
+        for i, col in enumerate(values[0]):
+            name = col or f"column_{i}"
+            # Columnar formats need unique column names
+            header.append(name if name not in header else f"{name}_{i}")
+        table = pd.DataFrame(values[1:], columns=header)
+        return coerce_numeric_columns(table)
     
     def _extract_images_from_page(self, page, page_num: int) -> List[Dict[str, Any]]:
         """Extract images from a page"""
@@ -231,28 +513,63 @@ class AdvancedPDFParser:
         
         return annotations
     
-    def _perform_ocr_on_page(self, page) -> str:
-        """Perform OCR on a page"""
+    def _perform_ocr_batch(self, file_path: str, page_numbers: List[int],
+                           dpi: Optional[int] = None) -> Dict[int, str]:
+        """
+        OCR the given pages (1-based) in batches, rendering each page straight
+        to a NumPy array instead of round-tripping through PNG
+        """
+        ocr_texts = {}
+        if not page_numbers:
+            return ocr_texts
+        
+        dpi = dpi or OCR_DPI
         try:
-            # Convert page to image
-            pix = page.get_pixmap()
-            img_data = pix.tobytes("png")
-            
-            # Convert to PIL Image
-            img = Image.open(io.BytesIO(img_data))
-            
-            # Perform OCR
-            if self.ocr_reader:
-                results = self.ocr_reader.readtext(np.array(img))
-                text = " ".join([result[1] for result in results])
-            else:
-                # Fallback to Tesseract
-                text = pytesseract.image_to_string(img)
-            
-            return text
+            doc = fitz.open(file_path)
+            try:
+                for start in range(0, len(page_numbers), OCR_BATCH_SIZE):
+                    batch = page_numbers[start:start + OCR_BATCH_SIZE]
+                    try:
+                        images = {page_number: self._render_page_array(doc.load_page(page_number - 1), dpi)
+                                  for page_number in batch}
+                        ocr_texts.update(self._ocr_images(images))
+                    except Exception as e:
+                        print(f"Error performing OCR on pages {batch}: {e}")
+            finally:
+                doc.close()
         except Exception as e:
             print(f"Error performing OCR: {e}")
-            return ""
+        
+        return ocr_texts
+    
+    def _render_page_array(self, page, dpi: int) -> np.ndarray:
+        """Render a page to an RGB (or grayscale) uint8 array"""
+        pix = page.get_pixmap(dpi=dpi)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        return img[:, :, 0] if pix.n == 1 else img
+    
+    def _ocr_images(self, images: Dict[int, np.ndarray]) -> Dict[int, str]:
+        """Run the OCR engine over a batch of page images keyed by page number"""
+        if not self.ocr_reader:
+            # Fallback to Tesseract
+            return {page_number: pytesseract.image_to_string(Image.fromarray(img))
+                    for page_number, img in images.items()}
+        
+        # EasyOCR stacks a batch into one tensor, so batch pages of equal size
+        by_shape = {}
+        for page_number, img in images.items():
+            by_shape.setdefault(img.shape, []).append(page_number)
+        
+        texts = {}
+        for page_group in by_shape.values():
+            results = self.ocr_reader.readtext_batched(
+                [images[page_number] for page_number in page_group],
+                batch_size=OCR_BATCH_SIZE
+            )
+            for page_number, page_results in zip(page_group, results):
+                texts[page_number] = " ".join([result[1] for result in page_results])
+        
+        return texts
     
     def extract_specific_content(self, text_content: str, query: str) -> Dict[str, Any]:
         """Extract specific content based on query"""
@@ -589,7 +906,7 @@ class AdvancedPDFParser:
         Parse multiple PDF files and create a unified dataset
         """
         parsed_files = []
-        combined_text = ""
+        text_segments = []
         total_pages = 0
         all_tables = []
         all_images = []
@@ -601,8 +918,8 @@ class AdvancedPDFParser:
                 parsed_file = self.extract_text_from_pdf(file_path)
                 
                 parsed_files.append(parsed_file)
-                combined_text += f"\n\n--- Document: {parsed_file['file_name']} ---\n"
-                combined_text += parsed_file['text_content']
+                text_segments.append(f"\n\n--- Document: {parsed_file['file_name']} ---\n")
+                text_segments.append(parsed_file['text_content'])
                 total_pages += parsed_file['total_pages']
                 
                 # Collect all extracted data
@@ -615,6 +932,8 @@ class AdvancedPDFParser:
                 print(f"Error parsing {file_path}: {str(e)}")
                 continue
         
+        combined_text = "".join(text_segments)
+        
         # Create unified dataset
         unified_dataset = {
             'files': parsed_files,
@@ -632,5 +951,14 @@ class AdvancedPDFParser:
         
         return unified_dataset
 
+def _extract_page_range(file_path: str, page_numbers: List[int]) -> List[Dict[str, Any]]:
+    """Process-pool worker: open the document and extract a contiguous range of pages"""
+    doc = fitz.open(file_path)
+    try:
+        return [pdf_parser._process_page(doc.load_page(page_num), page_num)
+                for page_num in page_numbers]
+    finally:
+        doc.close()
+
 # Global parser instance
 pdf_parser = AdvancedPDFParser()
@@ -0,0 +1,179 @@
+import os
+import re
+import math
+import sqlite3
+import threading
+from collections import Counter
+from typing import ContextManager, List, Dict, Optional, Tuple
+from utils.sqlite_db import connect
+
+# Keeps identifiers such as invoice numbers (INV-2023-001) and clause ids
+# (4.2.1) whole; their parts are indexed as separate terms as well
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+TOKEN_SPLIT_PATTERN = re.compile(r"[-./]")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms of a text, compound identifiers plus their parts"""
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        parts = TOKEN_SPLIT_PATTERN.split(token)
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+class LexicalIndex:
+    """
+    SQLite inverted index of vector store chunks scored with Okapi BM25,
+    kept alongside the Chroma collection for keyword-heavy queries
+    """
+
+    def __init__(self, persist_directory: str, k1: float = 1.5, b: float = 0.75):
+        self.db_path = os.path.join(persist_directory, 'lexical_index.sqlite3')
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        os.makedirs(persist_directory, exist_ok=True)
+        self._init_db()
+
+    def _connect(self, wal: bool = False) -> ContextManager[sqlite3.Connection]:
+        return connect(self.db_path, wal=wal)
+
+    def _init_db(self):
+        """Create the chunk and posting tables if they do not exist"""
+        with self._connect(wal=True) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS chunks (
+                    chunk_id TEXT PRIMARY KEY,
+                    file_hash TEXT NOT NULL,
+                    length INTEGER NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (term, chunk_id)
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_chunks_file_hash ON chunks (file_hash)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings (chunk_id)')
+
+    def add_chunks(self, ids: List[str], texts: List[str], file_hashes: List[str]) -> bool:
+        """Index chunks, replacing the postings of ids that are already indexed"""
+        if not ids:
+            return True
+        try:
+            chunk_rows = []
+            posting_rows = []
+            for chunk_id, text, file_hash in zip(ids, texts, file_hashes):
+                counts = Counter(tokenize(text))
+                chunk_rows.append((chunk_id, file_hash, sum(counts.values())))
+                posting_rows.extend((term, chunk_id, tf) for term, tf in counts.items())
+
+            with self._lock, self._connect() as conn:
+                conn.executemany('DELETE FROM postings WHERE chunk_id = ?', [(chunk_id,) for chunk_id in ids])
+                conn.executemany(
+                    'INSERT OR REPLACE INTO chunks (chunk_id, file_hash, length) VALUES (?, ?, ?)',
+                    chunk_rows
+                )
+                conn.executemany('INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)', posting_rows)
+            return True
+        except Exception as e:
+            print(f"Error updating lexical index: {str(e)}")
+            return False
+
+    def search(self, query: str, n_results: int = 5,
+               file_hashes: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """Return up to n_results (chunk_id, BM25 score) pairs, best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        try:
+            with self._connect() as conn:
+                total_chunks, avg_length = conn.execute(
+                    'SELECT COUNT(*), COALESCE(AVG(length), 0) FROM chunks'
+                ).fetchone()
+                if not total_chunks:
+                    return []
+
+                hash_clause = ''
+                hash_params = []
+                if file_hashes:
+                    hash_clause = f" AND c.file_hash IN ({','.join('?' * len(file_hashes))})"
+                    hash_params = list(file_hashes)
+
+                scores = {}
+                for term in terms:
+                    df = conn.execute('SELECT COUNT(*) FROM postings WHERE term = ?', (term,)).fetchone()[0]
+                    if not df:
+                        continue
+                    idf = math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))
+                    for chunk_id, tf, length in conn.execute(
+                        'SELECT p.chunk_id, p.tf, c.length FROM postings p '
+                        'JOIN chunks c ON c.chunk_id = p.chunk_id '
+                        'WHERE p.term = ?' + hash_clause,
+                        [term] + hash_params
+                    ):
+                        norm = self.k1 * (1 - self.b + self.b * length / (avg_length or 1))
+                        scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            return ranked[:n_results]
+        except Exception as e:
+            print(f"Error in lexical search: {str(e)}")
+            return []
+
+    def delete_document(self, file_hash: str) -> bool:
+        """Remove all chunks of a document from the index"""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    'DELETE FROM postings WHERE chunk_id IN (SELECT chunk_id FROM chunks WHERE file_hash = ?)',
+                    (file_hash,)
+                )
+                conn.execute('DELETE FROM chunks WHERE file_hash = ?', (file_hash,))
+            return True
+        except Exception as e:
+            print(f"Error deleting from lexical index: {str(e)}")
+            return False
+
+    def delete_chunks(self, ids: List[str]) -> bool:
+        """Remove individual chunks from the index"""
+        try:
+            rows = [(chunk_id,) for chunk_id in ids]
+            with self._lock, self._connect() as conn:
+                conn.executemany('DELETE FROM postings WHERE chunk_id = ?', rows)
+                conn.executemany('DELETE FROM chunks WHERE chunk_id = ?', rows)
+            return True
+        except Exception as e:
+            print(f"Error deleting from lexical index: {str(e)}")
+            return False
+
+    def clear(self) -> bool:
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM postings')
+                conn.execute('DELETE FROM chunks')
+            return True
+        except Exception as e:
+            print(f"Error clearing lexical index: {str(e)}")
+            return False
+
+    def count(self) -> int:
+        """Number of indexed chunks"""
+        try:
+            with self._connect() as conn:
+                return conn.execute('SELECT COUNT(*) FROM chunks').fetchone()[0]
+        except Exception as e:
+            print(f"Error reading lexical index: {str(e)}")
+            return 0
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists by summing 1 / (k + rank) per id, best first"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
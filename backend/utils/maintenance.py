@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Compaction and garbage collection for the vector store persistence directory
+
+Usage:
+    python -m utils.maintenance [--persist-directory ./chroma_db] [--dry-run]
+
+Vacuums every SQLite file in the directory and its tenant data
+directories (Chroma's chroma.sqlite3, document registries, lexical
+indexes and the tenant registry), removes HNSW segment
+directories that no segment in chroma.sqlite3 refers to any more, and
+prints the bytes reclaimed as JSON. Run it with the backend stopped: it
+deletes segment directories and vacuums files that a live
+PersistentClient holds open.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+# Chroma names segment directories after the segment UUID
+SEGMENT_DIR_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+
+def _path_size(path: str) -> int:
+    """Size in bytes of a file or of everything below a directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _sqlite_files(persist_directory: str) -> List[str]:
+    """SQLite files in the directory and in each tenant data directory below tenants/"""
+    directories = [persist_directory]
+    tenants_directory = os.path.join(persist_directory, 'tenants')
+    if os.path.isdir(tenants_directory):
+        directories.extend(os.path.join(tenants_directory, name) for name in sorted(os.listdir(tenants_directory)))
+    return [
+        os.path.join(directory, name)
+        for directory in directories if os.path.isdir(directory)
+        for name in sorted(os.listdir(directory))
+        if name.endswith('.sqlite3')
+    ]
+
+def find_orphaned_segments(persist_directory: str) -> List[str]:
+    """Segment directories not referenced by any segment in chroma.sqlite3"""
+    db_path = os.path.join(persist_directory, 'chroma.sqlite3')
+    if not os.path.exists(db_path):
+        return []
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+    try:
+        segment_ids = {row[0] for row in conn.execute('SELECT id FROM segments')}
+    finally:
+        conn.close()
+
+    return [
+        os.path.join(persist_directory, name)
+        for name in sorted(os.listdir(persist_directory))
+        if SEGMENT_DIR_PATTERN.match(name)
+        and os.path.isdir(os.path.join(persist_directory, name))
+        and name not in segment_ids
+    ]
+
+def vacuum_database(db_path: str, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Checkpoint the WAL and VACUUM one SQLite file. With dry_run, only
+    report the free pages a VACUUM would release.
+    """
+    files = [db_path, db_path + '-wal', db_path + '-shm']
+    before = sum(_path_size(path) for path in files if os.path.exists(path))
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if not dry_run:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    finally:
+        conn.close()
+    after = sum(_path_size(path) for path in files if os.path.exists(path))
+    return {
+        'file': db_path,
+        'bytes_before': before,
+        'bytes_after': after,
+        'free_bytes': page_size * free_pages
+    }
+
+def compact(persist_directory: Optional[str] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """Remove orphaned segment directories and vacuum SQLite files, reporting reclaimed bytes"""
+    persist_directory = persist_directory or './chroma_db'
+    started = time.perf_counter()
+    report = {
+        'persist_directory': persist_directory,
+        'dry_run': dry_run,
+        'started_at': datetime.now().isoformat(),
+        'orphaned_segments': [],
+        'databases': [],
+        'errors': []
+    }
+    if not os.path.isdir(persist_directory):
+        report['errors'].append(f"{persist_directory} does not exist")
+        return report
+
+    bytes_before = _path_size(persist_directory)
+
+    try:
+        for path in find_orphaned_segments(persist_directory):
+            report['orphaned_segments'].append({'path': path, 'bytes': _path_size(path)})
+            if not dry_run:
+                shutil.rmtree(path)
+    except Exception as e:
+        report['errors'].append(f"Segment cleanup failed: {str(e)}")
+
+    for db_path in _sqlite_files(persist_directory):
+        try:
+            report['databases'].append(vacuum_database(db_path, dry_run))
+        except Exception as e:
+            # e.g. "database is locked" while another process is writing
+            report['errors'].append(f"Vacuum of {os.path.relpath(db_path, persist_directory)} failed: {str(e)}")
+
+    bytes_after = _path_size(persist_directory)
+
+    if dry_run:
+        reclaimable = (sum(segment['bytes'] for segment in report['orphaned_segments'])
+                       + sum(database['free_bytes'] for database in report['databases']))
+        report['reclaimable_bytes'] = reclaimable
+    report['bytes_before'] = bytes_before
+    report['bytes_after'] = bytes_after
+    report['reclaimed_bytes'] = bytes_before - bytes_after
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compact the vector store persistence directory")
+    parser.add_argument('--persist-directory', default=None,
+                        help="Directory to compact (default: ./chroma_db)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Report what would be reclaimed without changing anything")
+    args = parser.parse_args(argv)
+
+    report = compact(args.persist_directory, args.dry_run)
+    print(json.dumps(report, indent=2))
+    return 1 if report['errors'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
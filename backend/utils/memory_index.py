@@ -0,0 +1,147 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows are left as they are)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+class MemoryIndex:
+    """
+    Exact nearest-neighbour index over the embeddings of recently queried
+    documents, held in one contiguous float32 matrix. Meant for the small
+    per-session corpora where a Chroma round-trip dominates query latency:
+    top-k is a single matrix-vector product plus argpartition.
+
+    Documents are loaded on first use through a loader callback and evicted
+    least-recently-used once the matrix exceeds max_chunks rows. Embeddings
+    and queries are normalised to unit length, so scores are cosine
+    similarities whatever the embedding model returns.
+    """
+
+    def __init__(self, loader, max_chunks: Optional[int] = None):
+        # loader(file_hash) -> (ids, documents, metadatas, embeddings)
+        self.loader = loader
+        self.max_chunks = int(max_chunks or os.getenv('VECTOR_MEMORY_MAX_CHUNKS', 50000))
+        self._documents = OrderedDict()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ranges = {}
+        self._lock = threading.RLock()
+        # Distance space of the Chroma collection, so distances are comparable
+        self.space = 'l2'
+
+    def search(self, query_embedding: List[float], n_results: int,
+               file_hashes: List[str]) -> List[Dict[str, Any]]:
+        """
+        Top-k chunks of the given documents by cosine similarity. Distances
+        are reported the way Chroma's collection space would for the same
+        unit-length embeddings: 2 - 2 * cosine for 'l2', 1 - cosine for
+        'cosine' and 'ip'.
+        """
+        file_hashes = list(dict.fromkeys(file_hashes))
+        with self._lock:
+            self._ensure_loaded(file_hashes)
+            ranges = [self._ranges[file_hash] for file_hash in file_hashes if file_hash in self._ranges]
+            if not ranges or self._matrix.shape[0] == 0:
+                return []
+
+            query = _normalise(np.asarray(query_embedding, dtype=np.float32))
+            if len(ranges) == len(self._ranges):
+                rows = None
+                scores = self._matrix @ query
+            else:
+                rows = np.concatenate([np.arange(start, end) for start, end in ranges])
+                scores = self._matrix[rows] @ query
+
+            k = min(n_results, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            scale = 2.0 if self.space == 'l2' else 1.0
+            results = []
+            for position in top:
+                row = int(position if rows is None else rows[position])
+                chunk_id, document, metadata = self._locate(row)
+                results.append({
+                    'document': document,
+                    'metadata': metadata,
+                    'distance': float(scale * (1.0 - scores[position])),
+                    'id': chunk_id
+                })
+            return results
+
+    def _locate(self, row: int) -> Tuple[str, str, Dict[str, Any]]:
+        """Map a matrix row back to its chunk id, text and metadata"""
+        for file_hash, (start, end) in self._ranges.items():
+            if start <= row < end:
+                entry = self._documents[file_hash]
+                i = row - start
+                return entry['ids'][i], entry['documents'][i], entry['metadatas'][i]
+        raise IndexError(row)
+
+    def _ensure_loaded(self, file_hashes: List[str]):
+        """Load missing documents, mark requested ones as recently used and rebuild if needed"""
+        changed = False
+        for file_hash in file_hashes:
+            if file_hash in self._documents:
+                self._documents.move_to_end(file_hash)
+                continue
+            ids, documents, metadatas, embeddings = self.loader(file_hash)
+            if not ids:
+                continue
+            self._documents[file_hash] = {
+                'ids': ids,
+                'documents': documents,
+                'metadatas': metadatas,
+                'embeddings': _normalise(np.asarray(embeddings, dtype=np.float32))
+            }
+            changed = True
+
+        requested = set(file_hashes)
+        total = sum(len(entry['ids']) for entry in self._documents.values())
+        for file_hash in list(self._documents):
+            if total <= self.max_chunks:
+                break
+            if file_hash in requested:
+                continue
+            total -= len(self._documents.pop(file_hash)['ids'])
+            changed = True
+
+        if changed:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Re-pack loaded documents into one contiguous matrix"""
+        self._ranges = {}
+        blocks = []
+        offset = 0
+        for file_hash, entry in self._documents.items():
+            rows = len(entry['ids'])
+            self._ranges[file_hash] = (offset, offset + rows)
+            blocks.append(entry['embeddings'])
+            offset += rows
+        self._matrix = np.ascontiguousarray(np.vstack(blocks)) if blocks else np.zeros((0, 0), dtype=np.float32)
+
+    def invalidate(self, file_hash: str):
+        """Drop a document, e.g. after its chunks changed in the collection"""
+        with self._lock:
+            if self._documents.pop(file_hash, None) is not None:
+                self._rebuild()
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self._rebuild()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get loaded document and chunk counts and matrix size"""
+        with self._lock:
+            return {
+                'documents': len(self._documents),
+                'chunks': int(self._matrix.shape[0]),
+                'max_chunks': self.max_chunks,
+                'matrix_bytes': int(self._matrix.nbytes)
+            }
@@ -0,0 +1,131 @@
+import os
+import pickle
+import sqlite3
+import threading
+from datetime import datetime
+from typing import ContextManager, Dict, Any, Optional
+from utils.sqlite_db import connect, evict_lru
+
+class ParseCache:
+    """Persistent, size-bounded LRU cache of parsed PDF results keyed by file hash"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv('PDF_CACHE_DIR', './pdf_cache')
+        self.max_bytes = int(max_bytes or os.getenv('PDF_PARSE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+        self.db_path = os.path.join(self.cache_dir, 'parse_cache.sqlite3')
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._init_db()
+
+    def _connect(self, wal: bool = False) -> ContextManager[sqlite3.Connection]:
+        return connect(self.db_path, wal=wal)
+
+    def _init_db(self):
+        """Create the cache table if it does not exist"""
+        with self._connect(wal=True) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS parse_cache (
+                    file_hash TEXT PRIMARY KEY,
+                    schema_version INTEGER NOT NULL,
+                    payload BLOB NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_parse_cache_access ON parse_cache (last_access)')
+
+    def get(self, file_hash: str, schema_version: int) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached parse result for a file hash, or None on a miss.
+        Entries written by an older parser schema are treated as misses.
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    'SELECT schema_version, payload FROM parse_cache WHERE file_hash = ?',
+                    (file_hash,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[0] != schema_version:
+                    conn.execute('DELETE FROM parse_cache WHERE file_hash = ?', (file_hash,))
+                    return None
+                conn.execute(
+                    'UPDATE parse_cache SET last_access = ? WHERE file_hash = ?',
+                    (datetime.now().timestamp(), file_hash)
+                )
+            return pickle.loads(row[1])
+        except Exception as e:
+            print(f"Error reading parse cache: {e}")
+            return None
+
+    def put(self, file_hash: str, schema_version: int, result: Dict[str, Any]) -> bool:
+        """Store a parse result and evict least recently used entries over the size budget"""
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(payload) > self.max_bytes:
+                return False
+
+            with self._lock, self._connect() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO parse_cache
+                    (file_hash, schema_version, payload, size_bytes, created_at, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    file_hash,
+                    schema_version,
+                    payload,
+                    len(payload),
+                    datetime.now().isoformat(),
+                    datetime.now().timestamp()
+                ))
+                self._evict(conn)
+            return True
+        except Exception as e:
+            print(f"Error writing parse cache: {e}")
+            return False
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        evict_lru(conn, 'parse_cache', 'file_hash', 'size_bytes', self.max_bytes)
+
+    def delete(self, file_hash: str) -> bool:
+        """Remove a single entry"""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM parse_cache WHERE file_hash = ?', (file_hash,))
+            return True
+        except Exception as e:
+            print(f"Error deleting parse cache entry: {e}")
+            return False
+
+    def clear(self) -> bool:
+        """Remove all entries"""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM parse_cache')
+            return True
+        except Exception as e:
+            print(f"Error clearing parse cache: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get entry count and size of the cache"""
+        try:
+            with self._connect() as conn:
+                entries, total = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM parse_cache'
+                ).fetchone()
+            return {
+                'entries': entries,
+                'size_bytes': total,
+                'max_bytes': self.max_bytes,
+                'db_path': self.db_path
+            }
+        except Exception as e:
+            print(f"Error getting parse cache stats: {e}")
+            return {}
+
+# Global parse cache instance
+parse_cache = ParseCache()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Offline rebuild of a vector store collection with new ANN parameters
+
+Usage:
+    python -m utils.rebuild_index [--persist-directory ./chroma_db] [--tenant ID]
+                                  [--space l2|cosine|ip] [--M 16]
+                                  [--ef-construction 100] [--ef-search 10]
+
+Copies the stored embeddings into a collection created with the given
+HNSW parameters and swaps it in; nothing is re-embedded. Parameters not
+given keep the collection's current values. Stop the backend first:
+writes made during the rebuild may be lost. Afterwards set the matching
+VECTOR_HNSW_* variables so new collections are created the same way.
+"""
+
+import sys
+import json
+import argparse
+from typing import List, Optional
+
+from utils.vectorstore import VectorStore
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Rebuild a vector store collection with new ANN parameters")
+    parser.add_argument('--persist-directory', default='./chroma_db')
+    parser.add_argument('--tenant', default=None, help="Rebuild this tenant's collection instead of the shared one")
+    parser.add_argument('--space', choices=['l2', 'cosine', 'ip'])
+    parser.add_argument('--M', type=int, dest='M')
+    parser.add_argument('--ef-construction', type=int, dest='ef_construction')
+    parser.add_argument('--ef-search', type=int, dest='ef_search')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    store = VectorStore(args.persist_directory, tenant=args.tenant)
+    params = {key: value for key, value in store.get_index_params().items() if value is not None}
+    for key in ('space', 'M', 'ef_construction', 'ef_search'):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    report = store.rebuild_collection(params, batch_size=args.batch_size)
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
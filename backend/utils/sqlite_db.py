@@ -0,0 +1,41 @@
+import sqlite3
+from contextlib import closing, contextmanager
+from typing import Iterator, List, Optional
+
+@contextmanager
+def connect(db_path: str, row_factory: Optional[type] = None, wal: bool = False) -> Iterator[sqlite3.Connection]:
+    """
+    Connection for one unit of work. The block runs in a transaction that
+    commits on success and rolls back on error, and the connection is
+    closed afterwards (sqlite3's own context manager only commits). wal
+    switches the database to write-ahead logging, for schema setup.
+    """
+    with closing(sqlite3.connect(db_path, timeout=30)) as conn:
+        if row_factory is not None:
+            conn.row_factory = row_factory
+        if wal:
+            conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            yield conn
+
+def evict_lru(conn: sqlite3.Connection, table: str, key_column: str, size_expr: str, max_size: int) -> List:
+    """
+    Delete the least recently used rows of table (by its last_access
+    column) until the sum of size_expr over the remaining rows fits in
+    max_size. Returns the keys of the deleted rows.
+    """
+    total = conn.execute(f'SELECT COALESCE(SUM({size_expr}), 0) FROM {table}').fetchone()[0]
+    if total <= max_size:
+        return []
+
+    evicted = []
+    for key, size in conn.execute(
+        f'SELECT {key_column}, {size_expr} FROM {table} ORDER BY last_access ASC'
+    ).fetchall():
+        if total <= max_size:
+            break
+        evicted.append((key,))
+        total -= size
+
+    conn.executemany(f'DELETE FROM {table} WHERE {key_column} = ?', evicted)
+    return [key for key, in evicted]
@@ -0,0 +1,215 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, ContextManager, List, Optional
+from utils.sqlite_db import connect, evict_lru
+
+class SummaryCache:
+    """
+    Persistent cache of section summaries keyed by SHA-256 of (namespace,
+    section text), so re-summarising a document only calls the model for
+    sections it has not seen. The namespace separates models and prompts.
+    Entries are linked to the documents they were built from, so they can
+    be dropped with those documents. At most max_entries are kept; the
+    least recently used are evicted first.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv('PDF_CACHE_DIR', './pdf_cache')
+        self.max_entries = int(max_entries or os.getenv('PDF_SUMMARY_CACHE_MAX_ENTRIES', 10000))
+        self.db_path = os.path.join(self.cache_dir, 'summary_cache.sqlite3')
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._init_db()
+
+    def _connect(self, wal: bool = False) -> ContextManager[sqlite3.Connection]:
+        return connect(self.db_path, wal=wal)
+
+    def _init_db(self):
+        """Create the cache table if it does not exist"""
+        with self._connect(wal=True) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS summary_cache (
+                    key TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_access REAL NOT NULL DEFAULT 0
+                )
+            ''')
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(summary_cache)')]
+            if 'last_access' not in columns:
+                conn.execute('ALTER TABLE summary_cache ADD COLUMN last_access REAL NOT NULL DEFAULT 0')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_summary_cache_access ON summary_cache (last_access)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS summary_documents (
+                    key TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    PRIMARY KEY (key, file_hash)
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_summary_documents_hash ON summary_documents (file_hash)')
+
+    @staticmethod
+    def make_key(namespace: str, text: str) -> str:
+        """Cache key for a section summarised under a given namespace"""
+        return hashlib.sha256(f"{namespace}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT summary FROM summary_cache WHERE key = ?', (key,)).fetchone()
+                if row:
+                    conn.execute('UPDATE summary_cache SET last_access = ? WHERE key = ?', (time.time(), key))
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Error reading summary cache: {str(e)}")
+            return None
+
+    def put(self, key: str, summary: str, file_hashes: Optional[List[str]] = None):
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO summary_cache (key, summary, created_at, last_access) VALUES (?, ?, ?, ?)',
+                    (key, summary, datetime.now().isoformat(), time.time())
+                )
+                conn.executemany(
+                    'INSERT OR IGNORE INTO summary_documents (key, file_hash) VALUES (?, ?)',
+                    [(key, file_hash) for file_hash in file_hashes or []]
+                )
+                self._evict(conn)
+        except Exception as e:
+            print(f"Error writing summary cache: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries, and their document links, beyond max_entries"""
+        evicted = evict_lru(conn, 'summary_cache', 'key', '1', self.max_entries)
+        conn.executemany('DELETE FROM summary_documents WHERE key = ?', [(key,) for key in evicted])
+
+    def delete_documents(self, file_hashes: List[str]) -> bool:
+        """Drop every summary built from any of the given documents"""
+        try:
+            rows = [(file_hash,) for file_hash in file_hashes]
+            with self._lock, self._connect() as conn:
+                conn.executemany('''
+                    DELETE FROM summary_cache WHERE key IN (
+                        SELECT key FROM summary_documents WHERE file_hash = ?
+                    )
+                ''', rows)
+                conn.execute('DELETE FROM summary_documents WHERE key NOT IN (SELECT key FROM summary_cache)')
+            return True
+        except Exception as e:
+            print(f"Error deleting from summary cache: {str(e)}")
+            return False
+
+    def clear(self) -> bool:
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute('DELETE FROM summary_cache')
+                conn.execute('DELETE FROM summary_documents')
+            return True
+        except Exception as e:
+            print(f"Error clearing summary cache: {str(e)}")
+            return False
+
+def group_sections(sections: List[str], max_chars: int) -> List[str]:
+    """
+    Pack consecutive sections (e.g. pages) into groups of at most
+    max_chars, splitting any single section that is longer than that
+    """
+    groups = []
+    current = ""
+    for section in sections:
+        for start in range(0, max(len(section), 1), max_chars):
+            piece = section[start:start + max_chars]
+            if not piece.strip():
+                continue
+            if current and len(current) + len(piece) + 2 > max_chars:
+                groups.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        groups.append(current)
+    return groups
+
+class MapReduceSummarizer:
+    """
+    Hierarchical summariser for long documents: page groups are
+    summarised concurrently on a bounded thread pool (map), partial
+    summaries are merged group-wise until they fit in one call, then
+    merged once more into the final summary (reduce). No merge input is
+    longer than group_chars: partial summaries longer than half of it are
+    truncated so that every merge combines at least two of them.
+    """
+
+    def __init__(self, cache: Optional[SummaryCache] = None, workers: Optional[int] = None,
+                 group_chars: Optional[int] = None):
+        self.cache = cache or SummaryCache()
+        self.workers = int(workers or os.getenv('PDF_SUMMARY_WORKERS', 4))
+        self.group_chars = int(group_chars or os.getenv('PDF_SUMMARY_GROUP_CHARS', 12000))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='summary')
+
+    def summarize(self, sections: List[str], summarize_section: Callable[[str], str],
+                  merge: Callable[[str], str], namespace: str,
+                  file_hashes: Optional[List[str]] = None,
+                  merge_namespace: Optional[str] = None) -> str:
+        """
+        Summarise sections with summarize_section and combine the
+        blank-line separated partial summaries with merge. Both are cached
+        per input under namespace and linked to file_hashes, the documents
+        the sections come from. Merges are cached under merge_namespace when
+        given, for merge prompts that depend on more than the summaries
+        (e.g. the document title).
+        """
+        merge_namespace = merge_namespace or f"{namespace}:merge"
+        groups = group_sections(sections, self.group_chars)
+        if not groups:
+            return ""
+        if len(groups) == 1:
+            return self._cached(f"{namespace}:section", groups[0], summarize_section, file_hashes)
+
+        summaries = self._map(groups, summarize_section, f"{namespace}:section", file_hashes)
+        # Merge partial summaries level by level until one merge call can
+        # take them all; each level at least halves their number
+        while len(summaries) > 1 and len("\n\n".join(summaries)) > self.group_chars:
+            batches = self._batch(summaries)
+            summaries = self._map(["\n\n".join(batch) for batch in batches], merge, merge_namespace, file_hashes)
+        return self._cached(merge_namespace, "\n\n".join(summaries)[:self.group_chars], merge, file_hashes)
+
+    def _map(self, texts: List[str], summarize: Callable[[str], str], namespace: str,
+             file_hashes: Optional[List[str]] = None) -> List[str]:
+        futures = [self._executor.submit(self._cached, namespace, text, summarize, file_hashes) for text in texts]
+        return [future.result() for future in futures]
+
+    def _batch(self, summaries: List[str]) -> List[List[str]]:
+        """
+        Pack consecutive summaries into merge inputs of at most group_chars
+        (blank-line separators included), truncating any summary longer
+        than half of that so that every batch but the last takes two or more
+        """
+        limit = max((self.group_chars - 2) // 2, 1)
+        batches = [[]]
+        size = 0
+        for summary in summaries:
+            summary = summary[:limit]
+            if batches[-1] and size + 2 + len(summary) > self.group_chars:
+                batches.append([])
+                size = 0
+            size += len(summary) + (2 if batches[-1] else 0)
+            batches[-1].append(summary)
+        return batches
+
+    def _cached(self, namespace: str, text: str, summarize: Callable[[str], str],
+                file_hashes: Optional[List[str]] = None) -> str:
+        key = SummaryCache.make_key(namespace, text)
+        summary = self.cache.get(key)
+        if summary is None:
+            summary = summarize(text)
+            self.cache.put(key, summary, file_hashes)
+        return summary
+
+# Global summarizer instance
+summarizer = MapReduceSummarizer()
@@ -0,0 +1,168 @@
+import os
+import re
+import json
+import shutil
+import threading
+from typing import List, Dict, Any, Optional
+import numpy as np
+import pandas as pd
+from utils.query_cache import TTLCache
+from utils.text_store import FILE_HASH_PATTERN
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Characters stripped from cells before numeric coercion ("$1,200", "15 %")
+NUMERIC_NOISE_PATTERN = re.compile(r'[\s,$€£%]')
+# Accounting negatives: "(1,200)" -> "-1200"
+ACCOUNTING_NEGATIVE_PATTERN = re.compile(r'^\((.*)\)$')
+
+def coerce_numeric_columns(frame: pd.DataFrame, min_ratio: float = 0.8) -> pd.DataFrame:
+    """
+    Convert text columns to float where at least min_ratio of the
+    non-empty cells parse as numbers once currency symbols, thousands
+    separators and percent signs are stripped
+    """
+    for col in frame.columns:
+        if pd.api.types.is_numeric_dtype(frame[col]):
+            continue
+        values = frame[col].where(frame[col].notna(), '').astype(str).str.strip()
+        present = values != ''
+        if not present.any():
+            continue
+        cleaned = (values.str.replace(NUMERIC_NOISE_PATTERN, '', regex=True)
+                         .str.replace(ACCOUNTING_NEGATIVE_PATTERN, r'-\1', regex=True))
+        numbers = pd.to_numeric(cleaned, errors='coerce')
+        if numbers[present].notna().mean() >= min_ratio:
+            frame[col] = numbers.astype(float)
+    return frame
+
+def frame_to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-safe row records, with missing cells as None"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+class TableStore:
+    """
+    Tables extracted from each document, written once per file hash as
+    typed columnar frames (Parquet when pyarrow is installed, otherwise
+    pickled DataFrames) plus a JSON manifest of table metadata. Frames
+    are loaded lazily and kept in a small LRU, so the document cache only
+    holds the metadata.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_loaded: Optional[int] = None):
+        self.directory = directory or os.getenv('PDF_TABLE_STORE_DIR', os.path.join('./chroma_db', 'tables'))
+        self.extension = '.parquet' if PARQUET_AVAILABLE else '.pkl'
+        self._frames = TTLCache(int(max_loaded or os.getenv('PDF_TABLE_CACHE_ENTRIES', 64)), float('inf'))
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _document_directory(self, file_hash: str) -> str:
+        if not FILE_HASH_PATTERN.match(file_hash):
+            raise ValueError(f"Invalid file hash: {file_hash}")
+        return os.path.join(self.directory, file_hash)
+
+    def put(self, file_hash: str, tables: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store a document's tables (each with a 'frame' DataFrame) and
+        return their metadata: table_id, page_number, table_index,
+        columns, numeric_columns and shape
+        """
+        try:
+            directory = self._document_directory(file_hash)
+            manifest_path = os.path.join(directory, 'tables.json')
+            if os.path.exists(manifest_path):
+                return self.get_tables(file_hash)
+
+            tmp_directory = directory + '.tmp'
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+            os.makedirs(tmp_directory)
+
+            manifest = []
+            for table in tables:
+                frame = table.get('frame')
+                if frame is None or frame.empty:
+                    continue
+                table_id = f"{table['page_number']}_{table['table_index']}"
+                path = os.path.join(tmp_directory, table_id + self.extension)
+                if PARQUET_AVAILABLE:
+                    frame.to_parquet(path, index=False)
+                else:
+                    frame.to_pickle(path)
+                manifest.append({
+                    'file_hash': file_hash,
+                    'table_id': table_id,
+                    'page_number': table['page_number'],
+                    'table_index': table['table_index'],
+                    'columns': [str(col) for col in frame.columns],
+                    'numeric_columns': [str(col) for col in frame.select_dtypes(include=[np.number]).columns],
+                    'shape': list(frame.shape)
+                })
+
+            with open(os.path.join(tmp_directory, 'tables.json'), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            with self._lock:
+                # The manifest inside the renamed directory marks a complete entry
+                shutil.rmtree(directory, ignore_errors=True)
+                os.replace(tmp_directory, directory)
+            return manifest
+        except Exception as e:
+            print(f"Error writing table store: {str(e)}")
+            return []
+
+    def get_tables(self, file_hash: str) -> List[Dict[str, Any]]:
+        """Metadata of a document's stored tables"""
+        try:
+            manifest_path = os.path.join(self._document_directory(file_hash), 'tables.json')
+            if not os.path.exists(manifest_path):
+                return []
+            with open(manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading table store: {str(e)}")
+            return []
+
+    def load(self, file_hash: str, table_id: str) -> Optional[pd.DataFrame]:
+        """A stored table as a DataFrame, or None if it does not exist"""
+        key = (file_hash, table_id)
+        frame = self._frames.get(key)
+        if frame is not None:
+            return frame
+        try:
+            directory = self._document_directory(file_hash)
+            for extension in ('.parquet', '.pkl'):
+                path = os.path.join(directory, table_id + extension)
+                if os.path.exists(path):
+                    frame = pd.read_parquet(path) if extension == '.parquet' else pd.read_pickle(path)
+                    self._frames.put(key, frame)
+                    return frame
+            return None
+        except Exception as e:
+            print(f"Error loading table {table_id} of {file_hash}: {str(e)}")
+            return None
+
+    def delete(self, file_hash: str) -> bool:
+        try:
+            shutil.rmtree(self._document_directory(file_hash), ignore_errors=True)
+            self._frames.clear()
+            return True
+        except Exception as e:
+            print(f"Error deleting from table store: {str(e)}")
+            return False
+
+    def clear(self) -> bool:
+        try:
+            with self._lock:
+                for name in os.listdir(self.directory):
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            self._frames.clear()
+            return True
+        except Exception as e:
+            print(f"Error clearing table store: {str(e)}")
+            return False
+
+# Global table store instance
+table_store = TableStore()
@@ -0,0 +1,251 @@
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import ContextManager, List, Dict, Any, Optional
+from utils.sqlite_db import connect
+from utils import vectorstore
+from utils.vectorstore import VectorStore
+from utils.text_store import text_store
+from utils.table_store import table_store
+from utils.entity_index import entity_index
+from utils.document_cache import document_cache
+from utils.summarizer import summarizer
+
+class TenantManager:
+    """
+    Per-tenant and per-session VectorStore collections, so a search only
+    touches the caller's corpus. A shared SQLite registry records each
+    tenant's collection, kind ('tenant' or 'session'), last access and the
+    file hashes it holds. Session collections idle for longer than
+    SESSION_COLLECTION_TTL seconds are dropped.
+    """
+
+    # Minimum seconds between idle-session sweeps triggered by get_store
+    EXPIRY_CHECK_INTERVAL = 300
+
+    def __init__(self, default_store: VectorStore = None, session_ttl: Optional[float] = None,
+                 persist_directory: str = "./chroma_db"):
+        self._default_store = default_store
+        self.persist_directory = default_store.persist_directory if default_store else persist_directory
+        self.session_ttl = float(session_ttl or os.getenv('SESSION_COLLECTION_TTL', 24 * 3600))
+        self.db_path = os.path.join(self.persist_directory, 'tenants.sqlite3')
+        self._stores = {}
+        self._lock = threading.RLock()
+        self._last_expiry_check = 0.0
+        os.makedirs(self.persist_directory, exist_ok=True)
+        self._init_db()
+
+    @property
+    def default_store(self) -> VectorStore:
+        """The shared collection's store, the global one unless given; opened on first use"""
+        if self._default_store is None:
+            self._default_store = vectorstore.vector_store
+        return self._default_store
+
+    def _connect(self, wal: bool = False) -> ContextManager[sqlite3.Connection]:
+        return connect(self.db_path, sqlite3.Row, wal=wal)
+
+    def _init_db(self):
+        """Create the tenants and tenant_documents tables if they do not exist"""
+        with self._connect(wal=True) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS tenants (
+                    tenant_id TEXT PRIMARY KEY,
+                    collection_name TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS tenant_documents (
+                    tenant_id TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    PRIMARY KEY (tenant_id, file_hash)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_tenant_documents_hash ON tenant_documents (file_hash)')
+
+    def get_store(self, tenant_id: Optional[str] = None, kind: str = 'tenant') -> VectorStore:
+        """VectorStore for a tenant, created on first use; the shared store when tenant_id is None"""
+        if not tenant_id:
+            return self.default_store
+
+        self._maybe_expire_idle()
+        with self._lock:
+            store = self._stores.get(tenant_id)
+            if store is None:
+                store = VectorStore(
+                    self.persist_directory,
+                    embedder=self.default_store.embedder,
+                    cache=self.default_store.embedding_cache,
+                    tenant=tenant_id,
+                    client=self.default_store.client
+                )
+                self._stores[tenant_id] = store
+            with self._connect() as conn:
+                conn.execute('''
+                    INSERT INTO tenants (tenant_id, collection_name, kind, created_at, last_access)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (tenant_id) DO UPDATE SET last_access = excluded.last_access
+                ''', (tenant_id, store.collection_name, kind, datetime.now().isoformat(), time.time()))
+            return store
+
+    def record_documents(self, tenant_id: Optional[str], file_hashes: List[str]):
+        """Remember which tenant collection holds each file hash"""
+        if not tenant_id or not file_hashes:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    'INSERT OR IGNORE INTO tenant_documents (tenant_id, file_hash) VALUES (?, ?)',
+                    [(tenant_id, file_hash) for file_hash in file_hashes]
+                )
+        except Exception as e:
+            print(f"Error recording tenant documents: {str(e)}")
+
+    def forget_documents(self, tenant_id: Optional[str], file_hashes: List[str]):
+        if not tenant_id or not file_hashes:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    'DELETE FROM tenant_documents WHERE tenant_id = ? AND file_hash = ?',
+                    [(tenant_id, file_hash) for file_hash in file_hashes]
+                )
+        except Exception as e:
+            print(f"Error forgetting tenant documents: {str(e)}")
+
+    def store_for_document(self, file_hash: str, tenant_id: Optional[str]) -> VectorStore:
+        """
+        Store to read a file hash from on behalf of a tenant: the tenant's
+        own store, or the shared store when tenant_id is None. Other
+        tenants' stores are never used; check has_document for access.
+        """
+        return self.get_store(tenant_id) if tenant_id else self.default_store
+
+    def has_document(self, file_hash: str, tenant_id: Optional[str]) -> bool:
+        """Whether the tenant (the shared collection when tenant_id is None) holds a file hash"""
+        if not tenant_id:
+            return self.default_store.is_indexed(file_hash)
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT 1 FROM tenant_documents WHERE tenant_id = ? AND file_hash = ?',
+                    (tenant_id, file_hash)
+                ).fetchone()
+            return row is not None
+        except Exception as e:
+            print(f"Error reading tenant documents: {str(e)}")
+            return False
+
+    def document_hashes(self, tenant_id: Optional[str]) -> List[str]:
+        """File hashes the tenant (the shared collection when tenant_id is None) holds"""
+        if not tenant_id:
+            return [document['file_hash'] for document in self.default_store.list_documents()]
+        try:
+            with self._connect() as conn:
+                return [row['file_hash'] for row in conn.execute(
+                    'SELECT file_hash FROM tenant_documents WHERE tenant_id = ?', (tenant_id,)
+                )]
+        except Exception as e:
+            print(f"Error reading tenant documents: {str(e)}")
+            return []
+
+    def is_referenced(self, file_hash: str) -> bool:
+        """Whether the shared collection or any tenant still holds a file hash"""
+        if self.default_store.is_indexed(file_hash):
+            return True
+        with self._connect() as conn:
+            row = conn.execute('SELECT 1 FROM tenant_documents WHERE file_hash = ? LIMIT 1', (file_hash,)).fetchone()
+        return row is not None
+
+    def purge_unreferenced(self, file_hashes: List[str]) -> List[str]:
+        """
+        Delete the per-document data (full text, tables, document cache
+        entry and cached summaries) of the given file hashes that no
+        collection holds any more. These stores are keyed by file hash
+        alone and shared by every holder, so they are only removed with
+        the last one. Returns the purged hashes.
+        """
+        purged = []
+        for file_hash in dict.fromkeys(file_hashes):
+            try:
+                if self.is_referenced(file_hash):
+                    continue
+                text_store.delete(file_hash)
+                table_store.delete(file_hash)
+                document_cache.pop(file_hash, None)
+                purged.append(file_hash)
+            except Exception as e:
+                print(f"Error purging document {file_hash}: {str(e)}")
+        if purged:
+            summarizer.cache.delete_documents(purged)
+        return purged
+
+    def drop_tenant(self, tenant_id: str) -> bool:
+        """
+        Delete a tenant's collection, data files, entity index entries and
+        registry rows, then the per-document data of files no other holder
+        references
+        """
+        with self._lock:
+            file_hashes = self.document_hashes(tenant_id)
+            store = self._stores.pop(tenant_id, None) or VectorStore(
+                self.persist_directory,
+                embedder=self.default_store.embedder,
+                cache=self.default_store.embedding_cache,
+                tenant=tenant_id,
+                client=self.default_store.client
+            )
+            dropped = store.drop()
+            entity_index.clear(tenant_id)
+            with self._connect() as conn:
+                conn.execute('DELETE FROM tenant_documents WHERE tenant_id = ?', (tenant_id,))
+                conn.execute('DELETE FROM tenants WHERE tenant_id = ?', (tenant_id,))
+        self.purge_unreferenced(file_hashes)
+        return dropped
+
+    def expire_idle(self) -> List[str]:
+        """Drop session collections idle for longer than session_ttl; returns the dropped tenant ids"""
+        cutoff = time.time() - self.session_ttl
+        with self._connect() as conn:
+            expired = [row['tenant_id'] for row in conn.execute(
+                "SELECT tenant_id FROM tenants WHERE kind = 'session' AND last_access < ?", (cutoff,)
+            )]
+        for tenant_id in expired:
+            self.drop_tenant(tenant_id)
+        return expired
+
+    def _maybe_expire_idle(self):
+        now = time.time()
+        if now - self._last_expiry_check < self.EXPIRY_CHECK_INTERVAL:
+            return
+        self._last_expiry_check = now
+        try:
+            expired = self.expire_idle()
+            if expired:
+                print(f"Dropped {len(expired)} idle session collection(s)")
+        except Exception as e:
+            print(f"Error expiring session collections: {str(e)}")
+
+    def list_tenants(self) -> List[Dict[str, Any]]:
+        """Registered tenants with their collection, kind, last access and document count"""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute('''
+                    SELECT t.tenant_id, t.collection_name, t.kind, t.created_at, t.last_access,
+                           COUNT(d.file_hash) AS documents
+                    FROM tenants t LEFT JOIN tenant_documents d ON d.tenant_id = t.tenant_id
+                    GROUP BY t.tenant_id
+                    ORDER BY t.last_access DESC
+                ''').fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"Error listing tenants: {str(e)}")
+            return []
+
+# Global tenant manager instance
+tenant_manager = TenantManager()
@@ -0,0 +1,135 @@
+import os
+import re
+import json
+import mmap
+import threading
+from typing import List, Dict, Any, Optional
+
+FILE_HASH_PATTERN = re.compile(r'^[0-9a-f]{16,128}$')
+
+class TextStore:
+    """
+    Parsed full text of each document, written once per file hash as a
+    UTF-8 file plus a small JSON index of per-page byte ranges. Reads
+    memory-map the text file, so the whole text or a single page comes
+    back without touching Chroma or re-joining overlapping chunks.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv('PDF_TEXT_STORE_DIR', os.path.join('./chroma_db', 'texts'))
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, file_hash: str):
+        if not FILE_HASH_PATTERN.match(file_hash):
+            raise ValueError(f"Invalid file hash: {file_hash}")
+        base = os.path.join(self.directory, file_hash)
+        return base + '.txt', base + '.json'
+
+    def put(self, file_hash: str, text: str, page_offsets: List[Dict[str, Any]]) -> bool:
+        """
+        Store a document's text. page_offsets are character ranges
+        ({'page_number', 'start', 'end'}); they are converted to byte ranges
+        so pages can be sliced from the mapped file directly.
+        """
+        try:
+            text_path, index_path = self._paths(file_hash)
+            if os.path.exists(index_path):
+                return True
+
+            encoded = text.encode('utf-8')
+            pages = []
+            byte_offset = 0
+            char_offset = 0
+            for page in sorted(page_offsets, key=lambda page: page['start']):
+                byte_offset += len(text[char_offset:page['start']].encode('utf-8'))
+                page_bytes = len(text[page['start']:page['end']].encode('utf-8'))
+                pages.append({
+                    'page_number': page['page_number'],
+                    'start': byte_offset,
+                    'end': byte_offset + page_bytes
+                })
+                byte_offset += page_bytes
+                char_offset = page['end']
+
+            with self._lock:
+                # Text first, index last: an index file marks a complete entry
+                for path, data in ((text_path, encoded),
+                                   (index_path, json.dumps({'length': len(text), 'pages': pages}).encode('utf-8'))):
+                    tmp_path = path + '.tmp'
+                    with open(tmp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"Error writing text store: {str(e)}")
+            return False
+
+    def has(self, file_hash: str) -> bool:
+        try:
+            return os.path.exists(self._paths(file_hash)[1])
+        except ValueError:
+            return False
+
+    def get_text(self, file_hash: str) -> Optional[str]:
+        """Full text of a document, or None if it is not stored"""
+        if not self.has(file_hash):
+            return None
+        try:
+            return self._read(file_hash, 0, None)
+        except Exception as e:
+            print(f"Error reading text store: {str(e)}")
+            return None
+
+    def get_pages(self, file_hash: str, page_numbers: List[int]) -> Optional[Dict[int, str]]:
+        """Text of the requested pages (page number -> text), or None if the document is not stored"""
+        if not self.has(file_hash):
+            return None
+        try:
+            wanted = set(page_numbers)
+            return {
+                page['page_number']: self._read(file_hash, page['start'], page['end'])
+                for page in self.get_page_offsets(file_hash)
+                if page['page_number'] in wanted
+            }
+        except Exception as e:
+            print(f"Error reading text store: {str(e)}")
+            return None
+
+    def get_page_offsets(self, file_hash: str) -> List[Dict[str, int]]:
+        """Byte ranges of each page within the stored text"""
+        with open(self._paths(file_hash)[1], encoding='utf-8') as f:
+            return json.load(f)['pages']
+
+    def _read(self, file_hash: str, start: int, end: Optional[int]) -> str:
+        text_path = self._paths(file_hash)[0]
+        with open(text_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[start:end].decode('utf-8')
+
+    def delete(self, file_hash: str) -> bool:
+        try:
+            # Index first, so a half-deleted entry never looks complete
+            for path in reversed(self._paths(file_hash)):
+                if os.path.exists(path):
+                    os.remove(path)
+            return True
+        except Exception as e:
+            print(f"Error deleting from text store: {str(e)}")
+            return False
+
+    def clear(self) -> bool:
+        try:
+            with self._lock:
+                for name in os.listdir(self.directory):
+                    if name.endswith(('.txt', '.json')):
+                        os.remove(os.path.join(self.directory, name))
+            return True
+        except Exception as e:
+            print(f"Error clearing text store: {str(e)}")
+            return False
+
+# Global text store instance
+text_store = TextStore()
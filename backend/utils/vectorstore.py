@@ -1,142 +1,646 @@
 import os
+import re
+import shutil
+import threading
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import bisect
 import json
 import hashlib
+import time
 from datetime import datetime
 import numpy as np
+from utils.document_registry import DocumentRegistry
+from utils.chunking import ChunkStream, chunk_spans, legacy_chunk_spans
+from utils.embeddings import embedding_backend
+from utils.embedding_cache import EmbeddingCache, embedding_cache
+from utils.query_cache import TTLCache
+from utils.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from utils.memory_index import MemoryIndex
+
+# Candidates taken from each ranking per requested hybrid search result
+HYBRID_CANDIDATE_FACTOR = int(os.getenv('HYBRID_CANDIDATE_FACTOR', 4))
+
+# VectorStore ANN parameter names and the Chroma collection metadata keys they map to
+HNSW_PARAM_KEYS = {
+    'space': 'hnsw:space',
+    'M': 'hnsw:M',
+    'ef_construction': 'hnsw:construction_ef',
+    'ef_search': 'hnsw:search_ef'
+}
+HNSW_SPACES = ('l2', 'cosine', 'ip')
+# Values Chroma uses for ANN parameters missing from a collection's metadata
+CHROMA_HNSW_DEFAULTS = {'space': 'l2', 'M': 16, 'ef_construction': 100, 'ef_search': 10}
+
+def default_hnsw_params() -> Dict[str, Any]:
+    """ANN parameters from VECTOR_HNSW_* environment variables; unset ones keep Chroma's defaults"""
+    params = {}
+    if os.getenv('VECTOR_HNSW_SPACE'):
+        params['space'] = os.getenv('VECTOR_HNSW_SPACE')
+    for key, env in (('M', 'VECTOR_HNSW_M'),
+                     ('ef_construction', 'VECTOR_HNSW_EF_CONSTRUCTION'),
+                     ('ef_search', 'VECTOR_HNSW_EF_SEARCH')):
+        if os.getenv(env):
+            params[key] = int(os.getenv(env))
+    return params
+
+def validate_hnsw_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Check ANN parameter names and values, raising ValueError on anything Chroma would reject"""
+    for key, value in params.items():
+        if key not in HNSW_PARAM_KEYS:
+            raise ValueError(f"Unknown ANN parameter: {key}")
+        if key == 'space':
+            if value not in HNSW_SPACES:
+                raise ValueError(f"space must be one of {', '.join(HNSW_SPACES)}")
+        elif not isinstance(value, int) or value <= 0:
+            raise ValueError(f"{key} must be a positive integer")
+    return params
+
+def chunk_id(file_hash: str, char_start: int) -> str:
+    """
+    Chunk id from the document and the character offset the chunk starts
+    at, so whole-document and streaming ingestion give a chunk the same id
+    """
+    return f"{file_hash}_{char_start}"
+
+def tenant_collection_name(tenant: str) -> str:
+    """
+    Chroma collection name for a tenant: readable, within Chroma's 3-63
+    character [a-zA-Z0-9._-] rule, and unique via a hash suffix
+    """
+    slug = re.sub(r'[^a-zA-Z0-9_-]', '_', tenant)[:40].strip('_-') or 'tenant'
+    digest = hashlib.sha1(tenant.encode('utf-8')).hexdigest()[:8]
+    return f"pdf_documents_{slug}_{digest}"
 
 class VectorStore:
-    """Advanced vector store with ChromaDB for semantic search"""
+    """
+    Advanced vector store with ChromaDB for semantic search. Each instance
+    owns one collection: the shared "pdf_documents" collection by default,
+    or a per-tenant collection (with its own document registry and lexical
+    index under tenants/) when a tenant is given.
+    """
     
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    def __init__(self, persist_directory: str = "./chroma_db", embedder=None, cache=None,
+                 tenant: Optional[str] = None, client=None, hnsw_params: Optional[Dict[str, Any]] = None):
         self.persist_directory = persist_directory
-        self.client = chromadb.PersistentClient(
+        self.embedder = embedder or embedding_backend
+        self.embedding_cache = cache or embedding_cache
+        self.last_ingest_stats = {}
+        self.tenant = tenant
+        # Applied when the collection is created; use rebuild_collection to change them later
+        self.hnsw_params = validate_hnsw_params(default_hnsw_params() if hnsw_params is None else dict(hnsw_params))
+        self.client = client or chromadb.PersistentClient(
             path=persist_directory,
             settings=Settings(
                 anonymized_telemetry=False,
                 allow_reset=True
             )
         )
-        self.collection_name = "pdf_documents"
+        if tenant:
+            self.collection_name = tenant_collection_name(tenant)
+            self.data_directory = os.path.join(persist_directory, 'tenants', self.collection_name)
+        else:
+            self.collection_name = "pdf_documents"
+            self.data_directory = persist_directory
         self.collection = self._get_or_create_collection()
+        self.registry = DocumentRegistry(self.data_directory)
+        # 'legacy' (default) or 'sentence' (utils.chunking.chunk_spans)
+        self.chunker = os.getenv('VECTOR_CHUNKER', 'legacy')
+        if self.chunker not in ('legacy', 'sentence'):
+            raise ValueError(f"Unknown chunker: {self.chunker}")
+        # Optional cap on whitespace-delimited tokens per chunk (sentence chunker only)
+        self.chunk_token_budget = int(os.getenv('VECTOR_CHUNK_TOKEN_BUDGET', 0)) or None
+        # Repeated questions reuse query embeddings and top-k results;
+        # results are dropped whenever the collection changes
+        cache_size = int(os.getenv('VECTOR_QUERY_CACHE_SIZE', 1024))
+        cache_ttl = float(os.getenv('VECTOR_QUERY_CACHE_TTL', 600))
+        self.query_embedding_cache = TTLCache(cache_size, cache_ttl)
+        self.search_result_cache = TTLCache(cache_size, cache_ttl)
+        self._collection_version = 0
+        self.memory_index = MemoryIndex(self._load_document_embeddings)
+        self.memory_index.space = self.get_index_params()['space']
+        self.lexical_index = LexicalIndex(self.data_directory)
+        if self.lexical_index.count() == 0 and self.collection.count() > 0:
+            # Collection predates the lexical index
+            print(f"Built lexical index for {self.rebuild_lexical_index()} existing chunks")
     
     def _get_or_create_collection(self):
-        """Get existing collection or create new one"""
+        """Get existing collection or create new one with the configured ANN parameters"""
         try:
             collection = self.client.get_collection(name=self.collection_name)
+            # Parameters absent from the metadata are Chroma's defaults
+            existing = collection.metadata or {}
+            mismatched = [
+                key for key, value in self.hnsw_params.items()
+                if existing.get(HNSW_PARAM_KEYS[key], CHROMA_HNSW_DEFAULTS[key]) != value
+            ]
+            if mismatched:
+                print(f"Collection {self.collection_name} was built with different ANN parameters "
+                      f"({', '.join(mismatched)}); run python -m utils.rebuild_index to apply them")
         except:
             collection = self.client.create_collection(
                 name=self.collection_name,
-                metadata={"description": "PDF documents for semantic search"}
+                metadata=self._collection_metadata(self.hnsw_params)
             )
         return collection
     
+    def _collection_metadata(self, hnsw_params: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = {"description": "PDF documents for semantic search"}
+        for key, value in hnsw_params.items():
+            metadata[HNSW_PARAM_KEYS[key]] = value
+        return metadata
+    
+    def get_index_params(self) -> Dict[str, Any]:
+        """ANN parameters the current collection was built with (None where Chroma's default applies)"""
+        metadata = self.collection.metadata or {}
+        params = {key: metadata.get(metadata_key) for key, metadata_key in HNSW_PARAM_KEYS.items()}
+        params['space'] = params['space'] or 'l2'
+        return params
+    
+    def rebuild_collection(self, hnsw_params: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> Dict[str, Any]:
+        """
+        Re-create the collection with new ANN parameters from its stored
+        embeddings, without re-embedding. Chunks are copied into a staging
+        collection which then replaces the original, so ids, documents and
+        metadata are unchanged. The original is renamed aside and only
+        dropped once the staging collection has taken its name. Meant to run
+        offline: writes made while it runs may be lost.
+        """
+        hnsw_params = validate_hnsw_params(dict(self.hnsw_params if hnsw_params is None else hnsw_params))
+        started = time.perf_counter()
+        staging_name = f"{self.collection_name}_rebuild"
+        previous_name = f"{self.collection_name}_previous"
+        for name in (staging_name, previous_name):
+            try:
+                self.client.delete_collection(name=name)
+            except Exception:
+                pass
+        staging = self.client.create_collection(name=staging_name, metadata=self._collection_metadata(hnsw_params))
+        
+        total = self.collection.count()
+        for offset in range(0, total, batch_size):
+            results = self.collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=['documents', 'metadatas', 'embeddings']
+            )
+            if results['ids']:
+                staging.add(
+                    ids=results['ids'],
+                    documents=results['documents'],
+                    metadatas=results['metadatas'],
+                    embeddings=results['embeddings']
+                )
+        copied = staging.count()
+        if copied != total:
+            self.client.delete_collection(name=staging_name)
+            raise RuntimeError(f"Rebuild copied {copied} of {total} chunks; original collection kept")
+        
+        previous = self.get_index_params()
+        self.collection.modify(name=previous_name)
+        try:
+            staging.modify(name=self.collection_name)
+        except Exception:
+            self.collection.modify(name=self.collection_name)
+            raise
+        self.client.delete_collection(name=previous_name)
+        self.collection = self.client.get_collection(name=self.collection_name)
+        self.hnsw_params = hnsw_params
+        self.memory_index.clear()
+        self.memory_index.space = self.get_index_params()['space']
+        self.query_embedding_cache.clear()
+        self._collection_changed()
+        
+        return {
+            'collection_name': self.collection_name,
+            'chunks': total,
+            'previous_params': previous,
+            'params': self.get_index_params(),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+    
     def add_documents(self, documents: List[Dict[str, Any]], chunk_size: int = 1000, overlap: int = 200):
         """
-        Add documents to vector store with chunking
+        Add documents to vector store with chunking. Chunks carry only scalar
+        metadata plus the page range they span; document-level data is
+        stored once in the document registry.
+        
+        Documents the registry already lists as fully indexed are skipped.
+        For any other document only chunk ids missing from the collection
+        are embedded, so retrying a partially indexed upload is cheap.
+        Returns the number of chunks written.
         """
         all_chunks = []
         all_metadatas = []
         all_ids = []
+        pending_docs = []
+        valid_ids = {}
+        seen_hashes = set()
         
         for doc in documents:
-            chunks = self._chunk_text(doc['text_content'], chunk_size, overlap)
+            if doc['file_hash'] in seen_hashes or self.is_indexed(doc['file_hash']):
+                continue
+            seen_hashes.add(doc['file_hash'])
+            
+            ids, chunks, metadatas = self._build_chunk_records(
+                doc, doc['text_content'], doc.get('page_offsets', []), chunk_size, overlap
+            )
+            pending_docs.append((doc, len(chunks)))
+            valid_ids[doc['file_hash']] = set(ids)
             
-            for i, chunk in enumerate(chunks):
-                chunk_id = f"{doc['file_hash']}_{i}"
+            existing = self._existing_ids(ids)
+            for chunk_id, chunk, metadata in zip(ids, chunks, metadatas):
+                if chunk_id in existing:
+                    continue
                 all_ids.append(chunk_id)
-                
-                metadata = {
-                    'file_name': doc['file_name'],
-                    'file_path': doc['file_path'],
-                    'file_hash': doc['file_hash'],
-                    'chunk_index': i,
-                    'total_chunks': len(chunks),
-                    'chunk_size': len(chunk),
-                    'page_info': doc.get('pages_info', []),
-                    'metadata': doc.get('metadata', {}),
-                    'analysis': doc.get('analysis', {}),
-                    'upload_timestamp': datetime.now().isoformat()
-                }
-                all_metadatas.append(metadata)
                 all_chunks.append(chunk)
+                all_metadatas.append(metadata)
         
-        # Add to collection in batches
-        batch_size = 100
-        for i in range(0, len(all_chunks), batch_size):
-            batch_ids = all_ids[i:i + batch_size]
-            batch_chunks = all_chunks[i:i + batch_size]
-            batch_metadatas = all_metadatas[i:i + batch_size]
-            
-            self.collection.add(
-                ids=batch_ids,
-                documents=batch_chunks,
-                metadatas=batch_metadatas
-            )
+        self._add_in_batches(all_ids, all_chunks, all_metadatas)
+        
+        # Register only once every chunk is in the collection
+        for doc, chunk_count in pending_docs:
+            self._delete_stale_chunks(doc['file_hash'], valid_ids[doc['file_hash']])
+            self.registry.upsert_document(doc, chunk_count)
         
         return len(all_chunks)
     
+    def is_indexed(self, file_hash: str) -> bool:
+        """Whether a document has been fully added to the collection"""
+        return self.registry.has_document(file_hash)
+    
+    def _existing_ids(self, ids: List[str], batch_size: int = 500) -> set:
+        """Return the subset of chunk ids already present in the collection"""
+        existing = set()
+        for i in range(0, len(ids), batch_size):
+            try:
+                results = self.collection.get(ids=ids[i:i + batch_size], include=[])
+                existing.update(results['ids'])
+            except Exception as e:
+                print(f"Error checking existing chunk ids: {str(e)}")
+        return existing
+    
+    def _delete_stale_chunks(self, file_hash: str, valid_ids: set) -> int:
+        """
+        Delete chunks of a document whose ids the current chunking does not
+        produce, e.g. left behind by an interrupted upload chunked
+        differently. Returns the number of chunks deleted.
+        """
+        try:
+            results = self.collection.get(where={"file_hash": file_hash}, include=[])
+            stale = [chunk_id for chunk_id in results['ids'] if chunk_id not in valid_ids]
+            if stale:
+                self.collection.delete(ids=stale)
+                self.lexical_index.delete_chunks(stale)
+                self.memory_index.invalidate(file_hash)
+                self._collection_changed()
+            return len(stale)
+        except Exception as e:
+            print(f"Error deleting stale chunks: {str(e)}")
+            return 0
+    
+    def open_document_stream(self, doc: Dict[str, Any], chunk_size: int = 1000,
+                             overlap: int = 200) -> 'DocumentStream':
+        """
+        Start streaming ingestion of a document that is still being parsed:
+        feed pages to the returned stream with add_pages and call finish
+        with the parsed document to index the rest and register it
+        """
+        return DocumentStream(self, doc, chunk_size, overlap)
+    
+    def register_document(self, doc: Dict[str, Any], chunk_count: int) -> bool:
+        """Store document-level data (metadata, analysis, pages_info) once per file hash"""
+        return self.registry.upsert_document(doc, chunk_count)
+    
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """Per-document chunk count, size, pages and ingest time from the document registry"""
+        return self.registry.list_documents()
+    
+    def get_document_info(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Get document-level data for a file hash from the document registry"""
+        return self.registry.get_document(file_hash)
+    
+    def _build_chunk_records(self, doc: Dict[str, Any], text: str, page_offsets: List[Dict[str, Any]],
+                             chunk_size: int, overlap: int):
+        """Chunk text and build ids and slim, scalar-only metadata for each chunk"""
+        spans = [(start, end, text[start:end]) for start, end in self._chunk_spans(text, chunk_size, overlap)]
+        return self._chunk_records(doc, spans, page_offsets)
+    
+    def _chunk_records(self, doc: Dict[str, Any], spans: List[Tuple[int, int, str]],
+                       page_offsets: List[Dict[str, Any]], start_index: int = 0):
+        """Ids and metadata for (start, end, text) chunk spans; chunk_index counts on from start_index"""
+        page_starts = [page['start'] for page in page_offsets]
+        page_numbers = [page['page_number'] for page in page_offsets]
+        
+        ids = []
+        chunks = []
+        metadatas = []
+        for start, end, text in spans:
+            chunk = text.strip()
+            if not chunk:
+                continue
+            chunk_index = start_index + len(chunks)
+            page_start, page_end = self._page_range(page_starts, page_numbers, start, end)
+            
+            ids.append(chunk_id(doc['file_hash'], start))
+            chunks.append(chunk)
+            metadatas.append({
+                'file_name': doc['file_name'],
+                'file_hash': doc['file_hash'],
+                'chunk_index': chunk_index,
+                'char_start': start,
+                'chunk_size': len(chunk),
+                'page_start': page_start,
+                'page_end': page_end,
+                'upload_timestamp': datetime.now().isoformat()
+            })
+        
+        return ids, chunks, metadatas
+    
+    def _page_range(self, page_starts: List[int], page_numbers: List[int], start: int, end: int):
+        """Map a [start, end) character span to the first and last page it covers (0 if unknown)"""
+        if not page_starts:
+            return 0, 0
+        first = max(bisect.bisect_right(page_starts, start) - 1, 0)
+        last = max(bisect.bisect_right(page_starts, max(start, end - 1)) - 1, 0)
+        return page_numbers[first], page_numbers[last]
+    
+    def _add_in_batches(self, ids: List[str], chunks: List[str], metadatas: List[Dict[str, Any]],
+                        batch_size: int = 100) -> Dict[str, Any]:
+        """
+        Embed chunks in large batches on the embedding worker pool and add
+        them to the collection as each batch completes, so encoding the next
+        batch overlaps with writing the current one. Chunks already in the
+        embedding cache are not re-embedded. Writes are upserts, so existing
+        ids are overwritten rather than rejected.
+        """
+        started = time.perf_counter()
+        embed_batch_size = self.embedder.batch_size
+        futures = [
+            self.embedder.executor.submit(self._embed_cached, chunks[i:i + embed_batch_size])
+            for i in range(0, len(chunks), embed_batch_size)
+        ]
+        
+        cache_hits = 0
+        for n, future in enumerate(futures):
+            offset = n * embed_batch_size
+            embeddings, hits = future.result()
+            cache_hits += hits
+            for i in range(0, len(embeddings), batch_size):
+                # Write batches never cross into the next embedding batch
+                start, end = offset + i, offset + min(i + batch_size, len(embeddings))
+                self.collection.upsert(
+                    ids=ids[start:end],
+                    documents=chunks[start:end],
+                    metadatas=metadatas[start:end],
+                    embeddings=embeddings[i:i + batch_size].tolist()
+                )
+                batch_hashes = [metadata['file_hash'] for metadata in metadatas[start:end]]
+                self.lexical_index.add_chunks(ids[start:end], chunks[start:end], batch_hashes)
+                for file_hash in set(batch_hashes):
+                    self.memory_index.invalidate(file_hash)
+                self._collection_changed()
+        
+        elapsed = time.perf_counter() - started
+        self.last_ingest_stats = {
+            'chunks': len(chunks),
+            'seconds': round(elapsed, 3),
+            'chunks_per_second': round(len(chunks) / elapsed, 1) if elapsed > 0 else None,
+            'cache_hits': cache_hits,
+            'embedding_model': self.embedder.model_name
+        }
+        if chunks:
+            print(f"Embedded and indexed {len(chunks)} chunks in {elapsed:.2f}s "
+                  f"({self.last_ingest_stats['chunks_per_second']} chunks/sec, {cache_hits} from cache)")
+        return self.last_ingest_stats
+    
+    def _embed_cached(self, texts: List[str]) -> Tuple[np.ndarray, int]:
+        """
+        Embed texts, reading vectors for previously seen texts from the
+        embedding cache and caching the rest. Returns the vectors and the
+        number of cache hits.
+        """
+        keys = [EmbeddingCache.make_key(self.embedder.model_name, text) for text in texts]
+        cached = self.embedding_cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        
+        encoded = self.embedder.encode([texts[i] for i in missing]) if missing else None
+        if encoded is not None:
+            self.embedding_cache.put_many([keys[i] for i in missing], encoded)
+            dim = encoded.shape[1]
+        else:
+            dim = len(next(iter(cached.values())))
+        
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            if key in cached:
+                embeddings[i] = cached[key]
+        if encoded is not None:
+            embeddings[missing] = encoded
+        
+        return embeddings, len(texts) - len(missing)
+    
     def _chunk_text(self, text: str, chunk_size: int, overlap: int) -> List[str]:
         """
         Split text into overlapping chunks
         """
-        if len(text) <= chunk_size:
+        if len(text) <= chunk_size and (self.chunker == 'legacy' or not self.chunk_token_budget):
             return [text]
         
         chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            
-            # Try to break at sentence boundaries
-            if end < len(text):
-                # Look for sentence endings
-                for i in range(end, max(start + chunk_size - 100, start), -1):
-                    if text[i] in '.!?':
-                        end = i + 1
-                        break
-            
+        for start, end in self._chunk_spans(text, chunk_size, overlap):
             chunk = text[start:end].strip()
             if chunk:
                 chunks.append(chunk)
-            
-            start = end - overlap
-            if start >= len(text):
-                break
         
         return chunks
     
-    def search(self, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None) -> List[Dict[str, Any]]:
+    def _chunk_spans(self, text: str, chunk_size: int, overlap: int) -> List[Tuple[int, int]]:
         """
-        Search for relevant documents
+        Split text into overlapping [start, end) character spans with the
+        configured chunker (see utils.chunking)
         """
+        if self.chunker == 'legacy':
+            return legacy_chunk_spans(text, chunk_size, overlap)
+        
+        if len(text) <= chunk_size and not self.chunk_token_budget:
+            return [(0, len(text))]
+        
+        return chunk_spans(text, chunk_size, overlap, token_budget=self.chunk_token_budget)
+    
+    def search(self, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None,
+               mode: str = 'vector', backend: str = 'chroma') -> List[Dict[str, Any]]:
+        """
+        Search for relevant documents. mode is 'vector' (dense only),
+        'lexical' (BM25 only) or 'hybrid' (both, fused with reciprocal rank
+        fusion). Dense hits carry 'distance', BM25 hits 'bm25_score' and
+        fused hits 'rrf_score'. backend selects where dense search runs: 'chroma', or
+        'memory' for the in-process NumPy index, which needs a file_hash
+        filter and otherwise falls back to Chroma. Results for a repeated
+        (query, n_results, filter, mode, backend) are served from an
+        in-process cache until the collection changes or the entry expires.
+        """
+        cache_key = (self._collection_version, query, n_results,
+                     json.dumps(filter_metadata, sort_keys=True), mode, backend)
+        cached = self.search_result_cache.get(cache_key)
+        if cached is not None:
+            return [dict(result) for result in cached]
+        
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                where=filter_metadata
-            )
-            
-            # Format results
-            formatted_results = []
-            if results['documents'] and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    result = {
-                        'document': doc,
-                        'metadata': results['metadatas'][0][i],
-                        'distance': results['distances'][0][i] if results['distances'] else None,
-                        'id': results['ids'][0][i]
-                    }
-                    formatted_results.append(result)
+            file_hashes = self._filter_file_hashes(filter_metadata)
+            use_memory = backend == 'memory' and bool(file_hashes)
+            if mode == 'vector' or file_hashes is False:
+                # The lexical index can only filter on file_hash
+                formatted_results = self._vector_search(query, n_results, filter_metadata, use_memory)
+            elif mode == 'lexical':
+                formatted_results = self._lexical_search(query, n_results, file_hashes)
+            elif mode == 'hybrid':
+                formatted_results = self._hybrid_search(query, n_results, filter_metadata, file_hashes, use_memory)
+            else:
+                raise ValueError(f"Unknown search mode: {mode}")
             
-            return formatted_results
+            self.search_result_cache.put(cache_key, formatted_results)
+            return [dict(result) for result in formatted_results]
             
         except Exception as e:
-            print(f"Error in vector search: {str(e)}")
+            print(f"Error in {mode} search: {str(e)}")
+            return []
+    
+    def _vector_search(self, query: str, n_results: int, filter_metadata: Optional[Dict],
+                       use_memory: bool = False) -> List[Dict[str, Any]]:
+        """Dense nearest-neighbour search in the in-memory index or the Chroma collection"""
+        if use_memory:
+            return self.memory_index.search(
+                self._embed_query(query), n_results, self._filter_file_hashes(filter_metadata)
+            )
+        
+        results = self.collection.query(
+            query_embeddings=[self._embed_query(query)],
+            n_results=n_results,
+            where=filter_metadata
+        )
+        
+        # Format results
+        formatted_results = []
+        if results['documents'] and results['documents'][0]:
+            for i, doc in enumerate(results['documents'][0]):
+                result = {
+                    'document': doc,
+                    'metadata': results['metadatas'][0][i],
+                    'distance': results['distances'][0][i] if results['distances'] else None,
+                    'id': results['ids'][0][i]
+                }
+                formatted_results.append(result)
+        
+        return formatted_results
+    
+    def _lexical_search(self, query: str, n_results: int,
+                        file_hashes: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """BM25 search in the lexical index"""
+        ranked = self.lexical_index.search(query, n_results, file_hashes)
+        scores = dict(ranked)
+        results = self._get_chunks_by_id([chunk_id for chunk_id, _ in ranked])
+        for result in results:
+            result['bm25_score'] = scores[result['id']]
+        return results
+    
+    def _hybrid_search(self, query: str, n_results: int, filter_metadata: Optional[Dict],
+                       file_hashes: Optional[List[str]], use_memory: bool = False) -> List[Dict[str, Any]]:
+        """
+        Fuse dense and BM25 rankings with reciprocal rank fusion. Each
+        ranking contributes a deeper candidate list than n_results so that
+        chunks ranked moderately by both can surface.
+        """
+        candidates = max(n_results * HYBRID_CANDIDATE_FACTOR, n_results)
+        dense = self._vector_search(query, candidates, filter_metadata, use_memory)
+        lexical = self.lexical_index.search(query, candidates, file_hashes)
+        
+        fused = reciprocal_rank_fusion([
+            [result['id'] for result in dense],
+            [chunk_id for chunk_id, _ in lexical]
+        ])[:n_results]
+        
+        by_id = {result['id']: result for result in dense}
+        missing = [chunk_id for chunk_id, _ in fused if chunk_id not in by_id]
+        for result in self._get_chunks_by_id(missing):
+            result['distance'] = None
+            by_id[result['id']] = result
+        
+        bm25_scores = dict(lexical)
+        results = []
+        for chunk_id, score in fused:
+            if chunk_id in by_id:
+                result = dict(by_id[chunk_id])
+                result['bm25_score'] = bm25_scores.get(chunk_id)
+                result['rrf_score'] = score
+                results.append(result)
+        return results
+    
+    def _load_document_embeddings(self, file_hash: str):
+        """Loader for the in-memory index: ids, texts, metadata and embeddings of one document"""
+        results = self.collection.get(
+            where={"file_hash": file_hash},
+            include=['documents', 'metadatas', 'embeddings']
+        )
+        return results['ids'], results['documents'], results['metadatas'], results['embeddings']
+    
+    def _get_chunks_by_id(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch chunks by id, in the order given"""
+        if not ids:
             return []
+        results = self.collection.get(ids=ids)
+        by_id = {
+            chunk_id: {'document': doc, 'metadata': metadata, 'id': chunk_id}
+            for chunk_id, doc, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+        }
+        return [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
+    
+    def _filter_file_hashes(self, filter_metadata: Optional[Dict]):
+        """
+        Translate a Chroma where filter into the file hashes the lexical
+        index can filter on: None for no filter, False if the filter uses
+        other fields
+        """
+        if not filter_metadata:
+            return None
+        if set(filter_metadata) != {'file_hash'}:
+            return False
+        condition = filter_metadata['file_hash']
+        if isinstance(condition, str):
+            return [condition]
+        if isinstance(condition, dict) and set(condition) == {'$in'}:
+            return list(condition['$in'])
+        if isinstance(condition, dict) and set(condition) == {'$eq'}:
+            return [condition['$eq']]
+        return False
+    
+    def rebuild_lexical_index(self, batch_size: int = 1000) -> int:
+        """Rebuild the lexical index from every chunk in the collection"""
+        self.lexical_index.clear()
+        total = self.collection.count()
+        for offset in range(0, total, batch_size):
+            results = self.collection.get(limit=batch_size, offset=offset, include=['documents', 'metadatas'])
+            self.lexical_index.add_chunks(
+                results['ids'],
+                results['documents'],
+                [metadata.get('file_hash', '') for metadata in results['metadatas']]
+            )
+        self._collection_changed()
+        return total
+    
+    def _collection_changed(self):
+        """Invalidate cached search results after a write to the collection"""
+        self._collection_version += 1
+        self.search_result_cache.clear()
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing the vector for recently seen query text"""
+        embedding = self.query_embedding_cache.get(query)
+        if embedding is None:
+            embedding = self.embedder.encode([query])[0].tolist()
+            self.query_embedding_cache.put(query, embedding)
+        return embedding
     
     def get_document_by_hash(self, file_hash: str) -> List[Dict[str, Any]]:
         """
@@ -170,6 +674,10 @@ class VectorStore:
             self.collection.delete(
                 where={"file_hash": file_hash}
             )
+            self.lexical_index.delete_document(file_hash)
+            self.memory_index.invalidate(file_hash)
+            self._collection_changed()
+            self.registry.delete_document(file_hash)
             return True
         except Exception as e:
             print(f"Error deleting document: {str(e)}")
@@ -177,28 +685,28 @@ class VectorStore:
     
     def get_collection_stats(self) -> Dict[str, Any]:
         """
-        Get statistics about the collection
+        Get statistics about the collection. File, chunk, page and byte
+        totals are exact and come from the document registry in constant
+        time instead of sampling the collection.
         """
         try:
             count = self.collection.count()
-            
-            # Get sample documents for analysis
-            sample_results = self.collection.get(limit=100)
-            
-            unique_files = set()
-            total_chunks = 0
-            
-            if sample_results['metadatas']:
-                for metadata in sample_results['metadatas']:
-                    unique_files.add(metadata.get('file_hash', ''))
-                    total_chunks += 1
+            registry_stats = self.registry.get_stats()
             
             return {
                 'total_documents': count,
-                'unique_files': len(unique_files),
-                'estimated_total_chunks': total_chunks,
+                'unique_files': registry_stats.get('documents', 0),
+                'total_chunks': registry_stats.get('chunks', 0),
+                'total_pages': registry_stats.get('pages', 0),
+                'total_bytes': registry_stats.get('bytes', 0),
+                'total_text_length': registry_stats.get('text_length', 0),
+                'last_ingest': registry_stats.get('last_ingest'),
                 'collection_name': self.collection_name,
-                'persist_directory': self.persist_directory
+                'tenant': self.tenant,
+                'persist_directory': self.persist_directory,
+                'index_params': self.get_index_params(),
+                'query_cache': self.search_result_cache.get_stats(),
+                'memory_index': self.memory_index.get_stats()
             }
             
         except Exception as e:
@@ -212,10 +720,101 @@ class VectorStore:
         try:
             self.client.delete_collection(name=self.collection_name)
             self.collection = self._get_or_create_collection()
+            self.lexical_index.clear()
+            self.memory_index.clear()
+            self._collection_changed()
+            self.registry.clear()
             return True
         except Exception as e:
             print(f"Error resetting collection: {str(e)}")
             return False
 
-# Global vector store instance
-vector_store = VectorStore()
+    def drop(self) -> bool:
+        """
+        Delete a tenant collection together with its registry and lexical
+        index files. The shared default collection can only be reset.
+        """
+        if not self.tenant:
+            return self.reset_collection()
+        try:
+            self.client.delete_collection(name=self.collection_name)
+            self.memory_index.clear()
+            self._collection_changed()
+            shutil.rmtree(self.data_directory, ignore_errors=True)
+            return True
+        except Exception as e:
+            print(f"Error dropping tenant collection: {str(e)}")
+            return False
+
+class DocumentStream:
+    """
+    Streaming ingestion of one document into a VectorStore. Pages can
+    arrive in any order (OCR pages come late); each is held back until it
+    extends the contiguous run from page 1, so the text is chunked in page
+    order with overlap across batches, and chunks get the same spans and
+    ids add_documents would give them.
+    """
+    
+    def __init__(self, store: VectorStore, doc: Dict[str, Any], chunk_size: int, overlap: int):
+        self.store = store
+        self.doc = doc
+        self.chunks = ChunkStream(lambda text: store._chunk_spans(text, chunk_size, overlap), chunk_size)
+        self.pending_pages = {}
+        self.next_page = 1
+        self.page_offsets = []
+        self.ids = []
+    
+    @property
+    def chunk_count(self) -> int:
+        return len(self.ids)
+    
+    def add_pages(self, pages: List[Dict[str, Any]]) -> int:
+        """Index the chunks the given page events complete; returns the number added"""
+        for page in pages:
+            self.pending_pages[page['page_number']] = page['text']
+        
+        texts = []
+        offset = self.chunks.length
+        while self.next_page in self.pending_pages:
+            text = self.pending_pages.pop(self.next_page)
+            self.page_offsets.append({'page_number': self.next_page, 'start': offset, 'end': offset + len(text)})
+            texts.append(text)
+            offset += len(text)
+            self.next_page += 1
+        
+        if not texts:
+            return 0
+        return self._add(self.chunks.feed("".join(texts)))
+    
+    def finish(self, doc: Dict[str, Any]) -> int:
+        """
+        Index the rest of the parsed document, drop chunks an earlier
+        attempt left under other ids and register the document. Returns the
+        number of chunks added by this call.
+        """
+        self.doc = doc
+        self.page_offsets = doc.get('page_offsets') or self.page_offsets
+        added = self._add(self.chunks.finish(doc['text_content'][self.chunks.length:]))
+        self.store._delete_stale_chunks(doc['file_hash'], set(self.ids))
+        self.store.register_document(doc, self.chunk_count)
+        return added
+    
+    def _add(self, spans: List[Tuple[int, int, str]]) -> int:
+        ids, chunks, metadatas = self.store._chunk_records(self.doc, spans, self.page_offsets, self.chunk_count)
+        self.store._add_in_batches(ids, chunks, metadatas)
+        self.ids.extend(ids)
+        return len(ids)
+
+# Global vector store instance, created on first access so that importing
+# VectorStore (e.g. from offline tools) does not open ./chroma_db
+_vector_store = None
+_vector_store_lock = threading.Lock()
+
+def __getattr__(name: str):
+    global _vector_store
+    if name == 'vector_store':
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = VectorStore()
+        return _vector_store
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")